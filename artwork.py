@@ -0,0 +1,245 @@
+import os
+import json
+import hashlib
+import threading
+from logger import logger
+
+# Emplacement par défaut de l'index des empreintes d'images
+DEFAULT_ARTWORK_INDEX = os.path.join("cache", "artwork.json")
+
+# Taille des blocs lus au début et à la fin d'un fichier pour le pré-filtre
+PARTIAL_BLOCK = 64 * 1024
+
+# Taille des blocs lus pour une empreinte complète
+READ_BLOCK = 1024 * 1024
+
+
+def partial_signature(image_path, size):
+    """
+    Calcule l'empreinte rapide d'un fichier : sa taille et le hash de son premier et
+    de son dernier bloc. Pour un fichier de moins de deux blocs, elle couvre tout le contenu.
+
+    Args:
+        image_path (str): Le chemin du fichier.
+        size (int): La taille du fichier.
+
+    Returns:
+        str: L'empreinte, sous la forme "<taille>-<sha1>".
+    """
+    digest = hashlib.sha1()
+    with open(image_path, "rb") as f:
+        digest.update(f.read(PARTIAL_BLOCK))
+        if size > PARTIAL_BLOCK:
+            f.seek(max(PARTIAL_BLOCK, size - PARTIAL_BLOCK))
+            digest.update(f.read(PARTIAL_BLOCK))
+    return f"{size:x}-{digest.hexdigest()}"
+
+
+def full_hash(image_path):
+    """Retourne le sha1 du contenu complet d'un fichier."""
+    digest = hashlib.sha1()
+    with open(image_path, "rb") as f:
+        for block in iter(lambda: f.read(READ_BLOCK), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ArtworkStore:
+    """
+    Adressage des images par leur contenu.
+
+    Chaque image reçoit une empreinte : deux fichiers identiques, où qu'ils soient
+    dans la bibliothèque, ont la même empreinte et partagent donc une seule
+    miniature sur disque et une seule PhotoImage en mémoire.
+
+    L'empreinte d'un fichier est d'abord sa taille et le hash de ses blocs de début
+    et de fin. Le contenu complet n'est lu que si un autre fichier a déjà la même
+    empreinte rapide, pour confirmer ou infirmer le doublon. Les empreintes sont
+    conservées par chemin avec le mtime et la taille du fichier, et persistées :
+    une image inchangée n'est jamais relue.
+    """
+
+    VERSION = 1
+
+    def __init__(self, index_path=DEFAULT_ARTWORK_INDEX):
+        """
+        Initialise le stockage et charge l'index depuis le disque s'il existe.
+
+        Args:
+            index_path (str): Le fichier de l'index, ou None pour un index en mémoire seulement.
+        """
+        self.index_path = index_path
+        self.lock = threading.RLock()
+        self.save_lock = threading.Lock()  # Une seule écriture du fichier temporaire à la fois
+        # Chemin absolu -> [mtime_ns, taille, empreinte]
+        self.files = {}
+        # Empreinte rapide -> liste de [empreinte, sha1 complet ou None, chemin de référence]
+        self.groups = {}
+        self.dirty = False
+        # Compteurs de lectures, pour mesurer l'efficacité du pré-filtre
+        self.partial_reads = 0
+        self.full_reads = 0
+        self.load()
+
+    def load(self):
+        """Charge l'index depuis le disque. Un index absent ou invalide est ignoré."""
+        if not self.index_path or not os.path.exists(self.index_path):
+            return
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != self.VERSION:
+                return
+            with self.lock:
+                self.files = data.get("files", {})
+                self.groups = data.get("groups", {})
+        except (OSError, ValueError) as e:
+            logger.warning(f"Impossible de charger l'index des images {self.index_path}: {e}")
+
+    def save(self):
+        """
+        Enregistre l'index sur le disque de manière atomique s'il a été modifié.
+
+        Peut être appelée depuis un thread de travail pendant que des empreintes sont calculées :
+        l'index est copié sous verrou, puis écrit hors verrou.
+        """
+        if not self.index_path:
+            return
+        with self.save_lock:
+            with self.lock:
+                if not self.dirty:
+                    return
+                data = {"version": self.VERSION, "files": dict(self.files),
+                        "groups": {signature: [list(entry) for entry in group]
+                                   for signature, group in self.groups.items()}}
+                self.dirty = False
+
+            try:
+                index_dir = os.path.dirname(self.index_path)
+                if index_dir and not os.path.exists(index_dir):
+                    os.makedirs(index_dir)
+                tmp_path = self.index_path + ".tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(data, f, separators=(",", ":"))
+                os.replace(tmp_path, self.index_path)
+            except OSError as e:
+                logger.warning(f"Impossible d'enregistrer l'index des images {self.index_path}: {e}")
+
+    def cached_digest(self, image_path):
+        """
+        Retourne l'empreinte connue d'une image si le fichier n'a pas changé, sans le lire.
+
+        Returns:
+            str: L'empreinte, ou None si elle doit être calculée.
+
+        Raises:
+            OSError: Si le fichier est inaccessible.
+        """
+        stat = os.stat(image_path)
+        with self.lock:
+            record = self.files.get(os.path.abspath(image_path))
+        if record is not None and record[0] == stat.st_mtime_ns and record[1] == stat.st_size:
+            return record[2]
+        return None
+
+    def digest(self, image_path):
+        """
+        Retourne l'empreinte du contenu d'une image, en la calculant si nécessaire.
+
+        Peut être appelée depuis plusieurs threads.
+
+        Args:
+            image_path (str): Le chemin de l'image.
+
+        Returns:
+            str: L'empreinte ; deux images de même empreinte ont le même contenu.
+
+        Raises:
+            OSError: Si le fichier est illisible.
+        """
+        path = os.path.abspath(image_path)
+        stat = os.stat(path)
+        with self.lock:
+            record = self.files.get(path)
+            if record is not None and record[0] == stat.st_mtime_ns and record[1] == stat.st_size:
+                return record[2]
+
+        signature = partial_signature(path, stat.st_size)
+        references = None
+        with self.lock:
+            self.partial_reads += 1
+            group = self.groups.get(signature)
+            if stat.st_size <= 2 * PARTIAL_BLOCK:
+                # L'empreinte rapide couvre déjà tout le fichier
+                digest = signature
+            elif group is None:
+                # Premier fichier de cette empreinte rapide : il la reçoit telle quelle
+                self.groups[signature] = [[signature, None, path]]
+                digest = signature
+            else:
+                # Fichiers de référence dont le contenu complet reste à lire : (empreinte, chemin, mtime connu)
+                references = []
+                for entry in group:
+                    reference = self.files.get(entry[2])
+                    if entry[1] is None and entry[2] != path and reference is not None:
+                        references.append((entry[0], entry[2], reference[0]))
+        if references is not None:
+            # Lectures complètes hors verrou : cached_digest reste immédiat pour l'interface
+            digest = self.resolve_group(path, signature, references)
+        with self.lock:
+            self.files[path] = [stat.st_mtime_ns, stat.st_size, digest]
+            self.dirty = True
+        return digest
+
+    def resolve_group(self, path, signature, references):
+        """
+        Attribue une empreinte à un fichier volumineux dont l'empreinte rapide est déjà connue.
+
+        Le fichier et les références non encore hachées sont lus en entier hors verrou ;
+        le verrou n'est pris que pour publier les résultats. Identique à un fichier
+        connu, le fichier reprend son empreinte ; différent, il en reçoit une nouvelle.
+
+        Args:
+            path (str): Le chemin absolu du fichier.
+            signature (str): Son empreinte rapide.
+            references (list): (empreinte, chemin, mtime_ns connu) des fichiers du groupe à hacher.
+
+        Returns:
+            str: L'empreinte du fichier.
+        """
+        content = full_hash(path)
+        hashed = {}
+        for digest, reference_path, mtime_ns in references:
+            try:
+                # Référence modifiée depuis son empreinte : elle ne désigne plus son contenu
+                if os.stat(reference_path).st_mtime_ns != mtime_ns:
+                    continue
+                hashed[(digest, reference_path)] = full_hash(reference_path)
+            except OSError:
+                continue
+
+        with self.lock:
+            self.full_reads += 1 + len(hashed)
+            group = self.groups.setdefault(signature, [])
+            # Le fichier a pu être modifié sans changer d'empreinte rapide :
+            # son ancienne empreinte ne désigne plus son contenu
+            group[:] = [entry for entry in group if entry[2] != path]
+            for entry in group:
+                if entry[1] is None:
+                    entry[1] = hashed.get((entry[0], entry[2]))
+                if entry[1] == content:
+                    return entry[0]
+
+            digest = f"{signature}-{content[:16]}"
+            group.append([digest, content, path])
+            return digest
+
+    def prune(self):
+        """Oublie les fichiers disparus. Retourne le nombre d'entrées supprimées."""
+        with self.lock:
+            missing = [path for path in self.files if not os.path.exists(path)]
+            for path in missing:
+                del self.files[path]
+            if missing:
+                self.dirty = True
+        return len(missing)
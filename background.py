@@ -0,0 +1,82 @@
+import os
+import sys
+import threading
+from logger import logger
+
+# Valeur nice des threads d'arrière-plan sous Linux
+BACKGROUND_NICE = 10
+
+
+class BackgroundGate:
+    """
+    Suspension coopérative des travaux d'arrière-plan (scan, miniatures, surveillance).
+
+    Les travaux appellent wait() entre deux étapes : tant que le lanceur est en
+    pause (mode jeu), ils restent bloqués sans consommer de CPU ni d'E/S, puis
+    reprennent là où ils s'étaient arrêtés.
+    """
+
+    def __init__(self):
+        """Initialise la barrière, ouverte."""
+        self.running = threading.Event()
+        self.running.set()
+        self.listeners = []
+
+    @property
+    def paused(self):
+        """Indique si les travaux d'arrière-plan sont suspendus."""
+        return not self.running.is_set()
+
+    def pause(self):
+        """Suspend les travaux d'arrière-plan à leur prochaine étape."""
+        self.running.clear()
+
+    def resume(self):
+        """Reprend les travaux d'arrière-plan et prévient les abonnés."""
+        self.running.set()
+        for callback in list(self.listeners):
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"Erreur lors de la reprise d'un travail d'arrière-plan: {e}", exc_info=True)
+
+    def wait(self, timeout=None):
+        """
+        Bloque tant que les travaux sont suspendus.
+
+        Args:
+            timeout (float, optional): Durée maximale d'attente en secondes.
+
+        Returns:
+            bool: True si les travaux peuvent continuer, False si le délai est écoulé.
+        """
+        return self.running.wait(timeout)
+
+    def add_resume_listener(self, callback):
+        """Abonne une fonction appelée (depuis un thread quelconque) à chaque reprise."""
+        self.listeners.append(callback)
+
+
+def lower_thread_priority():
+    """
+    Abaisse la priorité CPU du thread appelant, au début d'un travail d'arrière-plan.
+
+    Sous Linux, la valeur nice est propre à chaque thread : seuls le scan, les
+    miniatures, la surveillance, le préchargement et l'échantillonnage cèdent le
+    CPU aux jeux, tandis que les threads qui lancent les jeux gardent la priorité
+    normale dont ceux-ci héritent. Un thread non privilégié ne pouvant pas remonter
+    sa priorité, elle reste abaissée pour toute sa durée. Sous Windows, la priorité
+    est propre au processus : voir GameMode.
+    """
+    if not sys.platform.startswith("linux"):
+        return
+    thread_id = threading.get_native_id()
+    try:
+        if os.getpriority(os.PRIO_PROCESS, thread_id) < BACKGROUND_NICE:
+            os.setpriority(os.PRIO_PROCESS, thread_id, BACKGROUND_NICE)
+    except OSError as e:
+        logger.debug(f"Impossible d'abaisser la priorité du thread {threading.current_thread().name}: {e}")
+
+
+# Instance globale partagée par les travaux d'arrière-plan
+background = BackgroundGate()
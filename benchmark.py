@@ -0,0 +1,559 @@
+"""
+Banc d'essai du lanceur de jeux sur des bibliothèques synthétiques.
+
+Mesure le scan (à froid et à chaud, avec et sans index), la génération des
+miniatures, la construction des cartes de l'interface (nécessite un affichage,
+par exemple via xvfb-run), le démarrage jusqu'au premier affichage, le préchargement des fichiers d'un jeu
+et les cycles lancement/fermeture de GameManager.
+Les résultats sont écrits en JSON pour comparaison entre commits.
+
+Usage :
+    python benchmark.py --scale 100,1000,10000 --output bench.json
+    python benchmark.py --only scan --compare bench.json
+    xvfb-run python benchmark.py --only ui
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from logger import logger
+
+BENCHMARKS = ("scan", "thumbnails", "ui", "startup", "prefetch", "process", "model")
+
+# Modules lourds qui ne doivent pas être chargés au démarrage de l'interface
+DEFERRED_MODULES = ("PIL.Image", "psutil")
+
+# Jeu factice lisant ses fichiers de données par blocs à des positions dispersées
+PREFETCH_GAME_SCRIPT = """
+import os, random, sys
+rng = random.Random(0)
+for name in sorted(os.listdir(sys.argv[1])):
+    path = os.path.join(sys.argv[1], name)
+    size = os.path.getsize(path)
+    with open(path, "rb", buffering=0) as f:
+        for _ in range(size // (1024 * 1024)):
+            f.seek(rng.randrange(0, max(1, size - 65536)))
+            f.read(65536)
+"""
+
+# Script exécuté dans un interpréteur neuf pour mesurer les imports du démarrage
+STARTUP_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import main
+print(json.dumps({"import_seconds": time.perf_counter() - start,
+                  "deferred_loaded": [name for name in %r if name in sys.modules]}))
+"""
+
+# Noms de dossiers parasites générés pour vérifier leur exclusion
+NOISE_DIRECTORIES = ("_CommonRedist", "__redist", "DirectX")
+
+
+def generate_library(root, executables, depth=3, image_ratio=0.5, noise_ratio=0.2, seed=0,
+                     with_images=False):
+    """
+    Génère une arborescence de jeux synthétique.
+
+    Args:
+        root (str): Le dossier de destination (créé si nécessaire).
+        executables (int): Nombre d'exécutables de jeux à créer.
+        depth (int): Profondeur d'imbrication des dossiers de jeux.
+        image_ratio (float): Proportion de jeux accompagnés d'une image.
+        noise_ratio (float): Proportion de jeux contenant un dossier redistribuable.
+        seed (int): Graine du générateur aléatoire.
+        with_images (bool): Écrire de vraies images PNG (sinon des fichiers vides).
+
+    Returns:
+        list: Les chemins des images créées.
+    """
+    rng = random.Random(seed)
+    images = []
+    extensions = (".exe", ".exe", ".exe", ".lnk", ".bat", ".cmd")
+    image_extensions = (".png", ".jpg")
+
+    for i in range(executables):
+        parts = [f"groupe{rng.randrange(max(1, executables // 50))}" for _ in range(depth - 1)]
+        game_dir = os.path.join(root, *parts, f"Jeu {i:05d}")
+        os.makedirs(game_dir, exist_ok=True)
+
+        name = f"jeu{i:05d}"
+        extension = rng.choice(extensions)
+        if extension == ".lnk":
+            # Raccourci valide vers un binaire du dossier, pour que l'analyseur soit exercé
+            open(os.path.join(game_dir, name + ".bin"), "wb").close()
+            write_shortcut(os.path.join(game_dir, name + ".lnk"), name + ".bin")
+        else:
+            open(os.path.join(game_dir, name + extension), "wb").close()
+        # Fichiers de données ordinaires
+        for j in range(3):
+            open(os.path.join(game_dir, f"data{j}.pak"), "wb").close()
+
+        if rng.random() < image_ratio:
+            image_dir = game_dir if rng.random() < 0.5 else os.path.join(game_dir, "images")
+            os.makedirs(image_dir, exist_ok=True)
+            image_name = name if image_dir != game_dir or rng.random() < 0.5 else "cover"
+            image_path = os.path.join(image_dir, image_name + rng.choice(image_extensions))
+            images.append(image_path)
+            if not with_images:
+                open(image_path, "wb").close()
+
+        if rng.random() < noise_ratio:
+            noise_dir = os.path.join(game_dir, rng.choice(NOISE_DIRECTORIES), "x64")
+            os.makedirs(noise_dir, exist_ok=True)
+            open(os.path.join(noise_dir, "vcredist.exe"), "wb").close()
+
+    if with_images:
+        write_images(images, seed)
+    return images
+
+
+def write_shortcut(path, relative_target, arguments="-windowed"):
+    """Écrit un raccourci Windows (.lnk) minimal désignant sa cible par un chemin relatif."""
+    import struct
+    from shortcuts import HEADER_SIZE, LINK_CLSID, HAS_RELATIVE_PATH, HAS_ARGUMENTS, IS_UNICODE
+    flags = HAS_RELATIVE_PATH | HAS_ARGUMENTS | IS_UNICODE
+    data = struct.pack("<I16sI", HEADER_SIZE, LINK_CLSID, flags).ljust(HEADER_SIZE, b"\0")
+    for value in (".\\" + relative_target, arguments):
+        data += struct.pack("<H", len(value)) + value.encode("utf-16-le")
+    data += struct.pack("<I", 0)  # Fin des blocs ExtraData
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def write_images(paths, seed=0, size=(1024, 1024)):
+    """Écrit des images de couverture de la taille donnée aux chemins indiqués."""
+    from PIL import Image
+    rng = random.Random(seed)
+    for path in paths:
+        color = (rng.randrange(256), rng.randrange(256), rng.randrange(256))
+        image = Image.new("RGB", size, color)
+        image.save(path, "JPEG" if path.lower().endswith(".jpg") else "PNG")
+
+
+def drop_file_cache():
+    """Tente de vider le cache de pages du système (Linux, root). Retourne True si possible."""
+    try:
+        subprocess.run(["sync"], check=False)
+        with open("/proc/sys/vm/drop_caches", "w") as f:
+            f.write("3\n")
+        return True
+    except OSError:
+        return False
+
+
+def timed(func, repeat=1):
+    """Exécute func plusieurs fois et retourne (médiane en secondes, dernier résultat)."""
+    durations = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations), result
+
+
+def bench_scan(workdir, scale, repeat):
+    """Mesure le scan d'une bibliothèque synthétique."""
+    from scanner import scan_games_directory
+    from scan_index import ScanIndex
+
+    library = os.path.join(workdir, f"library_{scale}")
+    generate_library(library, scale)
+
+    cold_cache = drop_file_cache()
+    cold, games = timed(lambda: scan_games_directory(library))
+    warm, _ = timed(lambda: scan_games_directory(library), repeat)
+
+    index_path = os.path.join(workdir, f"index_{scale}.json")
+    index_build, _ = timed(lambda: scan_games_directory(library, index=ScanIndex(index_path)))
+    index = ScanIndex(index_path)
+    incremental, _ = timed(lambda: scan_games_directory(library, index=index), repeat)
+    cached, _ = timed(lambda: ScanIndex(index_path).cached_games(library), repeat)
+
+    return {
+        "games": len(games),
+        "cold_seconds": cold,
+        "cold_is_uncached": cold_cache,
+        "warm_seconds": warm,
+        "index_build_seconds": index_build,
+        "incremental_seconds": incremental,
+        "cached_load_seconds": cached,
+    }
+
+
+def bench_thumbnails(workdir, scale, repeat):
+    """
+    Mesure la génération des miniatures (cache vide puis cache disque rempli).
+
+    Un quart des images sont des copies d'une même icône, comme les icônes de
+    lanceur livrées à l'identique par plusieurs jeux.
+    """
+    from artwork import ArtworkStore
+    from thumbnails import ensure_thumbnail, THUMBNAIL_SIZE
+
+    count = min(scale, 500)
+    source_dir = os.path.join(workdir, f"covers_{count}")
+    os.makedirs(source_dir, exist_ok=True)
+    paths = [os.path.join(source_dir, f"cover{i}" + (".jpg" if i % 2 else ".png")) for i in range(count)]
+    write_images(paths)
+    for path in paths[2::4]:
+        shutil.copyfile(paths[0], path)
+
+    cache_dir = os.path.join(workdir, f"thumbs_{count}")
+    store = ArtworkStore(None)
+    cold, _ = timed(lambda: [ensure_thumbnail(p, store.digest(p), THUMBNAIL_SIZE, cache_dir) for p in paths])
+    warm, _ = timed(lambda: [ensure_thumbnail(p, store.digest(p), THUMBNAIL_SIZE, cache_dir) for p in paths],
+                    repeat)
+    thumbnails = sum(len(files) for _, _, files in os.walk(cache_dir))
+    return {
+        "images": count,
+        "cold_seconds": cold,
+        "cold_per_image_ms": cold / count * 1000,
+        "warm_seconds": warm,
+        "thumbnails_on_disk": thumbnails,
+        "full_hash_reads": store.full_reads,
+    }
+
+
+def bench_ui(workdir, scale, repeat):
+    """Mesure la construction et le défilement de la liste de jeux (nécessite un affichage)."""
+    if sys.platform.startswith("linux") and not os.environ.get("DISPLAY"):
+        return {"skipped": "pas d'affichage (lancer via xvfb-run)"}
+
+    import tkinter as tk
+    from models.game import Game
+    from game_view import VirtualGameView
+    from thumbnails import ThumbnailCache, ThumbnailLoader
+
+    games = [Game(f"Jeu {i:05d}", os.path.join(workdir, f"jeu{i}.exe")) for i in range(scale)]
+    root = tk.Tk()
+    root.geometry("800x600")
+    canvas = tk.Canvas(root)
+    scrollbar = tk.Scrollbar(root)
+    canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+    scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+    loader = ThumbnailLoader(root, ThumbnailCache(os.path.join(workdir, "ui_thumbs")))
+    view = VirtualGameView(canvas, scrollbar, loader, lambda g: None, lambda g: None)
+    root.update()
+
+    def build():
+        view.set_games([])
+        view.set_games(games)
+        root.update()
+
+    def scroll():
+        for step in range(50):
+            canvas.yview_moveto(step / 50)
+            root.update()
+
+    try:
+        build_time, _ = timed(build, repeat)
+        scroll_time, _ = timed(scroll)
+        widgets = len(view.visible_cards) + len(view.free_cards)
+    finally:
+        loader.shutdown()
+        root.destroy()
+    return {
+        "build_seconds": build_time,
+        "scroll_frame_ms": scroll_time / 50 * 1000,
+        "cards": widgets,
+    }
+
+
+def bench_startup(workdir, scale, repeat):
+    """
+    Mesure le démarrage à froid : imports dans un interpréteur neuf, lecture de
+    l'instantané de l'interface et, si un affichage est disponible, premier affichage
+    de la bibliothèque depuis cet instantané.
+    """
+    from library import LibraryRoot
+    from models.game import Game
+    from thumbnails import ThumbnailCache
+    from ui_snapshot import save_snapshot, load_snapshot
+
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.abspath(__file__)))
+    script = STARTUP_SCRIPT % (DEFERRED_MODULES,)
+
+    def start_interpreter():
+        output = subprocess.run([sys.executable, "-c", script], cwd=workdir, env=env, check=True,
+                                capture_output=True, text=True).stdout
+        return json.loads(output.splitlines()[-1])
+
+    process_time, imports = timed(start_interpreter, repeat)
+    import_times = [start_interpreter()["import_seconds"] for _ in range(repeat)]
+
+    roots = [LibraryRoot(os.path.join(workdir, f"startup_{scale}"))]
+    games = [Game(f"Jeu {i:05d}", os.path.join(roots[0].path, f"jeu{i}.exe"),
+                  os.path.join(roots[0].path, f"jeu{i}.png")) for i in range(scale)]
+    snapshot_path = os.path.join(workdir, f"ui_snapshot_{scale}.json")
+    thumbnails = ThumbnailCache(os.path.join(workdir, "startup_thumbs"))
+    save_snapshot(roots, games, thumbnails, snapshot_path=snapshot_path)
+    load_time, _ = timed(lambda: load_snapshot(roots, snapshot_path), repeat)
+
+    results = {
+        "process_seconds": process_time,
+        "import_seconds": statistics.median(import_times),
+        "deferred_modules_loaded": imports["deferred_loaded"],
+        "snapshot_bytes": os.path.getsize(snapshot_path),
+        "snapshot_load_seconds": load_time,
+    }
+    if sys.platform.startswith("linux") and not os.environ.get("DISPLAY"):
+        results["paint_skipped"] = "pas d'affichage (lancer via xvfb-run)"
+        return results
+
+    import tkinter as tk
+    from game_manager import GameManager
+    from interface import GameLauncherUI
+
+    def paint():
+        root = tk.Tk()
+        app = GameLauncherUI(root, None, GameManager(), roots=roots)
+        try:
+            app.show_snapshot(load_snapshot(roots, snapshot_path))
+            root.update()
+        finally:
+            app.thumbnail_loader.shutdown()
+            root.destroy()
+
+    results["paint_seconds"], _ = timed(paint, repeat)
+    return results
+
+
+def evict_files(paths):
+    """Retire des fichiers du cache de pages (posix_fadvise DONTNEED). Retourne True si possible."""
+    if not hasattr(os, "posix_fadvise"):
+        return False
+    os.sync()
+    for path in paths:
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(fd)
+    return True
+
+
+def bench_prefetch(workdir, scale, repeat):
+    """
+    Mesure le démarrage d'un jeu factice qui lit ses données, avec et sans préchargement.
+
+    Le cache de pages est vidé pour les fichiers du jeu avant chaque mesure.
+    """
+    from models.game import Game
+    from prefetch import Prefetcher
+
+    game_dir = os.path.join(workdir, "prefetch_game")
+    data_dir = os.path.join(game_dir, "data")
+    os.makedirs(data_dir, exist_ok=True)
+    script = os.path.join(game_dir, "game.py")
+    with open(script, "w", encoding="utf-8") as f:
+        f.write(PREFETCH_GAME_SCRIPT)
+    paths = [script]
+    for i in range(4):
+        path = os.path.join(data_dir, f"data{i}.pak")
+        with open(path, "wb") as f:
+            for _ in range(32):
+                f.write(os.urandom(1024 * 1024))
+        paths.append(path)
+
+    game = Game("Jeu préchargé", script)
+    prefetcher = Prefetcher(None)
+
+    def run_game():
+        subprocess.run([sys.executable, script, data_dir], check=True)
+
+    def cold():
+        evict_files(paths)
+        return timed(run_game)[0]
+
+    def prefetched():
+        evict_files(paths)
+        prefetch_time, _ = timed(lambda: prefetcher.warm(game))
+        return prefetch_time, timed(run_game)[0]
+
+    evictable = evict_files(paths)
+    cold_times = [cold() for _ in range(repeat)]
+    prefetch_times, warm_times = zip(*[prefetched() for _ in range(repeat)])
+    return {
+        "data_bytes": sum(os.path.getsize(path) for path in paths),
+        "cold_is_uncached": evictable,
+        "cold_seconds": statistics.median(cold_times),
+        "prefetch_seconds": statistics.median(prefetch_times),
+        "prefetched_seconds": statistics.median(warm_times),
+    }
+
+
+def make_dummy_game(workdir):
+    """Crée un exécutable factice qui reste actif jusqu'à sa fermeture."""
+    if sys.platform == "win32":
+        path = os.path.join(workdir, "dummy_game.bat")
+        with open(path, "w") as f:
+            f.write(f'@"{sys.executable}" -c "import time; time.sleep(60)"\n')
+    else:
+        path = os.path.join(workdir, "dummy_game.exe")
+        with open(path, "w") as f:
+            f.write(f"#!{sys.executable}\nimport time\ntime.sleep(60)\n")
+        os.chmod(path, 0o755)
+    return path
+
+
+def bench_process(workdir, scale, repeat):
+    """Mesure des cycles lancement/fermeture de GameManager avec des processus factices."""
+    from models.game import Game
+    from game_manager import GameManager
+
+    manager = GameManager()
+    path = make_dummy_game(workdir)
+    cycles = max(3, repeat)
+    launch_times, ready_times, close_times = [], [], []
+
+    for i in range(cycles):
+        game = Game(f"factice{i}", path)
+        start = time.perf_counter()
+        future = manager.launch_game_async(game)
+        launch_times.append(time.perf_counter() - start)
+        if future is None:
+            return {"error": "lancement impossible"}
+        result = future.result(timeout=30)
+        ready_times.append(result.latency)
+
+        start = time.perf_counter()
+        manager.close_game(game)
+        close_times.append(time.perf_counter() - start)
+
+    return {
+        "cycles": cycles,
+        "launch_call_ms": statistics.median(launch_times) * 1000,
+        "ready_latency_ms": statistics.median(ready_times) * 1000,
+        "close_ms": statistics.median(close_times) * 1000,
+    }
+
+
+class DictGame:
+    """Modèle de jeu à attributs dans un dictionnaire (ancien modèle), pour comparaison."""
+
+    def __init__(self, name, path, image_path=None):
+        self.name = name
+        self.path = path
+        self.image_path = image_path
+        self.process = None
+        self.is_running = False
+
+
+def bench_model(workdir, scale, repeat):
+    """Mesure la mémoire occupée par les objets Game d'une bibliothèque, et le coût de leur tri."""
+    import tracemalloc
+    from models.game import Game
+
+    count = max(scale, 50000)
+    rows = [(f"Jeu {i:05d}", os.path.join(workdir, f"groupe{i % 100}", f"Jeu {i:05d}", "jeu.exe"),
+             None) for i in range(count)]
+
+    def measure(factory):
+        tracemalloc.start()
+        games = [factory(*row) for row in rows]
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        return games, size
+
+    games, slotted = measure(Game)
+    _, legacy = measure(DictGame)
+    first_sort, _ = timed(lambda: sorted(games, key=lambda g: g.sort_key))
+    warm_sort, _ = timed(lambda: sorted(games, key=lambda g: g.sort_key), repeat)
+    return {
+        "games": count,
+        "bytes_per_game": slotted / count,
+        "dict_model_bytes_per_game": legacy / count,
+        "first_sort_seconds": first_sort,
+        "warm_sort_seconds": warm_sort,
+    }
+
+
+def git_revision():
+    """Retourne le commit courant, ou None hors d'un dépôt git."""
+    try:
+        output = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), check=True)
+        return output.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path):
+    """Affiche l'évolution des durées par rapport à un fichier de résultats précédent."""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    print(f"Comparaison avec {baseline.get('commit')} ({baseline_path}) :")
+    for key, metrics in results["results"].items():
+        previous = baseline.get("results", {}).get(key, {})
+        for metric, value in metrics.items():
+            old = previous.get(metric)
+            if not isinstance(value, (int, float)) or isinstance(value, bool) or not old:
+                continue
+            if metric.endswith(("_seconds", "_ms", "_per_game")):
+                change = (value - old) / old * 100
+                print(f"  {key}.{metric}: {old:.4g} -> {value:.4g} ({change:+.1f}%)")
+
+
+def main(argv=None):
+    """Point d'entrée du banc d'essai."""
+    parser = argparse.ArgumentParser(description="Banc d'essai du lanceur de jeux")
+    parser.add_argument("--scale", default="100,1000,10000",
+                        help="nombres d'exécutables à générer, séparés par des virgules")
+    parser.add_argument("--only", default=",".join(BENCHMARKS), help="bancs à exécuter")
+    parser.add_argument("--repeat", type=int, default=3, help="répétitions des mesures à chaud")
+    parser.add_argument("--output", default=None, help="fichier JSON de résultats")
+    parser.add_argument("--compare", default=None, help="fichier JSON de référence")
+    parser.add_argument("--keep", action="store_true", help="conserver les bibliothèques générées")
+    args = parser.parse_args(argv)
+
+    logger.set_console_level(logging.WARNING)
+    scales = [int(value) for value in args.scale.split(",") if value]
+    selected = [name for name in args.only.split(",") if name in BENCHMARKS]
+    functions = {"scan": bench_scan, "thumbnails": bench_thumbnails, "ui": bench_ui, "startup": bench_startup,
+                 "prefetch": bench_prefetch, "process": bench_process, "model": bench_model}
+
+    results = {
+        "commit": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": {},
+    }
+
+    workdir = tempfile.mkdtemp(prefix="launcher_bench_")
+    try:
+        for name in selected:
+            # Les bancs préchargement, processus et modèle ne dépendent pas de la taille de la bibliothèque
+            for scale in (scales[:1] if name in ("prefetch", "process", "model") else scales):
+                key = f"{name}_{scale}"
+                print(f"{key}...", flush=True)
+                results["results"][key] = functions[name](workdir, scale, args.repeat)
+                print(f"  {results['results'][key]}")
+    finally:
+        if args.keep:
+            print(f"Bibliothèques conservées dans {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Résultats écrits dans {args.output}")
+    if args.compare:
+        compare(results, args.compare)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
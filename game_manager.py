@@ -1,19 +1,264 @@
 import subprocess
-import psutil
 import os
+import sys
 import time
+import selectors
+import threading
+from concurrent.futures import Future
 from logger import logger
+from metrics import metrics
+from models.game import LaunchType
+from shortcuts import shortcut_cache, shortcut_command
+
+# Événements émis par le gestionnaire de jeux
+EVENT_STARTED = "started"
+EVENT_EXITED = "exited"
+EVENT_READY = "ready"
+EVENT_LAUNCH_FAILED = "launch_failed"
+
+# Détection de l'état prêt après un lancement
+READY_GRACE_PERIOD = 1.0  # Processus toujours vivant après ce délai : considéré prêt (s)
+LAUNCH_TIMEOUT = 10.0  # Délai maximal pour retrouver le processus d'un jeu lancé via un relais (s)
+LAUNCH_POLL_INTERVAL = 0.05  # Intervalle d'observation, limité à la fenêtre de lancement (s)
+
+# Sous Windows, les jeux sont créés en priorité normale, même si le mode jeu a abaissé celle du lanceur
+CREATION_FLAGS = getattr(subprocess, "NORMAL_PRIORITY_CLASS", 0)
+
+# Fermeture des jeux
+CLOSE_TIMEOUT = 5.0  # Délai commun accordé aux processus pour se terminer avant d'être tués (s)
+KILL_TIMEOUT = 1.0  # Délai d'attente après l'envoi de kill (s)
+
+
+def is_process_alive(process):
+    """Indique si un processus (subprocess.Popen ou psutil.Process) est toujours actif."""
+    if isinstance(process, subprocess.Popen):
+        return process.poll() is None
+    import psutil
+    try:
+        return process.is_running() and process.status() != psutil.STATUS_ZOMBIE
+    except psutil.Error:
+        return False
+
+
+def process_name(process):
+    """Retourne le nom d'un processus (psutil.Process), ou "?" s'il est terminé ou inaccessible."""
+    import psutil
+    try:
+        return process.name()
+    except psutil.Error:
+        return "?"
+
+
+class LaunchResult:
+    """Résultat de la phase de lancement d'un jeu."""
+    
+    def __init__(self, game, success, latency, pid=None, reason=None):
+        """
+        Initialise le résultat.
+        
+        Args:
+            game (Game): Le jeu lancé.
+            success (bool): True si le jeu est considéré prêt.
+            latency (float): Délai entre le lancement et la détection, en secondes.
+            pid (int, optional): Le PID du processus du jeu suivi.
+            reason (str, optional): La raison de l'échec ou le critère de détection.
+        """
+        self.game = game
+        self.success = success
+        self.latency = latency
+        self.pid = pid
+        self.reason = reason
+    
+    def __repr__(self):
+        """Représentation de l'objet pour le débogage."""
+        return (f"LaunchResult(game='{self.game.name}', success={self.success}, "
+                f"latency={self.latency:.3f}, pid={self.pid}, reason='{self.reason}')")
+
+
+class CloseResult:
+    """Résultat de la fermeture d'un jeu."""
+    
+    def __init__(self, game, success, elapsed, killed=0, reason=None):
+        """
+        Initialise le résultat.
+        
+        Args:
+            game (Game): Le jeu fermé.
+            success (bool): True si tous les processus du jeu sont terminés.
+            elapsed (float): Durée de la fermeture, en secondes.
+            killed (int): Nombre de processus tués après le délai de fermeture.
+            reason (str, optional): La raison de l'échec, ou un détail sur la fermeture.
+        """
+        self.game = game
+        self.success = success
+        self.elapsed = elapsed
+        self.killed = killed
+        self.reason = reason
+    
+    def to_dict(self):
+        """Sérialise le résultat en dictionnaire compatible JSON."""
+        return {"name": self.game.name, "path": self.game.path, "success": self.success,
+                "seconds": self.elapsed, "killed": self.killed, "reason": self.reason}
+    
+    def __repr__(self):
+        """Représentation de l'objet pour le débogage."""
+        return (f"CloseResult(game='{self.game.name}', success={self.success}, "
+                f"elapsed={self.elapsed:.3f}, killed={self.killed}, reason='{self.reason}')")
+
+
+class ProcessSupervisor:
+    """
+    Surveille la fin des processus lancés sans scrutation périodique.
+    
+    Sous Linux (os.pidfd_open disponible), un unique thread attend la fin de tous
+    les processus via un sélecteur. Ailleurs, un thread dédié par processus
+    attend sa fin (Popen.wait). Dans les deux cas, aucun réveil n'a lieu tant
+    qu'aucun processus ne se termine.
+    """
+    
+    def __init__(self, on_exit):
+        """
+        Initialise le superviseur.
+        
+        Args:
+            on_exit (callable): Appelé avec (clé, processus, code de retour) quand un
+                processus se termine, depuis un thread du superviseur.
+        """
+        self.on_exit = on_exit
+        self.lock = threading.Lock()
+        self.use_pidfd = sys.platform.startswith("linux") and hasattr(os, "pidfd_open")
+        self.selector = None
+        self.wake_r = self.wake_w = None
+        self.thread = None
+        self.pending = []  # (clé, processus) à enregistrer dans le sélecteur
+    
+    def watch(self, key, process):
+        """
+        Commence à surveiller un processus.
+        
+        Args:
+            key (hashable): Identifiant transmis à on_exit.
+            process (subprocess.Popen): Le processus à surveiller.
+        """
+        if self.use_pidfd:
+            try:
+                pidfd = os.pidfd_open(process.pid)
+            except OSError:
+                # Processus déjà terminé (ou pidfd indisponible) : repli sur un thread
+                pidfd = None
+            if pidfd is not None:
+                with self.lock:
+                    self.pending.append((key, process, pidfd))
+                    self.start_selector_thread()
+                os.write(self.wake_w, b"\0")
+                return
+        
+        waiter = threading.Thread(target=self.wait_process, args=(key, process), daemon=True,
+                                  name=f"wait-{process.pid}")
+        waiter.start()
+    
+    def wait_process(self, key, process):
+        """Attend la fin d'un processus dans un thread dédié."""
+        try:
+            returncode = process.wait()
+        except Exception:
+            returncode = None
+        self.on_exit(key, process, returncode)
+    
+    def start_selector_thread(self):
+        """Démarre le thread du sélecteur pidfd s'il ne tourne pas encore (sous verrou)."""
+        if self.thread is not None:
+            return
+        self.selector = selectors.DefaultSelector()
+        self.wake_r, self.wake_w = os.pipe()
+        self.selector.register(self.wake_r, selectors.EVENT_READ, None)
+        self.thread = threading.Thread(target=self.selector_loop, daemon=True, name="process-supervisor")
+        self.thread.start()
+    
+    def selector_loop(self):
+        """Boucle du thread pidfd : bloque jusqu'à la fin d'un processus ou un nouvel enregistrement."""
+        while True:
+            for selector_key, _ in self.selector.select():
+                if selector_key.data is None:
+                    # Réveil : enregistrer les nouveaux processus
+                    os.read(self.wake_r, 4096)
+                    with self.lock:
+                        pending, self.pending = self.pending, []
+                    for key, process, pidfd in pending:
+                        self.selector.register(pidfd, selectors.EVENT_READ, (key, process))
+                    continue
+                
+                key, process = selector_key.data
+                self.selector.unregister(selector_key.fd)
+                os.close(selector_key.fd)
+                try:
+                    returncode = process.wait(timeout=1)
+                except Exception:
+                    returncode = None
+                self.on_exit(key, process, returncode)
+
 
 class GameManager:
     """Classe gérant le lancement et la fermeture des jeux."""
     
-    def __init__(self):
-        """Initialise le gestionnaire de jeux."""
-        self.running_games = {}
+    def __init__(self, session_store=None, profiles=None, prefetcher=None):
+        """
+        Initialise le gestionnaire de jeux.
+        
+        Args:
+            session_store (SessionStore, optional): Historique dans lequel enregistrer les sessions de jeu.
+            profiles (ProfileStore, optional): Profils de lancement (priorité, affinité, environnement).
+            prefetcher (Prefetcher, optional): Préchargement des fichiers des jeux avant leur lancement.
+        """
+        self.running_games = {}  # Jeux en cours, par identité (game.key)
+        self.session_store = session_store
+        self.profiles = profiles
+        self.prefetcher = prefetcher
+        self.lock = threading.RLock()
+        self.listeners = []
+        self.supervisor = ProcessSupervisor(self.on_process_exit)
+        self.launch_results = {}  # Dernier LaunchResult par identité de jeu
+        self.closed_by_user = {}  # Processus dont la fermeture a été demandée, par identité de jeu
+    
+    def add_listener(self, callback):
+        """
+        Abonne une fonction aux changements d'état des jeux.
+        
+        Le callback est appelé avec (événement, jeu), où l'événement vaut
+        EVENT_STARTED ou EVENT_EXITED (uniquement quand l'état du jeu change),
+        EVENT_READY ou EVENT_LAUNCH_FAILED (fin de la phase de lancement, détails
+        dans launch_results). Un jeu fermé par l'utilisateur pendant son lancement
+        reçoit EVENT_EXITED, et non EVENT_LAUNCH_FAILED. Il peut être appelé depuis
+        un autre thread que le thread Tk.
+        """
+        self.listeners.append(callback)
+    
+    def emit(self, event, game):
+        """Notifie les abonnés d'un changement d'état."""
+        for callback in self.listeners:
+            try:
+                callback(event, game)
+            except Exception as e:
+                logger.error(f"Erreur dans un abonné aux événements de jeu: {e}", exc_info=True)
+    
+    def on_process_exit(self, key, process, returncode):
+        """Appelé par le superviseur quand le processus d'un jeu se termine."""
+        with self.lock:
+            game = self.running_games.get(key)
+            if game is None or game.process is not process:
+                # Jeu déjà fermé par close_game, ou relancé depuis
+                return
+            game.is_running = False
+            game.process = None
+            del self.running_games[key]
+        logger.info(f"Jeu {game.name} terminé (code de retour: {returncode}).")
+        if self.session_store is not None:
+            self.session_store.end_session(game, returncode)
+        self.emit(EVENT_EXITED, game)
     
     def launch_game(self, game):
         """
-        Lance un jeu et met à jour son état.
+        Lance un jeu et met à jour son état, sans attendre qu'il soit prêt.
         
         Args:
             game (Game): L'objet Game à lancer.
@@ -21,33 +266,252 @@ class GameManager:
         Returns:
             bool: True si le jeu a été lancé avec succès, False sinon.
         """
+        return self.launch_game_async(game) is not None
+    
+    @metrics.timed("launch_game")
+    def launch_game_async(self, game):
+        """
+        Lance un jeu et retourne immédiatement.
+        
+        La détection de l'état prêt se fait dans un thread : le jeu est prêt si son
+        arbre de processus grandit ou s'il est toujours actif après READY_GRACE_PERIOD ;
+        il a échoué s'il se termine avant avec un code non nul. Un relais qui se
+        termine normalement (commande start pour les .lnk, lanceur intermédiaire)
+        est suivi jusqu'au véritable processus du jeu.
+        
+        Args:
+            game (Game): L'objet Game à lancer.
+            
+        Returns:
+            Future: Résolue avec un LaunchResult, ou None si le lancement a échoué.
+        """
         if game.is_running:
             logger.info(f"Le jeu {game.name} est déjà en cours d'exécution.")
-            return False
+            return None
         
+        # Import différé : psutil n'est chargé qu'au premier lancement, pas au démarrage du lanceur
+        import psutil
+        with self.lock:
+            self.closed_by_user.pop(game.key, None)
         try:
             # Déterminer le répertoire de travail
-            working_directory = os.path.dirname(game.path)
+            working_directory = game.directory
+            # Chemin absolu : un chemin relatif ne serait plus valide depuis le répertoire de travail
+            game_path = os.path.abspath(game.path)
+            
+            # Processus existants, pour retrouver ceux créés par le lancement
+            known_pids = set(psutil.pids())
+            launch_time = time.time()
+            start = time.perf_counter()
+            
+            # Profil de lancement éventuel : environnement à la création, priorités ensuite
+            profile = self.profiles.get(game.key) if self.profiles is not None else None
+            env = profile.environment() if profile is not None else None
+            
+            # Précharger les fichiers du jeu en parallèle de son démarrage
+            prefetched = self.prefetcher is not None and self.prefetcher.prefetch(game)
             
             # Vérifier si c'est un lien .lnk (raccourci Windows)
-            if game.path.lower().endswith('.lnk'):
-                # Utiliser la commande start pour ouvrir les raccourcis
-                process = subprocess.Popen(f'start "" "{game.path}"', shell=True, cwd=working_directory)
+            is_relay = False  # Processus lancé par un relais (commande start) plutôt que le jeu lui-même
+            if game.launch_type is LaunchType.SHORTCUT:
+                # Lancer directement la cible du raccourci : pas de shell, PID exact
+                command = shortcut_command(shortcut_cache.get(game_path))
+                if command is not None:
+                    command, working_directory = command
+                    logger.debug(f"Raccourci {game.name} résolu: {command}")
+                    try:
+                        process = subprocess.Popen(command, cwd=working_directory, env=env,
+                                                   creationflags=CREATION_FLAGS)
+                    except OSError as e:
+                        # Élévation requise (WinError 740), format non reconnu... : le shell saura
+                        # ouvrir le raccourci (demande UAC comprise)
+                        logger.warning(f"Lancement direct de {game.name} impossible ({e}), "
+                                       f"ouverture du raccourci par le shell")
+                        command = None
+                if command is None:
+                    # Cible introuvable, non exécutable ou refusée : ouvrir le raccourci avec la commande start
+                    is_relay = True
+                    process = subprocess.Popen(f'start "" "{game_path}"', shell=True, cwd=working_directory,
+                                               env=env, creationflags=CREATION_FLAGS)
             else:
                 # Lancer l'exécutable directement
-                process = subprocess.Popen([game.path], cwd=working_directory)
+                process = subprocess.Popen([game_path], cwd=working_directory, env=env,
+                                           creationflags=CREATION_FLAGS)
+            
+            if profile is not None:
+                self.apply_profile(game, process)
             
-            # Attendre un peu pour s'assurer que le processus démarre
-            time.sleep(0.5)
+            with self.lock:
+                game.process = process
+                game.is_running = True
+                self.running_games[game.key] = game
+            logger.info(f"Jeu {game.name} lancé (PID {process.pid}).")
+            if self.session_store is not None:
+                self.session_store.start_session(game)
+            self.emit(EVENT_STARTED, game)
             
-            game.process = process
-            game.is_running = True
-            self.running_games[game.name] = game
-            logger.info(f"Jeu {game.name} lancé avec succès.")
-            return True
+            # Le superviseur ne prend le relais qu'une fois le jeu prêt : un relais qui se
+            # termine normalement ne doit pas faire considérer le jeu comme fermé
+            future = Future()
+            monitor = threading.Thread(
+                target=self.monitor_launch,
+                args=(game, process, is_relay, known_pids, launch_time, start, future, prefetched),
+                daemon=True, name=f"launch-{process.pid}"
+            )
+            monitor.start()
+            return future
         except Exception as e:
+            metrics.error("launch_game")
             logger.error(f"Erreur lors du lancement du jeu {game.name}: {e}", exc_info=True)
-            return False
+            return None
+    
+    def monitor_launch(self, game, process, is_relay, known_pids, launch_time, start, future, prefetched=False):
+        """Observe un lancement jusqu'à ce que le jeu soit prêt ou en échec (thread dédié)."""
+        import psutil
+        result = None
+        closed = False  # Jeu fermé par l'utilisateur pendant le lancement
+        spawned = []  # Enfants observés du relais, candidats s'il se termine
+        try:
+            while result is None:
+                elapsed = time.perf_counter() - start
+                with self.lock:
+                    closed = self.closed_by_user.get(game.key) is process
+                if closed:
+                    result = LaunchResult(game, False, elapsed, process.pid, "fermé par l'utilisateur")
+                    break
+                if game.process is not process:
+                    # Jeu fermé ou relancé entre-temps
+                    result = LaunchResult(game, False, elapsed, process.pid, "lancement interrompu")
+                    break
+                
+                returncode = process.poll()
+                if returncode is not None and returncode != 0:
+                    result = LaunchResult(game, False, elapsed, process.pid,
+                                          f"terminé avec le code {returncode}")
+                    break
+                
+                if returncode is None:
+                    # Croissance de l'arbre de processus ou processus stable : prêt
+                    try:
+                        children = psutil.Process(process.pid).children(recursive=True)
+                    except psutil.Error:
+                        children = []
+                    if children and is_relay:
+                        spawned = children
+                    elif children:
+                        result = LaunchResult(game, True, elapsed, process.pid, "processus enfant démarré")
+                    elif elapsed >= READY_GRACE_PERIOD and not is_relay:
+                        result = LaunchResult(game, True, elapsed, process.pid, "processus actif")
+                    if result is not None:
+                        self.track_process(game, process, process)
+                else:
+                    # Relais terminé normalement : retrouver le véritable processus du jeu
+                    target = next((child for child in spawned if is_process_alive(child)), None)
+                    if target is None:
+                        target = self.find_spawned_process(game, process.pid, known_pids, launch_time)
+                    if target is not None:
+                        # Nom lu sans lever d'exception : le processus retrouvé a pu se terminer entre-temps
+                        name = process_name(target)
+                        self.track_process(game, process, target, name)
+                        result = LaunchResult(game, True, elapsed, target.pid,
+                                              f"processus du jeu retrouvé ({name})")
+                
+                if result is None and elapsed >= LAUNCH_TIMEOUT:
+                    # Délai appliqué à chaque tour, que le relais soit terminé ou non
+                    if returncode is not None:
+                        result = LaunchResult(game, False, elapsed, None, "processus du jeu introuvable")
+                    else:
+                        result = LaunchResult(game, False, elapsed, process.pid, "délai de lancement dépassé")
+                if result is None:
+                    time.sleep(LAUNCH_POLL_INTERVAL)
+        except Exception as e:
+            result = LaunchResult(game, False, time.perf_counter() - start, process.pid, str(e))
+        
+        self.launch_results[game.key] = result
+        if closed:
+            # Fermeture volontaire : ni erreur ni mesure de lancement ; libère l'état du jeu et
+            # émet EVENT_EXITED si close_games ne l'a pas encore fait
+            logger.info(f"Lancement de {game.name} interrompu par sa fermeture.")
+            self.on_process_exit(game.key, process, process.poll())
+            future.set_result(result)
+            return
+        metrics.record("launch_ready", result.latency, error=not result.success)
+        # Délai avec et sans préchargement, pour en mesurer l'effet
+        metrics.record("launch_ready.prefetched" if prefetched else "launch_ready.cold", result.latency,
+                       error=not result.success)
+        if result.success:
+            logger.info(f"Jeu {game.name} prêt en {result.latency * 1000:.0f} ms ({result.reason}).")
+            self.emit(EVENT_READY, game)
+        else:
+            logger.warning(f"Échec du lancement de {game.name} après {result.latency * 1000:.0f} ms: {result.reason}")
+            # Aucun processus n'est surveillé : libérer l'état du jeu ici
+            self.on_process_exit(game.key, process, process.poll())
+            self.emit(EVENT_LAUNCH_FAILED, game)
+        future.set_result(result)
+    
+    def find_spawned_process(self, game, relay_pid, known_pids, launch_time):
+        """
+        Cherche un processus créé par le lancement d'un jeu.
+        
+        Sont retenus les nouveaux processus dont le parent est le relais ou dont
+        l'exécutable se trouve dans le dossier du jeu.
+        
+        Returns:
+            psutil.Process: Le processus trouvé, ou None.
+        """
+        import psutil
+        game_dir = os.path.normcase(os.path.abspath(game.directory))
+        for proc in psutil.process_iter(["pid", "ppid", "exe", "create_time"]):
+            info = proc.info
+            if info["pid"] in known_pids or (info["create_time"] or 0) < launch_time - 1:
+                continue
+            if info["ppid"] == relay_pid:
+                return proc
+            exe = info["exe"]
+            if exe and os.path.normcase(os.path.abspath(exe)).startswith(game_dir + os.sep):
+                return proc
+        return None
+    
+    def track_process(self, game, launched, target, name=None):
+        """
+        Confie au superviseur le processus du jeu (éventuellement retrouvé derrière un relais).
+        
+        Rien ne doit lever d'exception une fois game.process remplacé : le superviseur
+        signale lui-même la fin d'un processus déjà terminé.
+        
+        Args:
+            game (Game): Le jeu lancé.
+            launched: Le processus créé au lancement (subprocess.Popen).
+            target: Le processus à suivre : celui du lancement, ou celui retrouvé derrière le relais.
+            name (str, optional): Le nom du processus retrouvé, lu avant l'appel.
+        """
+        with self.lock:
+            if game.process is not launched:
+                return
+            game.process = target
+        if target is not launched:
+            logger.info(f"Jeu {game.name} suivi via le processus {target.pid} ({name or '?'}).")
+            # Processus retrouvé derrière un relais : il n'a pas reçu le profil appliqué au lancement
+            # (un processus lancé directement l'a reçu, et ses enfants en héritent)
+            self.apply_profile(game, target)
+        if self.prefetcher is not None:
+            # Premier lancement : relever les fichiers lus, préchargés aux lancements suivants
+            self.prefetcher.record(game, target)
+        self.supervisor.watch(game.key, target)
+    
+    def apply_profile(self, game, process):
+        """Applique le profil de lancement d'un jeu à un processus et à tous ses descendants."""
+        profile = self.profiles.get(game.key) if self.profiles is not None else None
+        if profile is None:
+            return
+        import psutil
+        try:
+            root = psutil.Process(process.pid)
+            tree = [root] + root.children(recursive=True)
+        except psutil.Error:
+            return
+        profile.apply(tree)
+        logger.debug(f"Profil {profile.to_dict()} appliqué à {len(tree)} processus de {game.name}")
     
     def close_game(self, game):
         """
@@ -62,76 +526,162 @@ class GameManager:
         if not game.is_running or game.process is None:
             logger.info(f"Le jeu {game.name} n'est pas en cours d'exécution.")
             return False
+        return self.close_games([game])[0].success
+    
+    def close_all(self, timeout=CLOSE_TIMEOUT):
+        """Ferme tous les jeux en cours d'exécution. Retourne la liste des CloseResult."""
+        with self.lock:
+            games = list(self.running_games.values())
+        return self.close_games(games, timeout)
+    
+    def close_games_async(self, games=None, timeout=CLOSE_TIMEOUT):
+        """
+        Ferme des jeux dans un thread dédié et retourne immédiatement.
         
-        try:
-            # Tenter de fermer le processus proprement
+        Args:
+            games (list, optional): Les jeux à fermer. Par défaut, tous les jeux en cours.
+            timeout (float): Délai commun avant de tuer les processus restants.
+        
+        Returns:
+            Future: Résolue avec la liste des CloseResult.
+        """
+        future = Future()
+        
+        def run():
             try:
-                parent = psutil.Process(game.process.pid)
-                children = []
-                
-                # Récupérer tous les processus enfants
+                if games is None:
+                    future.set_result(self.close_all(timeout))
+                else:
+                    future.set_result(self.close_games(games, timeout))
+            except Exception as e:
+                future.set_exception(e)
+        
+        threading.Thread(target=run, daemon=True, name="close-games").start()
+        return future
+    
+    @metrics.timed("close_games")
+    def close_games(self, games, timeout=CLOSE_TIMEOUT):
+        """
+        Ferme plusieurs jeux en même temps.
+        
+        Les arbres de processus de tous les jeux sont collectés, puis terminés en une
+        seule passe ; tous les processus partagent le même délai de fermeture, au-delà
+        duquel les survivants sont tués. Fermer n jeux prend donc au plus
+        timeout + KILL_TIMEOUT secondes, et non n fois ce délai.
+        
+        Args:
+            games (list): Les jeux à fermer ; ceux qui ne sont pas en cours sont ignorés.
+            timeout (float): Délai commun avant de tuer les processus restants (s).
+        
+        Returns:
+            list: Un CloseResult par jeu en cours d'exécution, dans l'ordre donné.
+        """
+        import psutil
+        start = time.perf_counter()
+        trees = []  # (jeu, processus surveillé, [psutil.Process de l'arbre])
+        for game in games:
+            process = game.process
+            if not game.is_running or process is None:
+                continue
+            with self.lock:
+                # Fermeture volontaire : un lancement en cours d'observation ne doit pas la signaler en échec
+                self.closed_by_user[game.key] = process
+            try:
+                parent = psutil.Process(process.pid)
                 try:
                     children = parent.children(recursive=True)
-                except Exception:
-                    pass
-                
-                # Fermer les processus enfants
-                for child in children:
-                    try:
-                        child.terminate()
-                    except Exception:
-                        pass
-                
-                # Fermer le processus parent
-                parent.terminate()
-                
-                # Attendre jusqu'à 5 secondes pour la fin des processus
-                gone, alive = psutil.wait_procs([parent] + children, timeout=5)
-                
-                # Si des processus sont encore en vie, les tuer
-                for p in alive:
-                    try:
-                        p.kill()
-                    except Exception:
-                        pass
+                except psutil.Error:
+                    children = []
+                tree = children + [parent]
             except psutil.NoSuchProcess:
                 # Le processus n'existe déjà plus
+                tree = []
+            trees.append((game, process, tree))
+        
+        # Terminer tous les arbres en une passe : les enfants d'abord, puis leur parent
+        for _, _, tree in trees:
+            for proc in tree:
+                try:
+                    proc.terminate()
+                except psutil.Error:
+                    pass
+        
+        # Attendre tous les processus ensemble, puis tuer ceux encore en vie
+        all_procs = [proc for _, _, tree in trees for proc in tree]
+        _, alive = psutil.wait_procs(all_procs, timeout=timeout)
+        for proc in alive:
+            try:
+                proc.kill()
+            except psutil.Error:
                 pass
+        survivors = set()
+        if alive:
+            _, still_alive = psutil.wait_procs(alive, timeout=KILL_TIMEOUT)
+            # Un processus zombie (tué mais pas encore récupéré par son parent) est bien terminé
+            survivors = {proc.pid for proc in still_alive if is_process_alive(proc)}
+        killed = {proc.pid for proc in alive} - survivors
+        
+        elapsed = time.perf_counter() - start
+        results = []
+        for game, process, tree in trees:
+            pids = {proc.pid for proc in tree}
+            remaining = pids & survivors
+            if remaining:
+                metrics.error("close_games")
+                logger.error(f"Impossible de fermer {game.name}: processus {sorted(remaining)} toujours actifs.")
+                results.append(CloseResult(game, False, elapsed, len(pids & killed),
+                                           f"{len(remaining)} processus toujours actifs"))
+                continue
             
-            game.is_running = False
-            game.process = None
-            if game.name in self.running_games:
-                del self.running_games[game.name]
+            returncode = process.poll() if isinstance(process, subprocess.Popen) else None
+            with self.lock:
+                was_running = self.running_games.get(game.key) is game and game.process is process
+                if was_running:
+                    game.is_running = False
+                    game.process = None
+                    del self.running_games[game.key]
             
-            logger.info(f"Jeu {game.name} fermé avec succès.")
-            return True
-        except Exception as e:
-            logger.error(f"Erreur lors de la fermeture du jeu {game.name}: {e}", exc_info=True)
-            return False
+            forced = len(pids & killed)
+            reason = f"{forced} processus tués" if forced else None
+            logger.info(f"Jeu {game.name} fermé avec succès" + (f" ({reason})." if reason else "."))
+            if was_running:
+                if self.session_store is not None:
+                    self.session_store.end_session(game, returncode)
+                self.emit(EVENT_EXITED, game)
+            results.append(CloseResult(game, True, elapsed, forced, reason))
+        
+        if len(results) > 1:
+            logger.info(f"{sum(r.success for r in results)}/{len(results)} jeux fermés en {elapsed:.2f} s")
+        return results
     
+    @metrics.timed("check_running_games")
     def check_running_games(self):
-        """Vérifie si les jeux enregistrés sont toujours en cours d'exécution."""
-        for game_name in list(self.running_games.keys()):
-            game = self.running_games[game_name]
-            
-            # Vérifier si le processus est toujours en cours d'exécution
-            try:
-                if game.process is None:
-                    # Pas de processus associé
-                    game.is_running = False
-                    del self.running_games[game_name]
-                elif game.process.poll() is not None:
-                    # Le processus s'est terminé
-                    game.is_running = False
-                    game.process = None
-                    del self.running_games[game_name]
-                # Si on a lancé un raccourci avec "start", le processus peut terminer mais le jeu continue
-                elif game.path.lower().endswith('.lnk') and game.process.poll() is not None:
-                    # On ne fait rien pour l'instant, on vérifiera lors de la tentative de fermeture
+        """
+        Vérifie si les jeux enregistrés sont toujours en cours d'exécution.
+        
+        La fin des processus est normalement signalée par le superviseur ; cette
+        méthode sert de vérification ponctuelle et émet EVENT_EXITED pour chaque jeu
+        trouvé terminé.
+        """
+        exited = []
+        with self.lock:
+            for key in list(self.running_games.keys()):
+                game = self.running_games[key]
+                
+                # Vérifier si le processus est toujours en cours d'exécution
+                try:
+                    if game.process is not None and is_process_alive(game.process):
+                        continue
+                except Exception:
+                    # En cas d'erreur, considérer que le jeu n'est plus en cours d'exécution
                     pass
-            except Exception:
-                # En cas d'erreur, considérer que le jeu n'est plus en cours d'exécution
                 game.is_running = False
                 game.process = None
-                if game_name in self.running_games:
-                    del self.running_games[game_name]
\ No newline at end of file
+                del self.running_games[key]
+                exited.append(game)
+        
+        for game in exited:
+            if self.session_store is not None:
+                self.session_store.end_session(game)
+            self.emit(EVENT_EXITED, game)
+        return exited
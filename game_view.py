@@ -0,0 +1,360 @@
+import tkinter as tk
+from tkinter import ttk
+import os
+from metrics import metrics
+
+# Dispositions disponibles
+LAYOUT_LIST = "list"
+LAYOUT_GRID = "grid"
+
+# Dimensions fixes des cartes (en liste, la carte occupe toute la largeur)
+LIST_ROW_HEIGHT = 126
+GRID_CELL_WIDTH = 160
+GRID_CELL_HEIGHT = 220
+CARD_SPACING = 6
+
+# Lignes supplémentaires matérialisées au-dessus et au-dessous de la zone visible
+OVERSCAN_ROWS = 2
+
+
+class GameCard:
+    """Carte de jeu réutilisable, rattachée tour à tour à différents objets Game."""
+
+    @metrics.timed("card_create")
+    def __init__(self, view, layout):
+        """
+        Crée les widgets de la carte.
+
+        Args:
+            view (VirtualGameView): La vue propriétaire de la carte.
+            layout (str): LAYOUT_LIST ou LAYOUT_GRID.
+        """
+        self.view = view
+        self.game = None
+        self.index = None
+        self.shown = None  # (nom, image) affichés, pour détecter la mise à jour d'un jeu
+
+        self.frame = ttk.Frame(view.canvas, relief=tk.RAISED, borderwidth=1)
+        self.item = view.canvas.create_window(0, 0, window=self.frame, anchor="nw", state=tk.HIDDEN)
+
+        # Image du jeu
+        img_frame = ttk.Frame(self.frame, width=100, height=100)
+        self.img_label = ttk.Label(img_frame, anchor="center")
+        self.img_label.pack(fill=tk.BOTH, expand=True)
+
+        # Informations sur le jeu
+        info_frame = ttk.Frame(self.frame)
+        self.name_label = ttk.Label(info_frame, font=("Arial", 12, "bold"))
+        self.path_label = None
+
+        # Boutons
+        btn_frame = ttk.Frame(self.frame)
+        self.launch_btn = ttk.Button(btn_frame, text="Lancer", command=self.on_launch)
+        self.close_btn = ttk.Button(btn_frame, text="Fermer", command=self.on_close)
+
+        # Survol : annonce d'un lancement probable (préchargement des fichiers du jeu)
+        if view.on_hover is not None:
+            self.frame.bind("<Enter>", lambda e: self.on_hover())
+
+        if layout == LAYOUT_LIST:
+            img_frame.pack(side=tk.LEFT, padx=10, pady=10)
+            info_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=10, pady=10)
+            self.name_label.pack(anchor="w")
+            self.path_label = ttk.Label(info_frame, wraplength=400)
+            self.path_label.pack(anchor="w", pady=(5, 0))
+            btn_frame.pack(side=tk.RIGHT, padx=10, pady=10)
+            self.launch_btn.pack(pady=(0, 5))
+            self.close_btn.pack()
+        else:
+            img_frame.pack(side=tk.TOP, padx=5, pady=(8, 4))
+            info_frame.pack(side=tk.TOP, fill=tk.X, padx=5)
+            self.name_label.configure(font=("Arial", 10, "bold"), wraplength=GRID_CELL_WIDTH - 20,
+                                      justify="center")
+            self.name_label.pack()
+            btn_frame.pack(side=tk.BOTTOM, pady=(4, 8))
+            self.launch_btn.pack(side=tk.LEFT, padx=2)
+            self.close_btn.pack(side=tk.LEFT, padx=2)
+
+    @metrics.timed("card_bind")
+    def bind(self, game, index):
+        """
+        Rattache la carte à un jeu.
+
+        Args:
+            game (Game): Le jeu à afficher.
+            index (int): La position du jeu dans la liste affichée.
+        """
+        self.index = index
+        if game is self.game and self.shown == (game.name, game.image_path):
+            self.update_state()
+            return
+
+        self.game = game
+        self.shown = (game.name, game.image_path)
+        self.name_label.config(text=game.name)
+        if self.path_label is not None:
+            self.path_label.config(text=game.path)
+        self.update_state()
+
+        # Image : annuler la demande de l'ancien jeu et demander celle du nouveau
+        loader = self.view.thumbnail_loader
+        loader.cancel(self)
+        if game.image_path and os.path.exists(game.image_path):
+            self.img_label.config(image="", text="Chargement...")
+            self.img_label.image = None
+            loader.request(self, game.image_path,
+                           lambda photo, g=game: self.set_image(g, photo),
+                           priority=self.view.priority_of(index))
+        else:
+            self.img_label.config(image="", text="Pas d'image")
+            self.img_label.image = None
+
+    def unbind(self):
+        """Détache la carte de son jeu et la masque."""
+        self.view.thumbnail_loader.cancel(self)
+        self.game = None
+        self.index = None
+        self.shown = None
+        self.view.canvas.itemconfigure(self.item, state=tk.HIDDEN)
+
+    def set_image(self, game, photo):
+        """Affiche la miniature si la carte montre toujours le même jeu."""
+        if game is not self.game:
+            return
+        if photo is None:
+            self.img_label.config(image="", text="Image non disponible")
+        else:
+            self.img_label.config(image=photo, text="")
+            self.img_label.image = photo  # Garder une référence
+
+    def update_state(self):
+        """Met à jour l'état des boutons selon que le jeu tourne ou non."""
+        if self.game is None:
+            return
+        if self.game.is_running:
+            self.launch_btn.config(state=tk.DISABLED)
+            self.close_btn.config(state=tk.NORMAL)
+        else:
+            self.launch_btn.config(state=tk.NORMAL)
+            self.close_btn.config(state=tk.DISABLED)
+
+    def on_launch(self):
+        """Lance le jeu affiché par la carte."""
+        if self.game is not None:
+            self.view.on_launch(self.game)
+
+    def on_close(self):
+        """Ferme le jeu affiché par la carte."""
+        if self.game is not None:
+            self.view.on_close(self.game)
+
+    def on_hover(self):
+        """Signale le survol du jeu affiché par la carte."""
+        if self.game is not None:
+            self.view.on_hover(self.game)
+
+    def destroy(self):
+        """Détruit les widgets de la carte."""
+        self.view.thumbnail_loader.cancel(self)
+        self.view.canvas.delete(self.item)
+        self.frame.destroy()
+
+
+class VirtualGameView:
+    """
+    Liste virtualisée de jeux dessinée sur un Canvas.
+
+    Seules les cartes visibles (plus une petite marge) sont matérialisées. Les
+    cartes sont recyclées et rattachées à d'autres jeux lors du défilement, de
+    sorte que le nombre de widgets reste constant quelle que soit la taille de
+    la bibliothèque.
+    """
+
+    def __init__(self, canvas, scrollbar, thumbnail_loader, on_launch, on_close, layout=LAYOUT_LIST,
+                 on_hover=None):
+        """
+        Initialise la vue.
+
+        Args:
+            canvas (tk.Canvas): Le canvas sur lequel dessiner les cartes.
+            scrollbar (ttk.Scrollbar): La barre de défilement associée.
+            thumbnail_loader (ThumbnailLoader): Le chargeur de miniatures.
+            on_launch (callable): Appelé avec le jeu quand on clique sur "Lancer".
+            on_close (callable): Appelé avec le jeu quand on clique sur "Fermer".
+            layout (str): LAYOUT_LIST ou LAYOUT_GRID.
+            on_hover (callable, optional): Appelé avec le jeu quand le pointeur entre sur sa carte.
+        """
+        self.canvas = canvas
+        self.scrollbar = scrollbar
+        self.thumbnail_loader = thumbnail_loader
+        self.on_launch = on_launch
+        self.on_close = on_close
+        self.on_hover = on_hover
+        self.layout = layout
+
+        self.games = []
+        self.visible_cards = {}  # position -> GameCard
+        self.free_cards = []
+        self.first_visible = 0
+        self.empty_item = None
+        self.empty_message = ""
+        self.scrollregion = None
+
+        self.canvas.configure(yscrollcommand=self.on_scroll, yscrollincrement=20)
+        self.scrollbar.configure(command=self.on_scrollbar)
+        self.canvas.bind("<Configure>", lambda e: self.refresh())
+        # Molette active seulement au-dessus de la liste (cartes comprises), pas dans les autres widgets
+        self.canvas.bind("<Enter>", self.on_pointer_enter)
+        self.canvas.bind("<Leave>", self.on_pointer_leave)
+
+    def set_games(self, games, empty_message=""):
+        """
+        Change la liste des jeux affichés.
+
+        Args:
+            games (list): Les jeux à afficher, dans l'ordre.
+            empty_message (str): Texte affiché si la liste est vide.
+        """
+        games = list(games)
+        if games == self.games and empty_message == self.empty_message:
+            # Résultat identique : rien à redessiner
+            return
+        self.games = games
+        self.empty_message = empty_message
+        # Seules les cartes dont le jeu a changé de position sont rattachées à nouveau
+        self.refresh()
+
+    def set_layout(self, layout):
+        """Bascule entre la disposition en liste et en grille de jaquettes."""
+        if layout == self.layout:
+            return
+        self.layout = layout
+        # Les cartes n'ont pas la même structure : on reconstruit le pool
+        for card in list(self.visible_cards.values()) + self.free_cards:
+            card.destroy()
+        self.visible_cards = {}
+        self.free_cards = []
+        self.canvas.yview_moveto(0)
+        self.refresh()
+
+    def geometry(self):
+        """Retourne (colonnes, largeur de carte, hauteur de ligne) pour la disposition courante."""
+        width = max(self.canvas.winfo_width(), 1)
+        if self.layout == LAYOUT_GRID:
+            columns = max(1, (width - CARD_SPACING) // (GRID_CELL_WIDTH + CARD_SPACING))
+            return columns, GRID_CELL_WIDTH, GRID_CELL_HEIGHT + CARD_SPACING
+        return 1, max(width - 2 * CARD_SPACING, 1), LIST_ROW_HEIGHT + CARD_SPACING
+
+    def priority_of(self, index):
+        """Priorité de chargement de l'image d'une position : distance à la zone visible."""
+        return max(0, index - self.first_visible)
+
+    def refresh(self):
+        """Recalcule les positions visibles et rattache les cartes nécessaires."""
+        columns, card_width, row_height = self.geometry()
+        rows = (len(self.games) + columns - 1) // columns
+        total_height = rows * row_height + CARD_SPACING
+        view_height = max(self.canvas.winfo_height(), 1)
+        scrollregion = (0, 0, self.canvas.winfo_width(), max(total_height, view_height))
+        if scrollregion != self.scrollregion:
+            # Ne reconfigurer que si nécessaire : chaque changement rappelle on_scroll
+            self.scrollregion = scrollregion
+            self.canvas.configure(scrollregion=scrollregion)
+
+        self.update_empty_message()
+
+        # Lignes visibles, avec une marge pour un défilement fluide
+        top = self.canvas.canvasy(0)
+        first_row = max(0, int(top // row_height) - OVERSCAN_ROWS)
+        last_row = min(rows, int((top + view_height) // row_height) + 1 + OVERSCAN_ROWS)
+        first_index = first_row * columns
+        last_index = min(len(self.games), last_row * columns)
+        self.first_visible = max(0, int(top // row_height) * columns)
+
+        # Libérer les cartes sorties de la zone visible
+        for index in list(self.visible_cards):
+            card = self.visible_cards[index]
+            if index < first_index or index >= last_index or card.game is not self.games[index]:
+                del self.visible_cards[index]
+                card.unbind()
+                self.free_cards.append(card)
+
+        # Rattacher une carte à chaque position visible
+        for index in range(first_index, last_index):
+            card = self.visible_cards.get(index)
+            if card is None:
+                card = self.free_cards.pop() if self.free_cards else GameCard(self, self.layout)
+                self.visible_cards[index] = card
+                card.bind(self.games[index], index)
+            else:
+                card.index = index
+
+            row, column = divmod(index, columns)
+            x = CARD_SPACING + column * (card_width + CARD_SPACING)
+            y = CARD_SPACING + row * row_height
+            self.canvas.coords(card.item, x, y)
+            self.canvas.itemconfigure(card.item, width=card_width, height=row_height - CARD_SPACING,
+                                      state=tk.NORMAL)
+
+        # Les images visibles passent devant celles de la marge
+        for index, card in self.visible_cards.items():
+            self.thumbnail_loader.set_priority(card, self.priority_of(index))
+
+    def update_empty_message(self):
+        """Affiche ou masque le message de liste vide."""
+        if self.games or not self.empty_message:
+            if self.empty_item is not None:
+                self.canvas.delete(self.empty_item)
+                self.empty_item = None
+            return
+        if self.empty_item is None:
+            self.empty_item = self.canvas.create_text(20, 20, anchor="nw")
+        self.canvas.itemconfigure(self.empty_item, text=self.empty_message)
+
+    def update_game(self, game):
+        """Met à jour la carte d'un jeu si elle est actuellement affichée."""
+        for card in self.visible_cards.values():
+            if card.game is game:
+                card.bind(game, card.index)
+
+    def update_all(self):
+        """Met à jour toutes les cartes affichées (état, et nom ou image s'ils ont changé)."""
+        for card in self.visible_cards.values():
+            card.bind(card.game, card.index)
+
+    def on_scroll(self, first, last):
+        """Appelé par le canvas quand la zone visible change."""
+        self.scrollbar.set(first, last)
+        self.refresh()
+
+    def on_scrollbar(self, *args):
+        """Transmet les actions de la barre de défilement au canvas."""
+        self.canvas.yview(*args)
+
+    def scroll_units(self, units):
+        """Fait défiler la vue d'un nombre de crans."""
+        self.canvas.yview_scroll(units, "units")
+
+    def on_pointer_enter(self, event):
+        """Active le défilement à la molette quand le pointeur entre dans la liste."""
+        # Sous Windows, la molette est envoyée au widget ayant le focus : liaison globale, limitée au survol
+        self.canvas.bind_all("<MouseWheel>", self.on_mousewheel)
+        self.canvas.bind_all("<Button-4>", lambda e: self.scroll_units(-1))
+        self.canvas.bind_all("<Button-5>", lambda e: self.scroll_units(1))
+
+    def on_pointer_leave(self, event):
+        """Désactive le défilement à la molette quand le pointeur quitte la liste, et non pour une carte."""
+        try:
+            widget = self.canvas.winfo_containing(event.x_root, event.y_root)
+        except KeyError:
+            # Fenêtre interne de Tk (liste déroulante d'une combobox)
+            widget = None
+        canvas_path = str(self.canvas)
+        if widget is not None and (str(widget) == canvas_path or str(widget).startswith(canvas_path + ".")):
+            return
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.canvas.unbind_all(sequence)
+
+    def on_mousewheel(self, event):
+        """Défilement à la molette (Windows et macOS)."""
+        self.scroll_units(-1 if event.delta > 0 else 1)
@@ -1,18 +1,72 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-import os
-from PIL import Image, ImageTk
+import queue
 import threading
-import time
+from scan_worker import ScanWorker
+from scanner import scan_changes
+from watcher import create_watcher
+from thumbnails import ThumbnailCache, ThumbnailLoader
+from game_view import VirtualGameView, LAYOUT_LIST, LAYOUT_GRID
+from search import SearchIndex
+from ui_snapshot import save_snapshot
+from models.game import Game
+from library import GameLibrary, LibraryRoot, save_roots
+from library_scan import ROOT_SCANNING, ROOT_DONE, ROOT_TIMEOUT, ROOT_MISSING, ROOT_CANCELLED
+from game_manager import EVENT_LAUNCH_FAILED, EVENT_STARTED, EVENT_EXITED
+from sessions import SORT_RECENT, SORT_LAUNCHES, SORT_PLAYTIME
+from background import background
+from metrics import metrics
+from logger import logger
+
+# Délai avant d'appliquer la recherche après la dernière frappe (ms)
+SEARCH_DEBOUNCE_MS = 120
+
+# Tris proposés dans la barre d'outils (libellé -> tri de l'historique, None pour le nom)
+SORT_OPTIONS = {
+    "Nom": None,
+    "Récemment joués": SORT_RECENT,
+    "Plus joués": SORT_LAUNCHES,
+    "Temps de jeu": SORT_PLAYTIME,
+}
+
+# Délai de survol d'une carte avant de précharger les fichiers du jeu (ms)
+PREFETCH_HOVER_DELAY_MS = 300
+
+# Libellés des états de scan d'une bibliothèque
+ROOT_STATE_LABELS = {
+    ROOT_SCANNING: "En cours",
+    ROOT_DONE: "Terminé",
+    ROOT_TIMEOUT: "Délai dépassé",
+    ROOT_MISSING: "Introuvable",
+    ROOT_CANCELLED: "Annulé",
+}
 
 class GameLauncherUI:
-    def __init__(self, root, scanner_func, game_manager):
+    def __init__(self, root, scanner_func, game_manager, scan_index=None, thumbnail_workers=None,
+                 session_store=None, roots=None, game_mode=None):
         self.root = root
         self.scanner_func = scanner_func  # Renommé pour clarifier qu'il s'agit d'une fonction
         self.game_manager = game_manager
+        self.scan_index = scan_index  # Index persistant pour les rescans incrémentaux
         self.games = []
-        self.game_frames = {}
-        self.current_directory = ""
+        self.library = GameLibrary()  # Un objet Game par fichier, conservé entre les scans
+        self.roots = list(roots or [])  # Bibliothèques (LibraryRoot), scannées en parallèle
+        self.root_status = {}  # État du dernier scan de chaque bibliothèque, par chemin
+        self.scan_worker = None  # Scan en arrière-plan en cours
+        self.watchers = {}  # Surveillance de chaque bibliothèque (installations, désinstallations)
+        self.scanned_games = []  # Jeux reçus du scan en cours
+        self.showing_cached = False  # L'affichage provient de l'index de scan
+        self.snapshot_shown = False  # L'instantané de la session précédente est affiché
+        self.thumbnails = ThumbnailCache()  # Miniatures pré-réduites (disque + mémoire)
+        # Génération des miniatures manquantes hors du thread Tk
+        self.thumbnail_loader = ThumbnailLoader(self.root, self.thumbnails, max_workers=thumbnail_workers)
+        self.search_index = SearchIndex()  # Index de recherche sur les noms et chemins
+        self.search_job = None  # Recherche différée en attente
+        self.session_store = session_store  # Historique des sessions, pour les tris par activité
+        self.play_stats = {}  # Cumuls par identité de jeu : (lancements, temps de jeu, dernière partie)
+        self.play_stats_generation = 0  # Numéro de la dernière relecture des cumuls demandée
+        self.game_mode = game_mode  # Effacement du lanceur pendant les parties
+        self.prefetch_job = None  # Préchargement différé du jeu survolé
         
         # Configuration de la fenêtre principale
         self.root.title("Lanceur de Jeux")
@@ -27,137 +81,384 @@ class GameLauncherUI:
         self.toolbar = ttk.Frame(self.main_frame)
         self.toolbar.pack(fill=tk.X, pady=(0, 10))
         
-        self.btn_select_dir = ttk.Button(self.toolbar, text="Sélectionner Répertoire", command=self.select_directory)
+        self.btn_select_dir = ttk.Button(self.toolbar, text="Ajouter un Répertoire", command=self.select_directory)
         self.btn_select_dir.pack(side=tk.LEFT, padx=5)
         
+        self.btn_roots = ttk.Button(self.toolbar, text="Bibliothèques", command=self.open_roots_panel)
+        self.btn_roots.pack(side=tk.LEFT, padx=5)
+        self.roots_window = None
+        
         self.btn_refresh = ttk.Button(self.toolbar, text="Actualiser", command=self.refresh_games)
         self.btn_refresh.pack(side=tk.LEFT, padx=5)
         
-        # Affichage du répertoire actuel
+        self.btn_close_all = ttk.Button(self.toolbar, text="Tout fermer", command=self.close_all_games)
+        self.btn_close_all.pack(side=tk.LEFT, padx=5)
+        
+        self.btn_stats = ttk.Button(self.toolbar, text="Statistiques", command=self.open_stats_panel)
+        self.btn_stats.pack(side=tk.LEFT, padx=5)
+        self.stats_window = None
+        
+        # Affichage des bibliothèques
         self.dir_var = tk.StringVar(value="Répertoire: Non sélectionné")
         self.dir_label = ttk.Label(self.toolbar, textvariable=self.dir_var, font=("Arial", 9, "italic"))
         self.dir_label.pack(side=tk.LEFT, padx=15)
         
+        # Progression du scan en cours
+        self.progress_var = tk.StringVar(value="")
+        self.progress_label = ttk.Label(self.toolbar, textvariable=self.progress_var, font=("Arial", 9))
+        self.progress_label.pack(side=tk.LEFT, padx=5)
+        
+        # Choix de la disposition (liste ou grille de jaquettes)
+        self.layout_var = tk.StringVar(value="Liste")
+        self.layout_box = ttk.Combobox(self.toolbar, textvariable=self.layout_var, values=["Liste", "Grille"],
+                                       state="readonly", width=7)
+        self.layout_box.bind("<<ComboboxSelected>>", lambda e: self.change_layout())
+        self.layout_box.pack(side=tk.RIGHT, padx=5)
+        
+        # Mode jeu : travaux d'arrière-plan suspendus pendant les parties
+        if self.game_mode is not None:
+            self.game_mode_var = tk.BooleanVar(value=self.game_mode.enabled)
+            ttk.Checkbutton(self.toolbar, text="Mode jeu", variable=self.game_mode_var,
+                            command=lambda: self.game_mode.set_enabled(self.game_mode_var.get())
+                            ).pack(side=tk.RIGHT, padx=5)
+        
+        # Tri de la bibliothèque (par nom ou selon l'historique des sessions, qui peut
+        # n'être ouvert qu'après le premier affichage)
+        self.sort_var = tk.StringVar(value="Nom")
+        self.sort_box = ttk.Combobox(self.toolbar, textvariable=self.sort_var, values=list(SORT_OPTIONS),
+                                     state="readonly", width=15)
+        self.sort_box.bind("<<ComboboxSelected>>", lambda e: self.change_sort())
+        self.sort_box.pack(side=tk.RIGHT, padx=5)
+        
         # Zone de recherche
         self.search_var = tk.StringVar()
-        self.search_var.trace("w", lambda name, index, mode: self.filter_games())
+        self.search_var.trace("w", lambda name, index, mode: self.schedule_filter())
         self.search_entry = ttk.Entry(self.toolbar, textvariable=self.search_var, width=30)
         self.search_entry.pack(side=tk.RIGHT, padx=5)
         ttk.Label(self.toolbar, text="Rechercher:").pack(side=tk.RIGHT)
         
-        # Cadre de défilement pour les jeux
+        # Cadre de défilement pour les jeux : seules les cartes visibles sont créées
         self.canvas = tk.Canvas(self.main_frame)
-        self.scrollbar = ttk.Scrollbar(self.main_frame, orient=tk.VERTICAL, command=self.canvas.yview)
-        self.scrollable_frame = ttk.Frame(self.canvas)
-        
-        self.scrollable_frame.bind(
-            "<Configure>",
-            lambda e: self.canvas.configure(scrollregion=self.canvas.bbox("all"))
-        )
-        
-        self.canvas.create_window((0, 0), window=self.scrollable_frame, anchor="nw")
-        self.canvas.configure(yscrollcommand=self.scrollbar.set)
+        self.scrollbar = ttk.Scrollbar(self.main_frame, orient=tk.VERTICAL)
+        self.game_view = VirtualGameView(self.canvas, self.scrollbar, self.thumbnail_loader,
+                                         self.launch_game, self.close_game, on_hover=self.on_game_hover)
         
         self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         
-        # Démarrer le thread de vérification des jeux en cours d'exécution
-        self.check_thread = threading.Thread(target=self.check_running_games_thread, daemon=True)
-        self.check_thread.start()
+        # Être notifié des lancements et fins de jeux (aucune scrutation périodique)
+        self.game_manager.add_listener(self.on_game_event)
     
     def select_directory(self):
-        """Ouvre une boîte de dialogue pour sélectionner le répertoire des jeux."""
+        """Ouvre une boîte de dialogue pour ajouter un répertoire de jeux aux bibliothèques."""
         directory = filedialog.askdirectory(title="Sélectionner le répertoire des jeux")
         if directory:
-            self.load_games(directory)
-    
-    def load_games(self, directory):
-        """Charge les jeux depuis le répertoire spécifié."""
-        self.current_directory = directory
-        self.dir_var.set(f"Répertoire: {directory}")
-        # Correction ici: utiliser directement la fonction scanner
-        self.games = self.scanner_func(directory)
-        self.display_games()
+            self.add_root(directory)
     
-    def refresh_games(self):
-        """Actualise la liste des jeux."""
-        if self.current_directory and os.path.isdir(self.current_directory):
-            self.load_games(self.current_directory)
-        elif self.games:
-            # Utiliser le même répertoire que celui actuellement chargé
-            directory = os.path.dirname(self.games[0].path)
-            while not os.path.isdir(directory):
-                directory = os.path.dirname(directory)
-            self.load_games(directory)
-        else:
-            messagebox.showinfo("Information", "Veuillez d'abord sélectionner un répertoire de jeux.")
+    def add_root(self, directory):
+        """Ajoute une bibliothèque, enregistre la configuration et relance le scan."""
+        root = LibraryRoot(directory)
+        if all(existing.path != root.path for existing in self.roots):
+            self.roots.append(root)
+            save_roots(self.roots)
+        self.load_library()
     
-    def display_games(self):
-        """Affiche les jeux dans l'interface."""
-        # Effacer les anciennes entrées
-        for widget in self.scrollable_frame.winfo_children():
-            widget.destroy()
-        self.game_frames = {}
-        
-        if not self.games:
-            no_games_label = ttk.Label(self.scrollable_frame, text="Aucun jeu trouvé. Sélectionnez un répertoire contenant des jeux.")
-            no_games_label.pack(pady=20)
-            return
+    def remove_root(self, path):
+        """Retire une bibliothèque, enregistre la configuration et relance le scan."""
+        self.roots = [root for root in self.roots if root.path != path]
+        self.root_status.pop(path, None)
+        save_roots(self.roots)
+        self.load_library()
+    
+    def show_snapshot(self, snapshot):
+        """
+        Affiche la bibliothèque de la session précédente, telle qu'elle était présentée.
+        
+        Seules les cartes visibles sont créées, avec les miniatures déjà calculées :
+        ni l'index de scan, ni l'index des images, ni l'historique ne sont lus. La
+        bibliothèque est ensuite réconciliée avec le disque par load_library.
         
-        # Afficher chaque jeu
-        for game in self.games:
-            self.create_game_frame(game)
+        Args:
+            snapshot (dict): L'instantané, voir ui_snapshot.load_snapshot.
+        """
+        if snapshot.get("sort") in SORT_OPTIONS:
+            self.sort_var.set(snapshot["sort"])
+        if snapshot.get("layout") in ("Liste", "Grille"):
+            self.layout_var.set(snapshot["layout"])
+            self.change_layout()
+        
+        ordered = []
+        for name, path, image_path, record in snapshot["games"]:
+            if image_path and record:
+                self.thumbnails.add_hint(image_path, record)
+            ordered.append(Game(name, path, image_path))
+        ordered = self.library.merge(ordered)
+        # Ordre d'affichage enregistré : le tri par activité sera recalculé avec l'historique
+        self.games = sorted(ordered, key=lambda g: g.sort_key)
+        self.showing_cached = True
+        self.snapshot_shown = True
+        if len(self.roots) == 1:
+            self.dir_var.set(f"Répertoire: {self.roots[0].path}")
+        elif self.roots:
+            self.dir_var.set(f"Bibliothèques: {len(self.roots)}")
+        self.game_view.set_games(ordered)
+    
+    def save_snapshot(self):
+        """Enregistre la bibliothèque affichée, pour la peindre dès le prochain démarrage."""
+        if self.scan_worker is not None and not self.showing_cached:
+            # Scan en cours sans bibliothèque connue : liste incomplète
+            return
+        save_snapshot(self.roots, self.sorted_games(), self.thumbnails, self.sort_var.get(), self.layout_var.get())
     
-    def create_game_frame(self, game):
-        """Crée un cadre pour afficher un jeu."""
-        frame = ttk.Frame(self.scrollable_frame, relief=tk.RAISED, borderwidth=1)
-        frame.pack(fill=tk.X, padx=5, pady=5)
+    def load_library(self):
+        """Charge les jeux de toutes les bibliothèques configurées."""
+        if len(self.roots) == 1:
+            self.dir_var.set(f"Répertoire: {self.roots[0].path}")
+        else:
+            self.dir_var.set(f"Bibliothèques: {len(self.roots)}")
+        
+        # Annuler le scan précédent s'il est encore en cours
+        if self.scan_worker is not None:
+            self.scan_worker.cancel()
+            self.scan_worker = None
+        self.stop_watching()
+        
+        self.scanned_games = []
+        self.refresh_play_stats(self.redisplay_games)
+        if self.snapshot_shown:
+            # Bibliothèque déjà affichée depuis l'instantané : la réconcilier avec le disque
+            self.snapshot_shown = False
+        else:
+            self.games = []
+            self.showing_cached = False
         
-        # Image du jeu
-        img_frame = ttk.Frame(frame, width=100, height=100)
-        img_frame.pack(side=tk.LEFT, padx=10, pady=10)
+        # Afficher immédiatement la bibliothèque connue, puis la réconcilier avec le disque
+        if self.scan_index is not None and not self.showing_cached:
+            cached_games = {}
+            for root in self.roots:
+                for game in self.scan_index.cached_games(root.path):
+                    cached_games.setdefault(game.key, game)
+            if cached_games:
+                self.games = sorted(self.library.merge(list(cached_games.values())), key=lambda g: g.sort_key)
+                self.showing_cached = True
         
-        if game.image_path and os.path.exists(game.image_path):
+        if not self.roots:
+            self.display_games()
+            return
+        
+        # Lancer le scan en arrière-plan; les résultats arrivent par lots
+        self.scan_worker = ScanWorker(self.scanner_func, list(self.roots), index=self.scan_index)
+        self.scan_worker.start()
+        self.display_games()
+        self.root.after(50, lambda w=self.scan_worker: self.poll_scan_results(w))
+    
+    def poll_scan_results(self, worker, max_batches=5):
+        """Récupère les lots publiés par le thread de scan, sans bloquer la boucle Tk."""
+        if worker is not self.scan_worker:
+            # Scan annulé ou remplacé par un autre
+            return
+        
+        for _ in range(max_batches):
             try:
-                img = Image.open(game.image_path)
-                img = img.resize((100, 100), Image.LANCZOS)
-                photo = ImageTk.PhotoImage(img)
-                img_label = ttk.Label(img_frame, image=photo)
-                img_label.image = photo  # Garder une référence
-            except Exception:
-                img_label = ttk.Label(img_frame, text="Image non disponible")
+                kind, payload = worker.results.get_nowait()
+            except queue.Empty:
+                break
+            
+            if kind == "batch":
+                # Réutiliser les objets déjà connus (jeux en cours, cartes affichées)
+                payload = self.library.merge(payload)
+                self.scanned_games.extend(payload)
+                if not self.showing_cached:
+                    self.games.extend(payload)
+                    self.display_games()
+            elif kind == "done":
+                self.finish_scan(payload)
+                return
+            elif kind == "error":
+                self.scan_worker = None
+                self.progress_var.set("")
+                messagebox.showerror("Erreur", f"Erreur lors du scan: {payload}")
+                return
+        
+        if background.paused:
+            self.progress_var.set(f"Scan suspendu (mode jeu): {worker.progress}")
         else:
-            img_label = ttk.Label(img_frame, text="Pas d'image")
+            self.progress_var.set(f"Scan en cours: {worker.progress}")
+        # Relevé espacé pendant le mode jeu : le scan est de toute façon suspendu
+        self.root.after(500 if background.paused else 50, lambda: self.poll_scan_results(worker))
+    
+    def finish_scan(self, progress):
+        """Termine un scan et met à jour l'affichage avec la liste définitive."""
+        self.scan_worker = None
+        self.root_status = dict(progress.roots)
+        incomplete = [status for status in progress.roots.values() if not status.complete]
+        if incomplete:
+            self.progress_var.set(f"{progress.games_found} jeux ({len(incomplete)} bibliothèque(s) incomplète(s))")
+        else:
+            self.progress_var.set(f"{progress.games_found} jeux")
+        if progress.cancelled:
+            return
+        
+        games = sorted(self.scanned_games, key=lambda g: g.sort_key)
+        self.scanned_games = []
+        # Une bibliothèque hors délai ou introuvable garde ses jeux connus
+        complete = [status.path for status in progress.roots.values() if status.complete]
+        for path in complete:
+            self.library.retain(games, path)
+        if incomplete:
+            found = {game.key for game in games}
+            games.extend(game for game in self.games if game.key not in found and game.key in self.library)
+            games.sort(key=lambda g: g.sort_key)
+        self.start_watching(complete)
+        
+        if self.showing_cached:
+            self.showing_cached = False
+            if games == self.games:
+                # La bibliothèque en cache était à jour ; seuls des noms ou images ont pu changer
+                self.search_index.set_games(self.games)
+                self.update_all_game_buttons()
+                self.save_snapshot()
+                return
+        
+        self.games = games
+        self.display_games()
+        self.save_snapshot()
+    
+    def start_watching(self, directories):
+        """Surveille les bibliothèques pour y répercuter les installations et désinstallations."""
+        self.stop_watching()
+        for directory in directories:
+            self.watch_directory(directory)
+    
+    def watch_directory(self, directory):
+        """Démarre la surveillance d'une bibliothèque."""
+        def on_change(changes):
+            # Thread de surveillance : relire les parties modifiées, puis appliquer dans le thread Tk
+            results = scan_changes(directory, changes, index=self.scan_index)
+            self.root.after(0, lambda: self.apply_library_changes(directory, results))
+        
+        try:
+            watcher = create_watcher(directory, on_change)
+        except OSError as e:
+            logger.warning(f"Impossible de surveiller {directory}: {e}")
+            return
+        watcher.start()
+        self.watchers[directory] = watcher
+    
+    def stop_watching(self):
+        """Arrête la surveillance des bibliothèques."""
+        for watcher in self.watchers.values():
+            watcher.stop()
+        self.watchers = {}
+    
+    def apply_library_changes(self, directory, results):
+        """Applique à la liste affichée les jeux ajoutés, retirés ou modifiés dans une partie de la bibliothèque."""
+        if directory not in self.watchers or self.scan_worker is not None:
+            # Bibliothèque retirée entre-temps, ou scan complet en cours qui inclura ces modifications
+            return
         
-        img_label.pack(fill=tk.BOTH, expand=True)
+        added, removed, updated = [], [], []
+        for path, recursive, games in results:
+            path_added, path_removed, path_updated = self.library.replace_directory(path, recursive, games)
+            added.extend(path_added)
+            removed.extend(path_removed)
+            updated.extend(path_updated)
         
-        # Informations sur le jeu
-        info_frame = ttk.Frame(frame)
-        info_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=10, pady=10)
+        if added or removed:
+            removed_keys = {game.key for game in removed}
+            games = [game for game in self.games if game.key not in removed_keys] + added
+            games.sort(key=lambda g: g.sort_key)
+            self.games = games
+            logger.info(f"Bibliothèque mise à jour: {len(added)} jeux ajoutés, {len(removed)} retirés")
+            self.display_games()
+        elif updated:
+            self.search_index.set_games(self.games)
+            self.update_all_game_buttons()
+    
+    def refresh_games(self):
+        """Actualise la liste des jeux."""
+        if self.roots:
+            self.load_library()
+        else:
+            messagebox.showinfo("Information", "Veuillez d'abord sélectionner un répertoire de jeux.")
+    
+    def display_games(self):
+        """Affiche les jeux dans l'interface."""
+        if not self.games and self.scan_worker is None:
+            empty_message = "Aucun jeu trouvé. Sélectionnez un répertoire contenant des jeux."
+        else:
+            # Les jeux apparaîtront au fur et à mesure du scan
+            empty_message = ""
+        self.search_index.set_games(self.games)
+        self.game_view.set_games(self.visible_games(), empty_message)
+    
+    def change_layout(self):
+        """Applique la disposition choisie dans la barre d'outils."""
+        layout = LAYOUT_GRID if self.layout_var.get() == "Grille" else LAYOUT_LIST
+        self.game_view.set_layout(layout)
+    
+    def change_sort(self):
+        """Applique le tri choisi dans la barre d'outils."""
+        self.refresh_play_stats(self.filter_games)
+    
+    def refresh_play_stats(self, on_done=None):
+        """
+        Relit les cumuls de l'historique si un tri par activité est sélectionné.
         
-        name_label = ttk.Label(info_frame, text=game.name, font=("Arial", 12, "bold"))
-        name_label.pack(anchor="w")
+        La lecture attend les écritures en attente de l'historique : elle a lieu dans
+        un thread dédié, et les cumuls sont remis au thread Tk.
         
-        path_label = ttk.Label(info_frame, text=game.path, wraplength=400)
-        path_label.pack(anchor="w", pady=(5, 0))
+        Args:
+            on_done (callable, optional): Appelé dans le thread Tk une fois les cumuls à jour.
+        """
+        if self.session_store is None or SORT_OPTIONS[self.sort_var.get()] is None:
+            if on_done is not None:
+                on_done()
+            return
+        self.play_stats_generation += 1
+        generation = self.play_stats_generation
+        session_store = self.session_store
         
-        # Boutons
-        btn_frame = ttk.Frame(frame)
-        btn_frame.pack(side=tk.RIGHT, padx=10, pady=10)
+        def read_stats():
+            try:
+                session_store.flush()
+                stats = session_store.game_stats()
+            except Exception as e:
+                logger.error(f"Erreur lors de la lecture de l'historique des sessions: {e}")
+                stats = None
+            self.root.after(0, lambda: apply_stats(stats))
         
-        launch_btn = ttk.Button(btn_frame, text="Lancer", command=lambda g=game: self.launch_game(g))
-        launch_btn.pack(pady=(0, 5))
+        def apply_stats(stats):
+            if generation != self.play_stats_generation:
+                # Une relecture plus récente est en cours
+                return
+            if stats is not None:
+                self.play_stats = stats
+            if on_done is not None:
+                on_done()
         
-        close_btn = ttk.Button(btn_frame, text="Fermer", command=lambda g=game: self.close_game(g))
-        close_btn.pack()
-        close_btn.config(state=tk.DISABLED)  # Désactivé par défaut
+        threading.Thread(target=read_stats, daemon=True, name="play-stats").start()
+    
+    def on_history_changed(self):
+        """Réordonne la bibliothèque après un lancement ou une fin de jeu, si elle est triée par activité."""
+        if SORT_OPTIONS[self.sort_var.get()] is not None:
+            self.refresh_play_stats(self.redisplay_games)
+    
+    def redisplay_games(self):
+        """Réaffiche les jeux déjà affichés dans l'ordre du tri, sans revenir en haut de la liste."""
+        if self.games:
+            self.game_view.set_games(self.visible_games(), self.game_view.empty_message)
+    
+    def sorted_games(self):
+        """Retourne les jeux dans l'ordre du tri sélectionné."""
+        sort = SORT_OPTIONS[self.sort_var.get()]
+        if sort is None:
+            return self.games
         
-        # Stocker les références pour mise à jour ultérieure
-        self.game_frames[game.name] = {
-            'frame': frame,
-            'launch_btn': launch_btn,
-            'close_btn': close_btn
-        }
+        stats = self.play_stats
+        column = {SORT_RECENT: 2, SORT_LAUNCHES: 0, SORT_PLAYTIME: 1}[sort]
+        # Les jeux jamais lancés restent à la fin, dans l'ordre alphabétique
+        return sorted(self.games, key=lambda g: -(stats[g.key][column] or 0) if g.key in stats else 1)
     
     def launch_game(self, game):
         """Lance un jeu."""
@@ -165,46 +466,193 @@ class GameLauncherUI:
         if success:
             self.update_game_buttons(game)
     
+    def on_game_hover(self, game):
+        """Précharge les fichiers d'un jeu survolé, si le pointeur s'y attarde."""
+        if self.game_manager.prefetcher is None:
+            # Préchargeur absent, ou pas encore créé au démarrage
+            return
+        if self.prefetch_job is not None:
+            self.root.after_cancel(self.prefetch_job)
+        self.prefetch_job = self.root.after(PREFETCH_HOVER_DELAY_MS, lambda: self.prefetch_game(game))
+    
+    def prefetch_game(self, game):
+        """Demande le préchargement d'un jeu arrêté (ignoré pendant le mode jeu)."""
+        self.prefetch_job = None
+        if not game.is_running:
+            self.game_manager.prefetcher.prefetch(game, background_work=True)
+    
     def close_game(self, game):
-        """Ferme un jeu."""
-        success = self.game_manager.close_game(game)
-        if success:
-            self.update_game_buttons(game)
+        """Ferme un jeu, hors du thread Tk."""
+        self.close_games([game])
+    
+    def close_all_games(self):
+        """Ferme tous les jeux en cours, hors du thread Tk."""
+        if self.game_manager.running_games:
+            self.close_games(None)
+    
+    def close_games(self, games):
+        """
+        Ferme des jeux en arrière-plan et signale ceux qui n'ont pas pu être fermés.
+        
+        Args:
+            games (list): Les jeux à fermer, ou None pour tous les jeux en cours.
+        """
+        future = self.game_manager.close_games_async(games)
+        
+        def done(future):
+            # Thread de fermeture : afficher le résultat dans le thread Tk
+            try:
+                results = future.result()
+            except Exception as e:
+                # Message construit ici : e n'existe plus une fois le bloc except terminé
+                message = f"Erreur lors de la fermeture: {e}"
+                self.root.after(0, lambda: messagebox.showerror("Erreur", message))
+                return
+            failed = [result for result in results if not result.success]
+            for result in results:
+                self.root.after(0, lambda game=result.game: self.update_game_buttons(game))
+            if failed:
+                details = "\n".join(f"{result.game.name}: {result.reason}" for result in failed)
+                self.root.after(0, lambda: messagebox.showerror(
+                    "Erreur", f"Impossible de fermer certains jeux:\n{details}"))
+        
+        future.add_done_callback(done)
     
     def update_game_buttons(self, game):
         """Met à jour l'état des boutons pour un jeu."""
-        if game.name in self.game_frames:
-            frame_info = self.game_frames[game.name]
-            if game.is_running:
-                frame_info['launch_btn'].config(state=tk.DISABLED)
-                frame_info['close_btn'].config(state=tk.NORMAL)
-            else:
-                frame_info['launch_btn'].config(state=tk.NORMAL)
-                frame_info['close_btn'].config(state=tk.DISABLED)
+        self.game_view.update_game(game)
     
-    def check_running_games_thread(self):
-        """Thread pour vérifier périodiquement l'état des jeux en cours d'exécution."""
-        while True:
-            self.game_manager.check_running_games()
-            
-            # Mettre à jour l'interface dans le thread principal
-            self.root.after(0, self.update_all_game_buttons)
-            
-            time.sleep(2)  # Vérifier toutes les 2 secondes
+    def on_game_event(self, event, game):
+        """Reçoit un changement d'état de jeu (éventuellement depuis un autre thread)."""
+        if event == EVENT_LAUNCH_FAILED:
+            result = self.game_manager.launch_results.get(game.key)
+            reason = result.reason if result is not None else "raison inconnue"
+            self.root.after(0, lambda: messagebox.showerror(
+                "Erreur", f"Le lancement de {game.name} a échoué: {reason}"))
+        # Mettre à jour uniquement la carte concernée, dans le thread principal
+        self.root.after(0, lambda: self.update_game_buttons(game))
+        if event in (EVENT_STARTED, EVENT_EXITED):
+            self.root.after(0, self.on_history_changed)
     
     def update_all_game_buttons(self):
         """Met à jour tous les boutons de jeu."""
-        for game in self.games:
-            self.update_game_buttons(game)
+        self.game_view.update_all()
+    
+    def visible_games(self):
+        """Retourne les jeux correspondant au texte de recherche, les plus pertinents d'abord."""
+        search_text = self.search_var.get()
+        if not search_text.strip():
+            return self.sorted_games()
+        return self.search_index.search(search_text)
+    
+    def schedule_filter(self):
+        """Diffère le filtrage jusqu'à une courte pause dans la saisie."""
+        if self.search_job is not None:
+            self.root.after_cancel(self.search_job)
+        self.search_job = self.root.after(SEARCH_DEBOUNCE_MS, self.filter_games)
     
     def filter_games(self):
         """Filtre les jeux en fonction du texte de recherche."""
-        search_text = self.search_var.get().lower()
+        self.search_job = None
+        self.canvas.yview_moveto(0)
+        self.game_view.set_games(self.visible_games(), self.game_view.empty_message)
+    
+    def open_stats_panel(self):
+        """Ouvre la fenêtre des statistiques de performance (latences p50/p95, erreurs)."""
+        if self.stats_window is not None and self.stats_window.winfo_exists():
+            self.stats_window.lift()
+            return
+        
+        window = tk.Toplevel(self.root)
+        window.title("Statistiques")
+        window.geometry("620x320")
+        self.stats_window = window
+        
+        status_var = tk.StringVar()
+        status_frame = ttk.Frame(window)
+        status_frame.pack(fill=tk.X, padx=10, pady=(10, 5))
+        ttk.Label(status_frame, textvariable=status_var).pack(side=tk.LEFT)
+        enable_btn = ttk.Button(status_frame, text="Activer", command=lambda: metrics.enable())
+        enable_btn.pack(side=tk.RIGHT)
         
-        for game in self.games:
-            if game.name in self.game_frames:
-                frame = self.game_frames[game.name]['frame']
-                if search_text in game.name.lower():
-                    frame.pack(fill=tk.X, padx=5, pady=5)
+        columns = ("count", "errors", "p50", "p95", "max")
+        tree = ttk.Treeview(window, columns=columns, height=10)
+        tree.heading("#0", text="Mesure")
+        for column, title in zip(columns, ("Nombre", "Erreurs", "p50 (ms)", "p95 (ms)", "max (ms)")):
+            tree.heading(column, text=title)
+            tree.column(column, width=80, anchor="e")
+        tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=(0, 10))
+        
+        def refresh():
+            if not window.winfo_exists():
+                return
+            if metrics.enabled:
+                status_var.set("Instrumentation active")
+                enable_btn.pack_forget()
+            else:
+                status_var.set("Instrumentation désactivée (variable LAUNCHER_METRICS=1 ou bouton Activer)")
+            
+            summary = metrics.summary()
+            counters = summary.pop("counters")
+            tree.delete(*tree.get_children())
+            for name in sorted(summary):
+                stat = summary[name]
+                tree.insert("", tk.END, text=name, values=(
+                    stat["count"], stat["errors"], f"{stat['p50_ms']:.1f}",
+                    f"{stat['p95_ms']:.1f}", f"{stat['max_ms']:.1f}"))
+            for name in sorted(counters):
+                tree.insert("", tk.END, text=name, values=(counters[name], "", "", "", ""))
+            window.after(1000, refresh)
+        
+        refresh()
+    
+    def open_roots_panel(self):
+        """Ouvre la fenêtre des bibliothèques : état et durée du dernier scan de chacune."""
+        if self.roots_window is not None and self.roots_window.winfo_exists():
+            self.roots_window.lift()
+            return
+        
+        window = tk.Toplevel(self.root)
+        window.title("Bibliothèques")
+        window.geometry("620x260")
+        self.roots_window = window
+        
+        buttons = ttk.Frame(window)
+        buttons.pack(fill=tk.X, padx=10, pady=(10, 5))
+        ttk.Button(buttons, text="Ajouter", command=self.select_directory).pack(side=tk.LEFT)
+        remove_btn = ttk.Button(buttons, text="Retirer")
+        remove_btn.pack(side=tk.LEFT, padx=5)
+        
+        columns = ("games", "seconds", "state")
+        tree = ttk.Treeview(window, columns=columns, height=8, selectmode="browse")
+        tree.heading("#0", text="Répertoire")
+        tree.column("#0", width=320)
+        for column, title in zip(columns, ("Jeux", "Durée (s)", "État")):
+            tree.heading(column, text=title)
+            tree.column(column, width=90, anchor="e")
+        tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=(0, 10))
+        
+        def remove_selected():
+            for path in tree.selection():
+                self.remove_root(path)
+        remove_btn.configure(command=remove_selected)
+        
+        def refresh():
+            if not window.winfo_exists():
+                return
+            worker = self.scan_worker
+            statuses = worker.progress.roots if worker is not None else self.root_status
+            selection = tree.selection()
+            tree.delete(*tree.get_children())
+            for root in self.roots:
+                status = statuses.get(root.path)
+                if status is None:
+                    values = ("", "", "")
                 else:
-                    frame.pack_forget()
\ No newline at end of file
+                    values = (status.games, f"{status.seconds:.2f}",
+                              ROOT_STATE_LABELS.get(status.state, status.state))
+                tree.insert("", tk.END, iid=root.path, text=root.path, values=values)
+            tree.selection_set([path for path in selection if tree.exists(path)])
+            window.after(1000, refresh)
+        
+        refresh()
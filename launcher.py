@@ -0,0 +1,558 @@
+"""
+Interface en ligne de commande du lanceur de jeux, utilisable sans affichage.
+
+Usage :
+    python -m launcher scan [<répertoire> ...] [--timeout <s>] [--workers <n>] [--json]
+    python -m launcher list <répertoire> [--cached] [--sort recent|launches|playtime] [--json]
+    python -m launcher launch <chemin ou nom> [--dir <répertoire>]
+    python -m launcher stop <nom> [<nom> ...] | --all
+    python -m launcher status [--json]
+    python -m launcher history [--sort recent|launches|playtime] [--limit <n>] [--json]
+    python -m launcher watch <répertoire>
+    python -m launcher profile <chemin> [--priority <p>] [--io-priority <p>] [--affinity 0,1] [--env NOM=VALEUR] [--clear]
+    python -m launcher [--port <port>] daemon
+
+Si un démon est en cours d'exécution, launch/stop/status passent par lui
+(API JSON-RPC sur une socket locale), ce qui permet de suivre les jeux lancés.
+Chaque requête porte le jeton de session que le démon écrit au démarrage dans
+data/daemon.token, lisible par le seul utilisateur.
+Tkinter et PIL ne sont jamais importés par ce module.
+"""
+
+import argparse
+import hmac
+import json
+import logging
+import os
+import secrets
+import socket
+import socketserver
+import sys
+import time
+
+from logger import logger
+from metrics import metrics
+from library import GameLibrary, LibraryRoot, load_roots, DEFAULT_ROOT_TIMEOUT, DEFAULT_ROOT_WORKERS
+from models.game import Game, game_key
+from scanner import scan_games_directory, scan_changes, DEFAULT_EXCLUDE_PATTERNS
+
+# Adresse par défaut du démon (boucle locale uniquement)
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 47321
+
+# Jeton de session du démon, exigé dans chaque requête
+DEFAULT_TOKEN_PATH = os.path.join("data", "daemon.token")
+
+
+class DaemonUnavailable(Exception):
+    """Levée quand aucun démon ne répond à l'adresse demandée."""
+
+
+class LauncherService:
+    """Opérations exposées par la ligne de commande et par le démon."""
+
+    def __init__(self, scan_index=None, session_store=None):
+        """
+        Initialise le service.
+
+        Args:
+            scan_index (ScanIndex, optional): Index de scan persistant.
+            session_store (SessionStore, optional): Historique des sessions de jeu.
+        """
+        # Import différé : psutil n'est chargé que si l'on gère des processus
+        from game_manager import GameManager
+        from profiles import ProfileStore
+        from prefetch import Prefetcher
+        self.game_manager = GameManager(session_store, ProfileStore(), Prefetcher())
+        self.scan_index = scan_index
+        self.library = GameLibrary()  # Jeux connus, un objet par fichier
+
+    def scan(self, directory, max_depth=None, exclude_patterns=DEFAULT_EXCLUDE_PATTERNS):
+        """Scanne un répertoire et mémorise les jeux trouvés."""
+        start = time.perf_counter()
+        games = scan_games_directory(directory, max_depth, exclude_patterns, index=self.scan_index)
+        elapsed = time.perf_counter() - start
+        # Conserver les objets existants : ils portent l'état des jeux lancés
+        games = self.library.merge(games)
+        return {"directory": directory, "count": len(games), "seconds": elapsed,
+                "games": [game.to_dict() for game in games]}
+
+    def find_game(self, target, directory=None):
+        """Retrouve un jeu par chemin ou par nom (insensible à la casse)."""
+        game = self.library.find(target)
+        if game is not None:
+            return game
+        if os.path.isfile(target):
+            game = Game(os.path.splitext(os.path.basename(target))[0], target)
+            return self.library.merge([game])[0]
+
+        if directory:
+            self.scan(directory)
+        lowered = target.casefold()
+        for game in list(self.library.games.values()):
+            if game.sort_key == lowered:
+                return game
+        raise ValueError(f"Jeu introuvable: {target}")
+
+    def launch(self, target, directory=None):
+        """Lance un jeu et retourne son état."""
+        game = self.find_game(target, directory)
+        if not self.game_manager.launch_game(game):
+            raise RuntimeError(f"Impossible de lancer {game.name}")
+        return game.to_dict()
+
+    def stop(self, targets):
+        """
+        Ferme ensemble les jeux en cours désignés par nom ou par chemin.
+
+        Returns:
+            list: Le résultat de la fermeture de chaque jeu (voir CloseResult.to_dict).
+        """
+        running = list(self.game_manager.running_games.values())
+        games = []
+        for target in targets:
+            key = game_key(target)
+            lowered = target.casefold()
+            game = next((game for game in running if game.key == key or game.sort_key == lowered), None)
+            if game is None:
+                raise ValueError(f"Aucun jeu en cours ne correspond à {target}")
+            if game not in games:
+                games.append(game)
+        return [result.to_dict() for result in self.game_manager.close_games(games)]
+
+    def stop_all(self):
+        """Ferme tous les jeux en cours d'exécution."""
+        return [result.to_dict() for result in self.game_manager.close_all()]
+
+    def status(self):
+        """Retourne la liste des jeux en cours d'exécution."""
+        return [game.to_dict() for game in self.game_manager.running_games.values()]
+
+
+class RequestHandler(socketserver.StreamRequestHandler):
+    """
+    Traite les requêtes JSON-RPC du démon, une par ligne.
+
+    La connexion est fermée dès la première ligne qui n'est pas une requête JSON
+    portant le jeton de session : une requête HTTP envoyée par un navigateur
+    (en-têtes puis corps JSON) est ainsi rejetée avant son corps.
+    """
+
+    def handle(self):
+        """Lit les requêtes de la connexion et y répond."""
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError("la requête n'est pas un objet JSON")
+            except ValueError:
+                self.reply({"id": None, "error": "Requête invalide"})
+                return
+            request_id = request.get("id")
+            token = request.get("token")
+            if not isinstance(token, str) or not hmac.compare_digest(token, self.server.token):
+                logger.warning(f"Requête refusée (jeton invalide) depuis {self.client_address[0]}")
+                self.reply({"id": request_id, "error": "Jeton invalide"})
+                return
+
+            try:
+                method = request.get("method")
+                if method not in ("scan", "launch", "stop", "stop_all", "status"):
+                    raise ValueError(f"Méthode inconnue: {method}")
+                result = getattr(self.server.service, method)(**request.get("params", {}))
+                response = {"id": request_id, "result": result}
+            except Exception as e:
+                response = {"id": request_id, "error": str(e)}
+            self.reply(response)
+
+    def reply(self, response):
+        """Envoie une réponse sur la connexion."""
+        self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+
+
+class DaemonServer(socketserver.ThreadingTCPServer):
+    """Serveur JSON-RPC local conservant l'état des jeux lancés."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, service, host=DEFAULT_HOST, port=DEFAULT_PORT, token_path=DEFAULT_TOKEN_PATH):
+        """
+        Initialise le serveur pour le service donné et publie un nouveau jeton de session.
+
+        Args:
+            service (LauncherService): Les opérations exposées.
+            host (str): L'adresse d'écoute.
+            port (int): Le port d'écoute.
+            token_path (str): Le fichier du jeton, créé lisible par le seul utilisateur.
+        """
+        super().__init__((host, port), RequestHandler)
+        self.service = service
+        self.token = secrets.token_hex(32)
+        self.token_path = token_path
+        write_token(token_path, self.token)
+
+    def server_close(self):
+        """Ferme la socket et retire le jeton de session."""
+        super().server_close()
+        try:
+            os.remove(self.token_path)
+        except OSError:
+            pass
+
+
+def write_token(token_path, token):
+    """Écrit le jeton de session dans un fichier lisible par le seul utilisateur."""
+    token_dir = os.path.dirname(token_path)
+    if token_dir and not os.path.exists(token_dir):
+        os.makedirs(token_dir)
+    if os.path.exists(token_path):
+        # Jeton d'un démon précédent : recréer le fichier avec les bons droits
+        os.remove(token_path)
+    fd = os.open(token_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(token)
+
+
+def call_daemon(method, host=DEFAULT_HOST, port=DEFAULT_PORT, token_path=DEFAULT_TOKEN_PATH, **params):
+    """
+    Appelle une méthode du démon.
+
+    Raises:
+        DaemonUnavailable: Si aucun démon n'écoute à cette adresse ou si son jeton est illisible.
+        RuntimeError: Si le démon retourne une erreur.
+    """
+    try:
+        with open(token_path, "r", encoding="utf-8") as f:
+            token = f.read().strip()
+    except OSError:
+        raise DaemonUnavailable(f"Aucun démon sur {host}:{port}")
+    try:
+        connection = socket.create_connection((host, port), timeout=2)
+    except OSError:
+        raise DaemonUnavailable(f"Aucun démon sur {host}:{port}")
+
+    with connection:
+        connection.settimeout(None)
+        request = {"id": 1, "token": token, "method": method, "params": params}
+        connection.sendall(json.dumps(request).encode("utf-8") + b"\n")
+        with connection.makefile("rb") as stream:
+            response = json.loads(stream.readline())
+    if "error" in response:
+        raise RuntimeError(response["error"])
+    return response["result"]
+
+
+def open_scan_index(enabled):
+    """Retourne l'index de scan persistant, ou None s'il est désactivé."""
+    if not enabled:
+        return None
+    from scan_index import ScanIndex
+    return ScanIndex()
+
+
+def open_session_store(sample_interval=None):
+    """Ouvre l'historique des sessions (sans échantillonnage si sample_interval vaut 0)."""
+    from sessions import SessionStore, DEFAULT_SAMPLE_INTERVAL
+    if sample_interval is None:
+        sample_interval = DEFAULT_SAMPLE_INTERVAL
+    return SessionStore(sample_interval=sample_interval)
+
+
+def sort_by_history(games, sort):
+    """Trie des jeux (dictionnaires) selon l'historique des sessions ; les jeux jamais lancés restent à la fin."""
+    store = open_session_store(0)
+    try:
+        stats = store.game_stats()
+    finally:
+        store.close()
+    column = {"recent": 2, "launches": 0, "playtime": 1}[sort]
+
+    def history_key(game):
+        key = game_key(game["path"])
+        return -(stats[key][column] or 0) if key in stats else 1
+
+    return sorted(games, key=history_key)
+
+
+def format_duration(seconds):
+    """Formate une durée en heures et minutes."""
+    minutes = int(seconds // 60)
+    return f"{minutes // 60} h {minutes % 60:02d}" if minutes >= 60 else f"{minutes} min"
+
+
+def print_games(games, as_json):
+    """Affiche une liste de jeux."""
+    if as_json:
+        print(json.dumps(games, ensure_ascii=False, indent=2))
+        return
+    for game in games:
+        state = f"  [en cours, PID {game['pid']}]" if game.get("is_running") else ""
+        print(f"{game['name']}\t{game['path']}{state}")
+
+
+def build_parser():
+    """Construit l'analyseur d'arguments."""
+    parser = argparse.ArgumentParser(prog="python -m launcher", description="Lanceur de jeux en ligne de commande")
+    parser.add_argument("-v", "--verbose", action="store_true", help="afficher les messages du journal")
+    parser.add_argument("--host", default=DEFAULT_HOST, help="adresse du démon")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="port du démon")
+    parser.add_argument("--metrics", action="store_true",
+                        help="activer l'instrumentation et afficher son résumé à la fin")
+    parser.add_argument("--profile", metavar="FICHIER", default=None,
+                        help="profiler la commande avec cProfile et écrire les statistiques")
+    parser.add_argument("--tracemalloc", action="store_true",
+                        help="afficher les principales allocations mémoire à la fin")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    scan = subparsers.add_parser("scan", help="scanner des répertoires de jeux en parallèle")
+    scan.add_argument("directories", nargs="*",
+                      help="répertoires à scanner (par défaut, les bibliothèques configurées)")
+    scan.add_argument("--timeout", type=float, default=DEFAULT_ROOT_TIMEOUT,
+                      help="délai maximal par répertoire, en secondes")
+    scan.add_argument("--workers", type=int, default=DEFAULT_ROOT_WORKERS,
+                      help="threads de scan par répertoire")
+    scan.add_argument("--max-depth", type=int, default=None)
+    scan.add_argument("--exclude", action="append", default=None, help="motif de dossier à ignorer")
+    scan.add_argument("--no-index", action="store_true", help="ne pas utiliser l'index de scan")
+    scan.add_argument("--json", action="store_true")
+
+    list_cmd = subparsers.add_parser("list", help="lister les jeux d'un répertoire")
+    list_cmd.add_argument("directory")
+    list_cmd.add_argument("--cached", action="store_true", help="lire l'index sans scanner")
+    list_cmd.add_argument("--sort", choices=("recent", "launches", "playtime"), default=None,
+                          help="trier selon l'historique des sessions")
+    list_cmd.add_argument("--json", action="store_true")
+
+    launch = subparsers.add_parser("launch", help="lancer un jeu")
+    launch.add_argument("target", help="chemin de l'exécutable ou nom du jeu")
+    launch.add_argument("--dir", default=None, help="répertoire où chercher le jeu par son nom")
+
+    stop = subparsers.add_parser("stop", help="fermer des jeux lancés par le démon")
+    stop.add_argument("targets", nargs="*", help="noms ou chemins des jeux")
+    stop.add_argument("--all", action="store_true", help="fermer tous les jeux en cours")
+
+    status = subparsers.add_parser("status", help="afficher les jeux en cours (démon)")
+    status.add_argument("--json", action="store_true")
+
+    history = subparsers.add_parser("history", help="afficher les jeux les plus joués")
+    history.add_argument("--sort", choices=("recent", "launches", "playtime"), default="recent")
+    history.add_argument("--limit", type=int, default=20)
+    history.add_argument("--json", action="store_true")
+
+    watch = subparsers.add_parser("watch", help="afficher les jeux installés ou désinstallés dans un répertoire")
+    watch.add_argument("directory")
+
+    profile = subparsers.add_parser("profile", help="afficher ou modifier le profil de lancement d'un jeu")
+    profile.add_argument("path", help="chemin du jeu")
+    profile.add_argument("--priority", default=None,
+                         help="priorité CPU : idle, below_normal, normal, above_normal ou high")
+    profile.add_argument("--io-priority", default=None, help="priorité d'E/S : idle, low, normal ou high")
+    profile.add_argument("--affinity", default=None, help="CPU autorisés, séparés par des virgules")
+    profile.add_argument("--env", action="append", default=[], metavar="NOM=VALEUR",
+                         help="variable d'environnement du jeu")
+    profile.add_argument("--clear", action="store_true", help="supprimer le profil")
+
+    subparsers.add_parser("daemon", help="démarrer le démon JSON-RPC local")
+    return parser
+
+
+def main(argv=None):
+    """Point d'entrée de la ligne de commande."""
+    args = build_parser().parse_args(argv)
+    logger.set_console_level(logging.INFO if args.verbose else logging.WARNING)
+
+    if args.metrics:
+        metrics.enable()
+    if args.tracemalloc:
+        import tracemalloc
+        tracemalloc.start()
+    profiler = None
+    if args.profile:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    try:
+        return run_command(args)
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(args.profile)
+            print(f"Profil écrit dans {args.profile}", file=sys.stderr)
+        if args.tracemalloc:
+            snapshot = tracemalloc.take_snapshot()
+            print("Principales allocations :", file=sys.stderr)
+            for stat in snapshot.statistics("lineno")[:10]:
+                print(f"  {stat}", file=sys.stderr)
+        if args.metrics:
+            print(json.dumps(metrics.summary(), indent=2), file=sys.stderr)
+            metrics.flush()
+
+
+def watch_directory(directory):
+    """Scanne un répertoire puis affiche les jeux ajoutés ou retirés jusqu'à Ctrl+C."""
+    from watcher import create_watcher
+
+    index = open_scan_index(True)
+    library = GameLibrary()
+    library.merge(scan_games_directory(directory, index=index))
+
+    def on_change(changes):
+        for path, recursive, games in scan_changes(directory, changes, index=index):
+            added, removed, updated = library.replace_directory(path, recursive, games)
+            for prefix, changed in (("+", added), ("-", removed), ("~", updated)):
+                for game in changed:
+                    print(f"{prefix} {game.name}\t{game.path}", flush=True)
+
+    watcher = create_watcher(directory, on_change)
+    watcher.start()
+    print(f"{len(library)} jeux, surveillance de {directory} ({watcher.kind}). Ctrl+C pour arrêter.", flush=True)
+    try:
+        while watcher.is_alive():
+            watcher.join(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.stop()
+
+
+def edit_profile(args):
+    """Affiche le profil de lancement d'un jeu après l'avoir éventuellement modifié."""
+    from profiles import ProfileStore, LaunchProfile
+
+    store = ProfileStore()
+    key = game_key(args.path)
+    profile = store.get(key)
+    if args.clear:
+        store.set(key, None)
+        profile = None
+    elif args.priority or args.io_priority or args.affinity or args.env:
+        data = profile.to_dict() if profile is not None else {}
+        if args.priority:
+            data["priority"] = args.priority
+        if args.io_priority:
+            data["io_priority"] = args.io_priority
+        if args.affinity:
+            data["affinity"] = [int(cpu) for cpu in args.affinity.split(",")]
+        for variable in args.env:
+            name, separator, value = variable.partition("=")
+            if not separator:
+                raise ValueError(f"Variable d'environnement invalide: {variable}")
+            data.setdefault("env", {})[name] = value
+        profile = LaunchProfile.from_dict(data)
+        store.set(key, profile)
+    print(json.dumps(profile.to_dict() if profile is not None else {}, ensure_ascii=False, indent=2))
+
+
+def run_command(args):
+    """Exécute la commande demandée et retourne le code de sortie."""
+    daemon_address = {"host": args.host, "port": args.port}
+
+    try:
+        if args.command == "scan":
+            from library_scan import scan_library
+
+            exclude = args.exclude if args.exclude is not None else DEFAULT_EXCLUDE_PATTERNS
+            if args.directories:
+                roots = [LibraryRoot(directory, args.timeout, args.workers) for directory in args.directories]
+            else:
+                roots = load_roots()
+            if not roots:
+                print("Aucun répertoire indiqué ni bibliothèque configurée.", file=sys.stderr)
+                return 1
+            start = time.perf_counter()
+            games, statuses = scan_library(roots, args.max_depth, exclude,
+                                           index=open_scan_index(not args.no_index))
+            elapsed = time.perf_counter() - start
+            if args.json:
+                print(json.dumps({"count": len(games), "seconds": elapsed,
+                                  "roots": [status.to_dict() for status in statuses]}))
+            else:
+                for status in statuses:
+                    print(f"{status.path}: {status.games} jeux en {status.seconds * 1000:.1f} ms ({status.state})")
+                print(f"{len(games)} jeux trouvés en {elapsed * 1000:.1f} ms")
+            if any(not status.complete for status in statuses):
+                return 1
+
+        elif args.command == "list":
+            index = open_scan_index(True)
+            games = index.cached_games(args.directory) if args.cached else \
+                scan_games_directory(args.directory, index=index)
+            games = [game.to_dict() for game in games]
+            if args.sort:
+                games = sort_by_history(games, args.sort)
+            print_games(games, args.json)
+
+        elif args.command == "launch":
+            target = os.path.abspath(args.target) if os.path.isfile(args.target) else args.target
+            try:
+                game = call_daemon("launch", target=target, directory=args.dir, **daemon_address)
+            except DaemonUnavailable:
+                # Sans démon, le jeu est lancé directement mais ne sera pas suivi : aucune
+                # session n'est enregistrée, ce processus ne verrait pas la fin de la partie
+                game = LauncherService(open_scan_index(True)).launch(target, args.dir)
+            print(f"{game['name']} lancé (PID {game['pid']})")
+
+        elif args.command == "stop":
+            if args.all:
+                results = call_daemon("stop_all", **daemon_address)
+            elif args.targets:
+                results = call_daemon("stop", targets=args.targets, **daemon_address)
+            else:
+                raise ValueError("Indiquez les jeux à fermer ou --all")
+            for result in results:
+                if result["success"]:
+                    forced = f", {result['killed']} processus tués" if result["killed"] else ""
+                    print(f"{result['name']} fermé en {result['seconds']:.2f} s{forced}")
+                else:
+                    print(f"{result['name']}: échec de la fermeture ({result['reason']})", file=sys.stderr)
+            if not all(result["success"] for result in results):
+                return 1
+
+        elif args.command == "status":
+            print_games(call_daemon("status", **daemon_address), args.json)
+
+        elif args.command == "history":
+            store = open_session_store(0)
+            try:
+                games = store.top_games(args.sort, args.limit)
+            finally:
+                store.close()
+            if args.json:
+                print(json.dumps(games, ensure_ascii=False, indent=2))
+                return 0
+            for game in games:
+                last_played = time.strftime("%Y-%m-%d %H:%M", time.localtime(game["last_played"]))
+                print(f"{game['name']}\t{game['launch_count']} lancements\t"
+                      f"{format_duration(game['total_playtime'])}\tdernière partie {last_played}")
+
+        elif args.command == "watch":
+            watch_directory(args.directory)
+
+        elif args.command == "profile":
+            edit_profile(args)
+
+        elif args.command == "daemon":
+            store = open_session_store()
+            service = LauncherService(open_scan_index(True), store)
+            with DaemonServer(service, args.host, args.port) as server:
+                print(f"Démon en écoute sur {args.host}:{args.port}")
+                try:
+                    server.serve_forever()
+                except KeyboardInterrupt:
+                    pass
+                finally:
+                    service.stop_all()
+                    store.close()
+    except DaemonUnavailable as e:
+        print(f"{e}. Démarrez-le avec: python -m launcher daemon", file=sys.stderr)
+        return 2
+    except (ValueError, RuntimeError) as e:
+        print(f"Erreur: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
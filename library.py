@@ -0,0 +1,208 @@
+import os
+import json
+import threading
+from models.game import game_key
+from logger import logger
+
+# Emplacement par défaut de la liste des bibliothèques
+DEFAULT_ROOTS_PATH = os.path.join("data", "library.json")
+
+# Délai maximal accordé au scan d'une bibliothèque (s)
+DEFAULT_ROOT_TIMEOUT = 60.0
+
+# Nombre de threads de scan par bibliothèque
+DEFAULT_ROOT_WORKERS = 4
+
+
+class LibraryRoot:
+    """Répertoire racine d'une bibliothèque de jeux et ses options de scan."""
+
+    __slots__ = ("path", "timeout", "workers")
+
+    def __init__(self, path, timeout=DEFAULT_ROOT_TIMEOUT, workers=DEFAULT_ROOT_WORKERS):
+        """
+        Initialise une bibliothèque.
+
+        Args:
+            path (str): Le répertoire racine.
+            timeout (float): Délai maximal du scan en secondes, au-delà duquel les
+                résultats de cette bibliothèque sont abandonnés.
+            workers (int): Nombre de threads parcourant la bibliothèque en parallèle.
+        """
+        self.path = os.path.abspath(path)
+        self.timeout = timeout
+        self.workers = max(1, workers)
+
+    def to_dict(self):
+        """Sérialise la bibliothèque en dictionnaire compatible JSON."""
+        return {"path": self.path, "timeout": self.timeout, "workers": self.workers}
+
+    @classmethod
+    def from_dict(cls, data):
+        """Recrée une bibliothèque à partir du résultat de to_dict (ou d'un simple chemin)."""
+        if isinstance(data, str):
+            return cls(data)
+        return cls(data["path"], data.get("timeout", DEFAULT_ROOT_TIMEOUT),
+                   data.get("workers", DEFAULT_ROOT_WORKERS))
+
+    def __repr__(self):
+        """Représentation de l'objet pour le débogage."""
+        return f"LibraryRoot(path='{self.path}', timeout={self.timeout}, workers={self.workers})"
+
+
+def load_roots(config_path=DEFAULT_ROOTS_PATH):
+    """
+    Charge la liste des bibliothèques configurées.
+
+    Args:
+        config_path (str): Le fichier de configuration.
+
+    Returns:
+        list: Les LibraryRoot configurées, vide si le fichier est absent ou invalide.
+    """
+    if not os.path.exists(config_path):
+        return []
+    try:
+        with open(config_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return [LibraryRoot.from_dict(entry) for entry in data.get("roots", [])]
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        logger.warning(f"Impossible de charger la liste des bibliothèques {config_path}: {e}")
+        return []
+
+
+def save_roots(roots, config_path=DEFAULT_ROOTS_PATH):
+    """
+    Enregistre la liste des bibliothèques de manière atomique.
+
+    Args:
+        roots (list): Les LibraryRoot à enregistrer.
+        config_path (str): Le fichier de configuration.
+    """
+    try:
+        config_dir = os.path.dirname(config_path)
+        if config_dir and not os.path.exists(config_dir):
+            os.makedirs(config_dir)
+        tmp_path = config_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"roots": [root.to_dict() for root in roots]}, f, indent=2)
+        os.replace(tmp_path, config_path)
+    except OSError as e:
+        logger.warning(f"Impossible d'enregistrer la liste des bibliothèques {config_path}: {e}")
+
+
+class GameLibrary:
+    """
+    Registre des jeux connus, indexé par identité (voir models.game.game_key).
+
+    Chaque fichier de jeu correspond à un unique objet Game pour toute la durée
+    de l'application : les résultats d'un rescan sont fusionnés dans le registre
+    plutôt que de remplacer les objets existants. L'état des jeux en cours
+    d'exécution, les miniatures et les cartes affichées survivent ainsi à une
+    actualisation.
+    """
+
+    def __init__(self):
+        """Initialise un registre vide."""
+        self.games = {}  # Identité -> Game
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.games)
+
+    def __contains__(self, key):
+        return key in self.games
+
+    def get(self, key):
+        """Retourne le jeu d'identité donnée, ou None."""
+        return self.games.get(key)
+
+    def find(self, path):
+        """Retourne le jeu correspondant à un chemin de fichier, ou None."""
+        return self.games.get(game_key(path))
+
+    def merge(self, games):
+        """
+        Fusionne des jeux issus d'un scan dans le registre.
+
+        Args:
+            games (list): Les jeux trouvés.
+
+        Returns:
+            list: Les objets du registre correspondants, dans le même ordre : les jeux
+                déjà connus sont remplacés par leur objet existant, mis à jour.
+        """
+        merged = []
+        with self.lock:
+            for game in games:
+                existing = self.games.get(game.key)
+                if existing is None:
+                    self.games[game.key] = existing = game
+                elif existing is not game:
+                    existing.update_from(game)
+                merged.append(existing)
+        return merged
+
+    def retain(self, games, root=None):
+        """
+        Retire du registre les jeux absents d'un scan complet.
+
+        Les jeux en cours d'exécution sont conservés.
+
+        Args:
+            games (list): Les jeux trouvés par le scan.
+            root (str, optional): La racine scannée ; seuls les jeux situés sous cette
+                racine peuvent être retirés.
+
+        Returns:
+            list: Les jeux retirés.
+        """
+        found = {game.key for game in games}
+        prefix = os.path.join(game_key(root), "") if root else ""
+        with self.lock:
+            removed = [
+                game for key, game in self.games.items()
+                if key not in found and key.startswith(prefix) and not game.is_running
+            ]
+            for game in removed:
+                del self.games[game.key]
+        return removed
+
+    def replace_directory(self, path, recursive, games):
+        """
+        Remplace les jeux d'un répertoire (ou d'un sous-arbre) par ceux d'un nouveau scan.
+
+        Les jeux en cours d'exécution ne sont pas retirés.
+
+        Args:
+            path (str): Le répertoire relu.
+            recursive (bool): True si tout le sous-arbre a été relu, False pour les seuls
+                fichiers du répertoire.
+            games (list): Les jeux trouvés.
+
+        Returns:
+            tuple: (jeux ajoutés, jeux retirés, jeux dont la description a changé).
+        """
+        directory = game_key(path)
+        prefix = os.path.join(directory, "")
+        found = {game.key for game in games}
+        added, updated = [], []
+        with self.lock:
+            for game in games:
+                existing = self.games.get(game.key)
+                if existing is None:
+                    self.games[game.key] = game
+                    added.append(game)
+                elif existing is not game and existing.update_from(game):
+                    updated.append(existing)
+
+            if recursive:
+                removed = [game for key, game in self.games.items()
+                           if key.startswith(prefix) and key not in found and not game.is_running]
+            else:
+                removed = [game for key, game in self.games.items()
+                           if os.path.dirname(key) == directory and key not in found and not game.is_running]
+            for game in removed:
+                del self.games[game.key]
+        return added, removed, updated
+
@@ -0,0 +1,337 @@
+import os
+import time
+import queue
+import threading
+from library import LibraryRoot
+from scanner import (DEFAULT_EXCLUDE_PATTERNS, ScanProgress, VisitedDirectories, walk_directory,
+                     listing_games, is_excluded)
+from background import background, lower_thread_priority
+from logger import logger
+from metrics import metrics
+
+# Intervalle de vérification des délais et de l'annulation (s)
+POLL_INTERVAL = 0.2
+
+# États d'une bibliothèque pendant et après le scan
+ROOT_SCANNING = "scanning"
+ROOT_DONE = "done"
+ROOT_TIMEOUT = "timeout"
+ROOT_MISSING = "missing"
+ROOT_CANCELLED = "cancelled"
+
+
+class RootStatus:
+    """Résultat du scan d'une bibliothèque, lisible depuis un autre thread."""
+
+    __slots__ = ("path", "state", "seconds", "directories", "games")
+
+    def __init__(self, path):
+        """
+        Initialise l'état d'une bibliothèque en cours de scan.
+
+        Args:
+            path (str): Le répertoire racine.
+        """
+        self.path = path
+        self.state = ROOT_SCANNING
+        self.seconds = 0.0
+        self.directories = 0
+        self.games = 0
+
+    @property
+    def complete(self):
+        """Indique si la bibliothèque a été entièrement parcourue."""
+        return self.state == ROOT_DONE
+
+    def to_dict(self):
+        """Sérialise l'état en dictionnaire compatible JSON."""
+        return {"path": self.path, "state": self.state, "seconds": round(self.seconds, 3),
+                "directories": self.directories, "games": self.games}
+
+    def __str__(self):
+        """Représentation textuelle de l'état."""
+        return f"{self.path}: {self.games} jeux en {self.seconds:.2f} s ({self.state})"
+
+
+class RootScan:
+    """
+    Scan d'une bibliothèque par son propre groupe de threads.
+
+    Le listing de la racine est lu en premier, puis chacun de ses sous-dossiers est
+    parcouru comme une tâche indépendante par l'un des threads du groupe. Les jeux
+    trouvés sont déposés dans la file de résultats commune à toutes les
+    bibliothèques. Les threads sont des démons : un montage réseau bloqué dans un
+    appel système ne retient ni les autres bibliothèques ni la fin du programme.
+    Un scan arrêté (délai dépassé, annulation) n'écrit plus ni dans la file de
+    résultats ni dans l'index, même si un thread sort d'un appel bloqué après coup.
+    """
+
+    def __init__(self, root, results, max_depth=None, exclude_patterns=DEFAULT_EXCLUDE_PATTERNS,
+                 follow_symlinks=True, index=None):
+        """
+        Initialise le scan d'une bibliothèque.
+
+        Args:
+            root (LibraryRoot): La bibliothèque à scanner.
+            results (queue.Queue): File commune recevant des tuples (RootScan, type, contenu).
+            max_depth (int, optional): Profondeur maximale de parcours.
+            exclude_patterns (iterable): Motifs de dossiers à ignorer.
+            follow_symlinks (bool): Suivre les liens symboliques vers des répertoires.
+            index (ScanIndex, optional): Index de scan partagé.
+        """
+        self.root = root
+        self.results = results
+        self.max_depth = max_depth
+        self.exclude_patterns = exclude_patterns
+        self.follow_symlinks = follow_symlinks
+        self.index = index
+        self.status = RootStatus(root.path)
+        self.tasks = queue.Queue()
+        self.pending = 0
+        self.subtrees = []
+        self.prefetched = {}  # Listings "images" lus en avance, partagés par les threads
+        self.visited = VisitedDirectories()  # Répertoires parcourus par l'ensemble des threads
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.started_at = None
+        self.deadline = None
+
+    def start(self):
+        """Démarre les threads du groupe."""
+        if self.index is not None:
+            options = {
+                "max_depth": self.max_depth,
+                "exclude_patterns": list(self.exclude_patterns),
+                "follow_symlinks": self.follow_symlinks,
+            }
+            # Des options différentes invalident les enregistrements existants
+            if not self.index.begin_scan(self.root.path, options):
+                self.index.prune(self.root.path, set())
+
+        self.started_at = time.perf_counter()
+        self.deadline = self.started_at + self.root.timeout
+        self.submit(self.root.path, 0)
+        name = os.path.basename(self.root.path) or self.root.path
+        for number in range(self.root.workers):
+            threading.Thread(target=self.work, daemon=True, name=f"scan-{name}-{number}").start()
+
+    def submit(self, path, depth):
+        """Ajoute un répertoire à parcourir (sous verrou si des threads sont démarrés)."""
+        with self.lock:
+            self.pending += 1
+        self.tasks.put((path, depth))
+
+    def work(self):
+        """Boucle d'un thread du groupe."""
+        lower_thread_priority()
+        while True:
+            task = self.tasks.get()
+            if task is None:
+                return
+            path, depth = task
+            if not self.stopped.is_set():
+                try:
+                    self.scan_task(path, depth)
+                except Exception as e:
+                    logger.error(f"Erreur lors du scan de {path}: {e}", exc_info=True)
+
+            with self.lock:
+                self.pending -= 1
+                finished = self.pending == 0
+            if finished:
+                # Dernière tâche : libérer les autres threads du groupe
+                for _ in range(self.root.workers):
+                    self.tasks.put(None)
+                if not self.stopped.is_set():
+                    self.results.put((self, "done", None))
+
+    def scan_task(self, path, depth):
+        """
+        Parcourt un répertoire : la racine seule (depth 0), ou un sous-arbre complet.
+
+        Les sous-dossiers de la racine sont soumis comme nouvelles tâches.
+        """
+        if depth == 0:
+            if not os.path.isdir(path):
+                self.status.state = ROOT_MISSING
+                logger.error(f"Le répertoire {path} n'existe pas.")
+                return
+            remaining = 0
+        else:
+            remaining = None if self.max_depth is None else self.max_depth - depth
+
+        visited = set()  # Chemins parcourus par cette tâche, pour élaguer l'index
+        for listing, _ in walk_directory(path, remaining, self.exclude_patterns, self.follow_symlinks,
+                                         self.prefetched, self.index, self.visited):
+            # Mode jeu : suspendre le parcours tant qu'un jeu tourne
+            background.wait()
+            if self.stopped.is_set():
+                return
+            visited.add(os.path.abspath(listing.path))
+            self.status.directories += 1
+            games = listing_games(listing, self.prefetched, self.index, self.stopped)
+            if self.stopped.is_set():
+                # Abandonné pendant la lecture du dossier (montage lent) : résultat ignoré
+                return
+            if games:
+                self.results.put((self, "games", games))
+
+            if depth == 0 and (self.max_depth is None or self.max_depth > 0):
+                for name, is_link in sorted(listing.subdirs, key=lambda item: item[0].lower()):
+                    if is_excluded(name, self.exclude_patterns):
+                        continue
+                    if not self.follow_symlinks and is_link:
+                        continue
+                    subtree = os.path.join(path, name)
+                    try:
+                        stat = os.stat(subtree)
+                    except OSError:
+                        continue
+                    # Réserver le sous-arbre à sa tâche ; un lien vers un sous-arbre déjà soumis est ignoré
+                    if not self.visited.add((stat.st_dev, stat.st_ino)):
+                        continue
+                    self.subtrees.append(subtree)
+                    self.submit(subtree, 1)
+
+        if depth > 0 and self.index is not None and not self.stopped.is_set():
+            self.index.prune(path, visited)
+
+    def stop(self, state):
+        """Abandonne le scan : les tâches restantes sont ignorées."""
+        if self.status.state == ROOT_SCANNING:
+            self.status.state = state
+        self.status.seconds = time.perf_counter() - self.started_at
+        self.stopped.set()
+
+    def finish(self):
+        """Termine un scan complet et élague l'index des sous-dossiers disparus."""
+        if self.status.state == ROOT_SCANNING:
+            self.status.state = ROOT_DONE
+            if self.index is not None:
+                self.index.prune_outside(self.root.path, self.subtrees)
+        self.status.seconds = time.perf_counter() - self.started_at
+
+
+def iter_library(roots, max_depth=None, exclude_patterns=DEFAULT_EXCLUDE_PATTERNS,
+                 follow_symlinks=True, index=None, progress=None, cancel_event=None):
+    """
+    Scanne plusieurs bibliothèques en parallèle et produit les jeux au fur et à mesure.
+
+    Chaque bibliothèque est parcourue par son propre groupe de threads (voir RootScan) :
+    les disques locaux livrent leurs jeux sans attendre un montage lent. Une
+    bibliothèque qui dépasse son délai est abandonnée ; ses jeux déjà produits sont
+    conservés, l'index n'est pas élagué pour elle. Le scan est suspendu pendant le
+    mode jeu, sans que la pause ne compte dans les délais. Un jeu présent dans plusieurs
+    bibliothèques imbriquées n'est produit qu'une fois.
+
+    Args:
+        roots (list): Les bibliothèques (LibraryRoot ou chemins).
+        max_depth (int, optional): Profondeur maximale de parcours de chaque bibliothèque.
+        exclude_patterns (iterable): Motifs de dossiers à ignorer.
+        follow_symlinks (bool): Suivre les liens symboliques vers des répertoires.
+        index (ScanIndex, optional): Index persistant utilisé pour un rescan incrémental.
+        progress (ScanProgress, optional): Objet mis à jour pendant le scan ; progress.roots
+            reçoit l'état (RootStatus) de chaque bibliothèque.
+        cancel_event (threading.Event, optional): Interrompt le scan lorsqu'il est positionné.
+
+    Yields:
+        Game: Les jeux trouvés, dans l'ordre d'arrivée.
+    """
+    if progress is None:
+        progress = ScanProgress()
+    start = time.perf_counter()
+    results = queue.Queue()
+    scans = []
+    for root in roots:
+        if not isinstance(root, LibraryRoot):
+            root = LibraryRoot(root)
+        if root.path in progress.roots:
+            continue
+        scan = RootScan(root, results, max_depth, exclude_patterns, follow_symlinks, index)
+        progress.roots[root.path] = scan.status
+        scans.append(scan)
+    for scan in scans:
+        scan.start()
+
+    seen = set()
+    active = set(scans)
+    while active:
+        if cancel_event is not None and cancel_event.is_set():
+            for scan in active:
+                scan.stop(ROOT_CANCELLED)
+            progress.cancelled = True
+            logger.info("Scan des bibliothèques annulé")
+            return
+
+        if background.paused:
+            # Mode jeu : le temps passé en pause ne compte pas dans le délai des bibliothèques
+            paused_at = time.perf_counter()
+            background.wait(POLL_INTERVAL)
+            for scan in active:
+                scan.deadline += time.perf_counter() - paused_at
+            continue
+
+        now = time.perf_counter()
+        for scan in [scan for scan in active if now >= scan.deadline]:
+            scan.stop(ROOT_TIMEOUT)
+            active.discard(scan)
+            metrics.count("scan.root_timeouts")
+            logger.warning(f"Scan de {scan.root.path} abandonné après {scan.root.timeout:.0f} s "
+                           f"({scan.status.games} jeux trouvés)")
+        if not active:
+            break
+
+        timeout = min(POLL_INTERVAL, max(0.0, min(scan.deadline for scan in active) - now))
+        try:
+            scan, kind, games = results.get(timeout=timeout)
+        except queue.Empty:
+            continue
+        if scan not in active:
+            # Résultat tardif d'une bibliothèque abandonnée
+            continue
+
+        if kind == "done":
+            scan.finish()
+            active.discard(scan)
+            metrics.record("scan.root", scan.status.seconds)
+            logger.info(str(scan.status))
+            continue
+
+        progress.directories_visited = sum(s.status.directories for s in scans)
+        for game in games:
+            if game.key in seen:
+                continue
+            seen.add(game.key)
+            scan.status.games += 1
+            progress.games_found += 1
+            yield game
+
+    progress.directories_visited = sum(s.status.directories for s in scans)
+    if index is not None:
+        index.save()
+    progress.finished = True
+    metrics.record("scan", time.perf_counter() - start)
+    metrics.count("scan.directories", progress.directories_visited)
+    metrics.count("scan.games", progress.games_found)
+    logger.info(f"{progress.games_found} jeux trouvés dans {len(scans)} bibliothèques")
+
+
+def scan_library(roots, max_depth=None, exclude_patterns=DEFAULT_EXCLUDE_PATTERNS,
+                 follow_symlinks=True, index=None):
+    """
+    Scanne plusieurs bibliothèques en parallèle.
+
+    Args:
+        roots (list): Les bibliothèques (LibraryRoot ou chemins).
+        max_depth (int, optional): Profondeur maximale de parcours.
+        exclude_patterns (iterable): Motifs de dossiers à ignorer.
+        follow_symlinks (bool): Suivre les liens symboliques vers des répertoires.
+        index (ScanIndex, optional): Index persistant utilisé pour un rescan incrémental.
+
+    Returns:
+        tuple: (jeux dédoublonnés triés par nom, liste des RootStatus de chaque bibliothèque).
+    """
+    progress = ScanProgress()
+    games = list(iter_library(roots, max_depth, exclude_patterns, follow_symlinks, index, progress))
+    games.sort(key=lambda g: g.sort_key)
+    return games, list(progress.roots.values())
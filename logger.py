@@ -1,48 +1,242 @@
 import logging
+import logging.handlers
 import os
 import sys
+import glob
+import gzip
+import queue
+import shutil
+import atexit
+import time
 import traceback
-from datetime import datetime
+from datetime import datetime, timedelta
+
+# Nombre maximal de messages écrits avant un flush du fichier
+BATCH_SIZE = 256
+
+
+class BatchedRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """
+    Fichier de log avec rotation par taille et par jour, sans flush à chaque message.
+    
+    Le flush est déclenché par BatchingQueueListener après chaque lot de messages.
+    Les anciens fichiers peuvent être compressés en gzip. Le fichier (et son
+    répertoire) n'est créé qu'au premier message écrit, par le thread d'écriture.
+    """
+    
+    def __init__(self, filename, max_bytes, backup_count, compress=True, retention_days=None):
+        """
+        Initialise le handler.
+        
+        Args:
+            filename (str): Le fichier de log courant.
+            max_bytes (int): Taille déclenchant une rotation.
+            backup_count (int): Nombre d'anciens fichiers conservés.
+            compress (bool): Compresser les anciens fichiers en gzip.
+            retention_days (int, optional): Âge maximal des anciens fichiers, en jours,
+                appliqué à l'ouverture du fichier.
+        """
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8', delay=True)
+        self.retention_days = retention_days
+        self.rollover_at = self.next_midnight()
+        if compress:
+            self.namer = lambda name: name + ".gz"
+            self.rotator = compress_log_file
+    
+    @staticmethod
+    def next_midnight():
+        """Retourne l'horodatage du prochain minuit (rotation quotidienne)."""
+        tomorrow = datetime.now().date() + timedelta(days=1)
+        return datetime.combine(tomorrow, datetime.min.time()).timestamp()
+    
+    def shouldRollover(self, record):
+        """Rotation si le fichier dépasse la taille maximale ou si le jour a changé."""
+        if time.time() >= self.rollover_at and self.stream is not None and self.stream.tell() > 0:
+            return True
+        return super().shouldRollover(record)
+    
+    def doRollover(self):
+        """Effectue la rotation et planifie la suivante."""
+        super().doRollover()
+        self.rollover_at = self.next_midnight()
+    
+    def _open(self):
+        """Ouvre le fichier courant, en créant le répertoire et en purgeant les anciens fichiers au premier appel."""
+        log_dir = os.path.dirname(self.baseFilename)
+        if not os.path.exists(log_dir):
+            os.makedirs(log_dir)
+        if self.retention_days is not None:
+            self.remove_old_logs(self.retention_days)
+            self.retention_days = None
+        return super()._open()
+    
+    def remove_old_logs(self, retention_days):
+        """
+        Supprime les anciens fichiers plus vieux que la durée de rétention.
+        
+        Seuls les fichiers produits par la rotation de ce handler (launcher.log.1,
+        launcher.log.2.gz...) sont concernés ; les autres fichiers du dossier sont conservés.
+        """
+        limit = time.time() - retention_days * 86400
+        for path in glob.glob(glob.escape(self.baseFilename) + ".*"):
+            try:
+                if os.path.getmtime(path) < limit:
+                    os.remove(path)
+            except OSError:
+                pass
+    
+    def emit(self, record):
+        """Écrit un message sans flush immédiat."""
+        try:
+            if self.shouldRollover(record):
+                self.doRollover()
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.write(self.format(record) + self.terminator)
+        except Exception:
+            self.handleError(record)
+
+
+def compress_log_file(source, dest):
+    """Compresse un fichier de log lors de la rotation."""
+    with open(source, "rb") as f_in, gzip.open(dest, "wb") as f_out:
+        shutil.copyfileobj(f_in, f_out)
+    os.remove(source)
+
+
+class BatchingQueueListener(logging.handlers.QueueListener):
+    """
+    Écoute la file de messages dans un thread et les écrit par lots.
+    
+    Les handlers ne sont flushés qu'une fois par lot, ce qui regroupe les écritures.
+    Une erreur d'écriture (console fermée, disque plein) est signalée par le handler
+    concerné sans arrêter le thread : la file continue d'être vidée et flush() de
+    Logger ne peut pas rester bloqué.
+    """
+    
+    def handle(self, record):
+        """Transmet un message aux handlers, chacun protégé des erreurs des autres."""
+        record = self.prepare(record)
+        for handler in self.handlers:
+            if self.respect_handler_level and record.levelno < handler.level:
+                continue
+            try:
+                handler.handle(record)
+            except Exception:
+                self.report_error(handler, record)
+    
+    def report_error(self, handler, record):
+        """Signale une erreur d'écriture via le handler, sans jamais lever d'exception."""
+        try:
+            handler.handleError(record)
+        except Exception:
+            # La sortie d'erreur elle-même peut être fermée (fin du programme)
+            pass
+    
+    def _monitor(self):
+        """Boucle du thread d'écriture."""
+        q = self.queue
+        while True:
+            batch = [q.get()]
+            while len(batch) < BATCH_SIZE:
+                try:
+                    batch.append(q.get_nowait())
+                except queue.Empty:
+                    break
+            
+            stop = False
+            try:
+                last = None
+                for record in batch:
+                    if record is self._sentinel:
+                        stop = True
+                        continue
+                    self.handle(record)
+                    last = record
+                if last is not None:
+                    for handler in self.handlers:
+                        try:
+                            handler.flush()
+                        except Exception:
+                            self.report_error(handler, last)
+            finally:
+                # Chaque message retiré de la file est marqué traité, même en cas d'erreur
+                for _ in batch:
+                    q.task_done()
+            if stop:
+                return
+
 
 class Logger:
     """Classe pour gérer la journalisation des événements et erreurs."""
     
-    def __init__(self, log_dir="logs"):
+    def __init__(self, log_dir="logs", max_bytes=5 * 1024 * 1024, backup_count=10,
+                 retention_days=30, compress=True):
         """
         Initialise le système de journalisation.
         
+        Les messages sont déposés dans une file et écrits par un thread dédié :
+        les appels au logger ne bloquent jamais sur le disque ou la console.
+        Aucun fichier n'est créé avant le premier message.
+        
         Args:
             log_dir (str): Le répertoire où stocker les fichiers de log.
+            max_bytes (int): Taille maximale du fichier courant avant rotation.
+            backup_count (int): Nombre d'anciens fichiers conservés.
+            retention_days (int): Âge maximal des anciens fichiers, en jours.
+            compress (bool): Compresser les anciens fichiers en gzip.
         """
-        # Créer le répertoire de logs s'il n'existe pas
-        if not os.path.exists(log_dir):
-            os.makedirs(log_dir)
+        self.log_dir = log_dir
         
-        # Configurer le nom du fichier de log avec la date et l'heure
-        log_file = os.path.join(log_dir, f"launcher_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log")
+        # Un seul fichier courant, renouvelé par taille et par jour
+        log_file = os.path.join(log_dir, "launcher.log")
         
         # Configurer le logger
         self.logger = logging.getLogger("launcher")
         self.logger.setLevel(logging.DEBUG)
         
         # Handler pour le fichier
-        file_handler = logging.FileHandler(log_file, encoding='utf-8')
+        file_handler = BatchedRotatingFileHandler(log_file, max_bytes, backup_count, compress, retention_days)
         file_handler.setLevel(logging.DEBUG)
         
         # Handler pour la console
         console_handler = logging.StreamHandler(sys.stdout)
         console_handler.setLevel(logging.INFO)
+        self.console_handler = console_handler
         
         # Formateur
         formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
         file_handler.setFormatter(formatter)
         console_handler.setFormatter(formatter)
         
-        # Ajouter les handlers au logger
-        self.logger.addHandler(file_handler)
-        self.logger.addHandler(console_handler)
+        # Les messages passent par une file, vidée par un thread d'écriture
+        self.queue = queue.Queue()
+        self.logger.addHandler(logging.handlers.QueueHandler(self.queue))
+        self.listener = BatchingQueueListener(self.queue, file_handler, console_handler,
+                                              respect_handler_level=True)
+        self.listener.start()
+        self.listening = True  # Thread d'écriture démarré et pas encore arrêté
+        atexit.register(self.close)
+    
+    def flush(self):
+        """Attend que tous les messages en file soient écrits."""
+        if self.listening:
+            self.queue.join()
+    
+    def close(self):
+        """Écrit les derniers messages et arrête le thread d'écriture."""
+        if self.listening:
+            self.listening = False
+            self.listener.stop()
+    
+    def set_console_level(self, level):
+        """
+        Change le niveau des messages affichés dans la console.
         
-        self.logger.info("Logger initialisé")
+        Args:
+            level (int): Un niveau du module logging (logging.WARNING, ...).
+        """
+        self.console_handler.setLevel(level)
     
     def info(self, message):
         """Enregistre un message d'information."""
@@ -78,9 +272,11 @@ def log_exception_hook(exc_type, exc_value, exc_traceback):
         return
     
     logger.error(
-        "Exception non gérée: %s",
-        ''.join(traceback.format_exception(exc_type, exc_value, exc_traceback))
+        "Exception non gérée: "
+        + ''.join(traceback.format_exception(exc_type, exc_value, exc_traceback))
     )
+    # S'assurer que l'exception est écrite avant une éventuelle fin du programme
+    logger.flush()
 
 # Remplacer le gestionnaire d'exceptions par défaut
 sys.excepthook = log_exception_hook
\ No newline at end of file
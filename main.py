@@ -1,11 +1,25 @@
+import time
+# Début du démarrage, avant les imports : référence de la mesure du premier affichage
+START_TIME = time.perf_counter()
+
 import tkinter as tk
 import os
 import sys
-from scanner import scan_games_directory  # Importation correcte de la fonction
+from library_scan import iter_library  # Scan en flux des bibliothèques, exécuté en arrière-plan par l'interface
+from library import LibraryRoot, load_roots
 from interface import GameLauncherUI
 from game_manager import GameManager
+from scan_index import ScanIndex
+from sessions import SessionStore
+from profiles import ProfileStore, GameMode
+from prefetch import Prefetcher
+from ui_snapshot import load_snapshot
+from metrics import metrics
 from logger import logger
 
+# Objectif de durée entre le lancement et le premier affichage de la bibliothèque (s)
+FIRST_PAINT_TARGET = 0.3
+
 def ensure_directory_structure():
     """Crée les dossiers requis s'ils n'existent pas."""
     # Vérifier si le dossier models existe
@@ -20,8 +34,13 @@ def main():
     # S'assurer que la structure de dossiers existe
     ensure_directory_structure()
     
-    # Créer l'instance de gestion des jeux
+    # Créer l'instance de gestion des jeux ; l'historique, les profils et le préchargement
+    # sont ouverts après le premier affichage
     game_manager = GameManager()
+    session_store = None
+    
+    # Mode jeu : le lanceur s'efface tant qu'un jeu tourne
+    game_mode = GameMode(game_manager)
     
     # Créer la fenêtre principale
     root = tk.Tk()
@@ -31,22 +50,70 @@ def main():
     if os.path.exists("assets/icon.ico"):
         root.iconbitmap("assets/icon.ico")
     
-    # Initialiser l'interface utilisateur
-    app = GameLauncherUI(root, scan_games_directory, game_manager)  # Utilisation correcte de la fonction
+    # Bibliothèques configurées (data/library.json)
+    roots = load_roots()
+    if not roots:
+        # Répertoire de jeux par défaut, tant qu'aucune bibliothèque n'a été ajoutée
+        jeux_path = r"C:\Users\User\OneDrive\Bureau\jeu"
+        if os.path.isdir(jeux_path):
+            roots = [LibraryRoot(jeux_path)]
+    
+    # Initialiser l'interface utilisateur ; index de scan et historique sont chargés après le premier affichage
+    app = GameLauncherUI(root, iter_library, game_manager, roots=roots, game_mode=game_mode)
+    
+    # Peindre la bibliothèque de la session précédente dès la première image
+    snapshot = load_snapshot(roots) if roots else None
+    if snapshot is not None:
+        app.show_snapshot(snapshot)
     
-    # Définir le répertoire de jeux par défaut
-    jeux_path = r"C:\Users\User\OneDrive\Bureau\jeu"
+    def finish_startup():
+        nonlocal session_store
+        # Historique des sessions de jeu (temps de jeu, ressources), profils de lancement
+        # (data/profiles.json) et fichiers lus au lancement (data/prefetch.json)
+        session_store = SessionStore()
+        game_manager.session_store = session_store
+        game_manager.profiles = ProfileStore()
+        game_manager.prefetcher = Prefetcher()
+        app.session_store = session_store
+        
+        # Charger l'index de scan persistant (rescans incrémentaux), puis réconcilier avec le disque
+        app.scan_index = ScanIndex()
+        if roots:
+            logger.info(f"Chargement des jeux depuis {len(roots)} bibliothèque(s)")
+            # Charger automatiquement les jeux des bibliothèques au démarrage
+            app.load_library()
+        else:
+            logger.warning("Aucune bibliothèque configurée. Veuillez sélectionner un répertoire manuellement.")
     
-    # Vérifier si le répertoire existe
-    if os.path.exists(jeux_path) and os.path.isdir(jeux_path):
-        logger.info(f"Chargement des jeux depuis {jeux_path}")
-        # Charger automatiquement les jeux de ce répertoire au démarrage
-        app.load_games(jeux_path)
-    else:
-        logger.warning(f"Le répertoire {jeux_path} n'existe pas. Veuillez sélectionner un répertoire manuellement.")
+    def on_first_paint(event):
+        app.canvas.unbind("<Expose>", binding)
+        # Les cartes sont dessinées par les tâches d'inactivité de Tk
+        root.update_idletasks()
+        elapsed = time.perf_counter() - START_TIME
+        metrics.record("startup.first_paint", elapsed)
+        logger.info(f"Premier affichage en {elapsed * 1000:.0f} ms "
+                    f"(objectif < {FIRST_PAINT_TARGET * 1000:.0f} ms, "
+                    f"{'instantané' if snapshot is not None else 'sans instantané'})")
+        root.after(0, finish_startup)
+    
+    binding = app.canvas.bind("<Expose>", on_first_paint)
+    
+    def on_close():
+        # Enregistrer la bibliothèque affichée pour le prochain démarrage
+        app.save_snapshot()
+        root.destroy()
+    
+    root.protocol("WM_DELETE_WINDOW", on_close)
     
     # Démarrer la boucle d'événements
     root.mainloop()
+    
+    # Fermer les jeux encore en cours, tous ensemble, avant d'enregistrer leurs sessions
+    if game_manager.running_games:
+        logger.info(f"Fermeture de {len(game_manager.running_games)} jeu(x) en cours")
+        game_manager.close_all()
+    if session_store is not None:
+        session_store.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
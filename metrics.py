@@ -0,0 +1,219 @@
+import os
+import json
+import time
+import atexit
+import threading
+import functools
+from collections import deque
+
+# Fichier d'export des mesures, à côté des journaux
+DEFAULT_METRICS_PATH = os.path.join("logs", "metrics.jsonl")
+
+# Nombre de durées conservées par mesure pour le calcul des percentiles
+WINDOW_SIZE = 1000
+
+# Nombre d'enregistrements accumulés avant écriture dans le fichier
+FLUSH_BATCH = 200
+
+
+class NullSpan:
+    """Span sans effet, utilisé quand l'instrumentation est désactivée."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+NULL_SPAN = NullSpan()
+
+
+class Span:
+    """Mesure la durée d'un bloc de code et l'enregistre à sa sortie."""
+
+    __slots__ = ("metrics", "name", "start")
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.metrics.record(self.name, time.perf_counter() - self.start, error=exc_type is not None)
+        return False
+
+
+class Stat:
+    """Statistiques cumulées d'une mesure."""
+
+    __slots__ = ("count", "errors", "total", "durations")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.durations = deque(maxlen=WINDOW_SIZE)
+
+
+class Metrics:
+    """
+    Instrumentation des chemins critiques : durées (spans), compteurs et erreurs.
+
+    Désactivée, chaque appel se réduit à un test de booléen. Activée, les mesures
+    sont agrégées en mémoire (p50/p95 sur une fenêtre glissante) et exportées par
+    lots dans un fichier JSON-lines.
+    """
+
+    def __init__(self):
+        """Initialise une instrumentation désactivée."""
+        self.enabled = False
+        self.export_path = None
+        self.lock = threading.Lock()
+        self.stats = {}
+        self.counters = {}
+        self.buffer = []
+
+    def enable(self, export_path=DEFAULT_METRICS_PATH):
+        """
+        Active l'instrumentation.
+
+        Args:
+            export_path (str, optional): Fichier JSON-lines d'export. None pour ne rien écrire.
+        """
+        self.export_path = export_path
+        self.enabled = True
+
+    def disable(self):
+        """Désactive l'instrumentation après avoir écrit les mesures en attente."""
+        self.flush()
+        self.enabled = False
+
+    def span(self, name):
+        """
+        Retourne un gestionnaire de contexte mesurant la durée d'un bloc.
+
+        Args:
+            name (str): Le nom de la mesure.
+        """
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name)
+
+    def timed(self, name):
+        """Décorateur mesurant la durée de chaque appel de la fonction décorée."""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with Span(self, name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def record(self, name, duration, error=False):
+        """
+        Enregistre une durée.
+
+        Args:
+            name (str): Le nom de la mesure.
+            duration (float): La durée en secondes.
+            error (bool): L'opération mesurée a échoué.
+        """
+        if not self.enabled:
+            return
+        with self.lock:
+            stat = self.stats.get(name)
+            if stat is None:
+                stat = self.stats[name] = Stat()
+            stat.count += 1
+            stat.total += duration
+            stat.durations.append(duration)
+            if error:
+                stat.errors += 1
+            if self.export_path:
+                self.buffer.append({"ts": time.time(), "name": name, "ms": round(duration * 1000, 3),
+                                    "error": error})
+                should_flush = len(self.buffer) >= FLUSH_BATCH
+            else:
+                should_flush = False
+        if should_flush:
+            self.flush()
+
+    def error(self, name):
+        """Compte une erreur pour une mesure, sans durée associée."""
+        if not self.enabled:
+            return
+        with self.lock:
+            stat = self.stats.get(name)
+            if stat is None:
+                stat = self.stats[name] = Stat()
+            stat.errors += 1
+
+    def count(self, name, value=1):
+        """Incrémente un compteur."""
+        if not self.enabled:
+            return
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def summary(self):
+        """
+        Retourne un résumé des mesures.
+
+        Returns:
+            dict: Par nom de mesure : count, errors, p50_ms, p95_ms, max_ms, total_ms ;
+                et les compteurs sous la clé "counters".
+        """
+        with self.lock:
+            result = {}
+            for name, stat in self.stats.items():
+                durations = sorted(stat.durations)
+                result[name] = {
+                    "count": stat.count,
+                    "errors": stat.errors,
+                    "p50_ms": percentile(durations, 50) * 1000,
+                    "p95_ms": percentile(durations, 95) * 1000,
+                    "max_ms": (durations[-1] if durations else 0.0) * 1000,
+                    "total_ms": stat.total * 1000,
+                }
+            result["counters"] = dict(self.counters)
+        return result
+
+    def flush(self):
+        """Écrit les mesures en attente dans le fichier d'export."""
+        with self.lock:
+            records, self.buffer = self.buffer, []
+            export_path = self.export_path
+        if not records or not export_path:
+            return
+        try:
+            export_dir = os.path.dirname(export_path)
+            if export_dir:
+                os.makedirs(export_dir, exist_ok=True)
+            with open(export_path, "a", encoding="utf-8") as f:
+                f.write("".join(json.dumps(record) + "\n" for record in records))
+        except OSError:
+            pass
+
+
+def percentile(sorted_values, p):
+    """Retourne le percentile p (0-100) d'une liste triée, 0 si elle est vide."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(p / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+# Créer une instance globale de l'instrumentation
+metrics = Metrics()
+if os.environ.get("LAUNCHER_METRICS"):
+    metrics.enable()
+
+# Écrire les dernières mesures à la fermeture du programme
+atexit.register(metrics.flush)
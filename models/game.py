@@ -1,5 +1,72 @@
+import os
+from enum import Enum
+
+
+def game_key(path):
+    """
+    Retourne l'identité stable d'un jeu : le chemin absolu normalisé de son fichier.
+    
+    Deux jeux de même nom dans des dossiers différents ont des identités
+    distinctes, et un même fichier garde la même identité d'un scan à l'autre.
+    
+    Args:
+        path (str): Le chemin du fichier du jeu.
+    
+    Returns:
+        str: L'identité du jeu.
+    """
+    return os.path.normcase(os.path.abspath(path))
+
+
+class LaunchType(Enum):
+    """Manière de lancer un jeu, déduite de l'extension de son fichier."""
+    
+    EXECUTABLE = "exe"
+    SHORTCUT = "lnk"
+    SCRIPT = "script"
+    
+    @classmethod
+    def from_path(cls, path):
+        """
+        Déduit le type de lancement d'un chemin.
+        
+        Args:
+            path (str): Le chemin du fichier du jeu.
+        
+        Returns:
+            LaunchType: SHORTCUT pour un .lnk, SCRIPT pour un .bat ou .cmd, EXECUTABLE sinon.
+        """
+        extension = os.path.splitext(path)[1].lower()
+        if extension == ".lnk":
+            return cls.SHORTCUT
+        if extension in (".bat", ".cmd"):
+            return cls.SCRIPT
+        return cls.EXECUTABLE
+
+
+class GameState:
+    """État d'exécution d'un jeu, séparé de sa description."""
+    
+    __slots__ = ("process", "is_running")
+    
+    def __init__(self):
+        """Initialise l'état d'un jeu arrêté."""
+        self.process = None
+        self.is_running = False
+
+
 class Game:
-    """Classe représentant un jeu."""
+    """
+    Classe représentant un jeu.
+    
+    La description (nom, chemins, type de lancement) est fixée à la création ;
+    l'état d'exécution est porté par un objet GameState distinct, créé au premier
+    lancement. Le dossier parent et les clés de tri et de recherche sont calculés
+    à la première utilisation puis conservés.
+    """
+    
+    __slots__ = ("name", "path", "image_path", "launch_type", "_key", "_directory", "_state",
+                 "_sort_key", "search_keys")
     
     def __init__(self, name, path, image_path=None):
         """
@@ -13,8 +80,117 @@ class Game:
         self.name = name
         self.path = path
         self.image_path = image_path
-        self.process = None
-        self.is_running = False
+        self.launch_type = LaunchType.from_path(path)
+        self._key = None
+        self._directory = None
+        self._state = None
+        self._sort_key = None
+        self.search_keys = None  # SearchEntry, renseignée par SearchIndex
+    
+    @property
+    def key(self):
+        """L'identité stable du jeu (voir game_key)."""
+        key = self._key
+        if key is None:
+            key = self._key = game_key(self.path)
+        return key
+    
+    @property
+    def directory(self):
+        """Le dossier contenant le fichier du jeu (répertoire de travail au lancement)."""
+        directory = self._directory
+        if directory is None:
+            directory = self._directory = os.path.dirname(self.path)
+        return directory
+    
+    @property
+    def state(self):
+        """L'état d'exécution du jeu."""
+        state = self._state
+        if state is None:
+            state = self._state = GameState()
+        return state
+    
+    @property
+    def sort_key(self):
+        """Clé de tri par nom, insensible à la casse."""
+        key = self._sort_key
+        if key is None:
+            key = self._sort_key = self.name.casefold()
+        return key
+    
+    @property
+    def process(self):
+        """Le processus du jeu en cours d'exécution, ou None."""
+        state = self._state
+        return state.process if state is not None else None
+    
+    @process.setter
+    def process(self, value):
+        self.state.process = value
+    
+    @property
+    def is_running(self):
+        """Indique si le jeu est en cours d'exécution."""
+        state = self._state
+        return state.is_running if state is not None else False
+    
+    @is_running.setter
+    def is_running(self, value):
+        self.state.is_running = value
+    
+    def update_from(self, other):
+        """
+        Met à jour la description du jeu avec celle d'un nouveau scan du même fichier.
+        
+        L'objet et son état d'exécution sont conservés.
+        
+        Args:
+            other (Game): Le jeu trouvé par le scan, de même identité.
+        
+        Returns:
+            bool: True si la description a changé.
+        """
+        changed = False
+        if other.name != self.name:
+            self.name = other.name
+            self._sort_key = None
+            self.search_keys = None
+            changed = True
+        if other.image_path != self.image_path:
+            self.image_path = other.image_path
+            changed = True
+        return changed
+    
+    def to_tuple(self):
+        """
+        Sérialise la description du jeu (sans son état d'exécution).
+        
+        Returns:
+            tuple: (nom, chemin, chemin de l'image), utilisable par from_tuple.
+        """
+        return (self.name, self.path, self.image_path)
+    
+    @classmethod
+    def from_tuple(cls, data):
+        """Recrée un jeu à partir du résultat de to_tuple (ou d'une liste équivalente, lue en JSON)."""
+        return cls(*data)
+    
+    def to_dict(self):
+        """
+        Sérialise le jeu et son état en dictionnaire compatible JSON.
+        
+        Returns:
+            dict: name, path, image_path, launch_type, is_running et pid.
+        """
+        process = self.process
+        return {"name": self.name, "path": self.path, "image_path": self.image_path,
+                "launch_type": self.launch_type.value, "is_running": self.is_running,
+                "pid": process.pid if process is not None else None}
+    
+    def __reduce__(self):
+        """Sérialisation pickle (IPC) : seule la description est transmise, pas le processus."""
+        return (self.__class__.from_tuple, (self.to_tuple(),))
     
     def __str__(self):
         """Représentation textuelle de l'objet Game."""
@@ -22,4 +198,4 @@ class Game:
     
     def __repr__(self):
         """Représentation de l'objet pour le débogage."""
-        return f"Game(name='{self.name}', path='{self.path}', image_path='{self.image_path}')"
\ No newline at end of file
+        return f"Game(name='{self.name}', path='{self.path}', image_path='{self.image_path}')"
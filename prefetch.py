@@ -0,0 +1,338 @@
+import os
+import json
+import time
+import queue
+import threading
+from models.game import LaunchType
+from shortcuts import shortcut_cache
+from background import background, lower_thread_priority
+from logger import logger
+from metrics import metrics
+
+# Emplacement par défaut des fichiers enregistrés au lancement des jeux
+DEFAULT_PREFETCH_PATH = os.path.join("data", "prefetch.json")
+
+# Volume maximal lu par préchargement (octets)
+DEFAULT_BUDGET = 256 * 1024 * 1024
+
+# Part maximale de la mémoire disponible occupée par un préchargement
+MEMORY_BUDGET_RATIO = 0.25
+
+# Enregistrement des fichiers lus au début d'une session
+RECORD_WINDOW = 5.0  # Durée d'observation après la détection du jeu prêt (s)
+RECORD_INTERVAL = 0.25  # Intervalle entre deux relevés des fichiers ouverts (s)
+MAX_FILES = 256  # Nombre maximal de fichiers retenus par jeu
+
+# Délai pendant lequel un jeu déjà préchargé n'est pas relu (s)
+REWARM_DELAY = 300.0
+
+# Taille des blocs lus lorsque posix_fadvise n'est pas disponible
+READ_BLOCK = 1024 * 1024
+
+# Heuristique sans enregistrement : binaires et archives de données d'abord, puis les plus gros fichiers
+PRIORITY_EXTENSIONS = (".exe", ".dll", ".so", ".dylib", ".pak", ".pck", ".bin", ".dat", ".assets",
+                       ".resource", ".bank", ".arc")
+HEURISTIC_DEPTH = 2  # Profondeur de parcours du dossier du jeu
+HEURISTIC_MAX_ENTRIES = 5000  # Nombre maximal d'entrées examinées
+
+
+def warm_file(path, limit):
+    """
+    Charge le début d'un fichier dans le cache de pages du système.
+
+    Sous POSIX, le noyau est prié de lire le fichier en avance (posix_fadvise
+    WILLNEED) sans copie vers le processus ; ailleurs, le fichier est lu
+    séquentiellement et les données sont ignorées.
+
+    Args:
+        path (str): Le fichier à précharger.
+        limit (int): Nombre maximal d'octets à précharger.
+
+    Returns:
+        int: Le nombre d'octets préchargés.
+
+    Raises:
+        OSError: Si le fichier est illisible.
+    """
+    with open(path, "rb", buffering=0) as f:
+        size = min(os.fstat(f.fileno()).st_size, limit)
+        if size <= 0:
+            return 0
+        if hasattr(os, "posix_fadvise"):
+            os.posix_fadvise(f.fileno(), 0, size, os.POSIX_FADV_WILLNEED)
+            return size
+        buffer = bytearray(READ_BLOCK)
+        done = 0
+        while done < size:
+            read = f.readinto(buffer)
+            if not read:
+                break
+            done += read
+        return done
+
+
+def game_directory(game):
+    """Retourne le dossier contenant les fichiers du jeu (celui de la cible pour un raccourci)."""
+    if game.launch_type is LaunchType.SHORTCUT:
+        link = shortcut_cache.get(game.path)
+        if link is not None and link.target and os.path.isfile(link.target):
+            return os.path.dirname(os.path.abspath(link.target))
+    return os.path.abspath(game.directory)
+
+
+def is_inside(path, directory):
+    """Indique si un chemin se trouve sous un dossier."""
+    return os.path.normcase(path).startswith(os.path.join(os.path.normcase(directory), ""))
+
+
+class Prefetcher:
+    """
+    Préchargement des fichiers d'un jeu dans le cache de pages avant son lancement.
+
+    Les fichiers lus par un jeu pendant les premières secondes de sa session
+    (exécutables, bibliothèques chargées, fichiers ouverts) sont enregistrés ;
+    à défaut, une heuristique retient ses binaires et ses plus gros fichiers de
+    données. Au lancement suivant, ou au survol du jeu dans l'interface, ces
+    fichiers sont préchargés par un thread dédié, dans la limite d'un budget d'E/S
+    qui empêche d'évincer du cache le reste du système.
+    """
+
+    def __init__(self, config_path=DEFAULT_PREFETCH_PATH, budget=DEFAULT_BUDGET):
+        """
+        Initialise le préchargeur et charge les enregistrements depuis le disque s'ils existent.
+
+        Args:
+            config_path (str): Le fichier des enregistrements, ou None pour ne rien persister.
+            budget (int): Volume maximal préchargé pour un jeu, en octets.
+        """
+        self.config_path = config_path
+        self.budget = budget
+        self.lock = threading.Lock()
+        self.recordings = {}  # Identité du jeu -> chemins lus au lancement, dans l'ordre
+        self.warmed = {}  # Identité du jeu -> date (time.monotonic) du dernier préchargement
+        self.recording = set()  # Jeux en cours d'enregistrement
+        self.tasks = queue.Queue()
+        self.thread = None
+        self.load()
+
+    def load(self):
+        """Charge les enregistrements. Un fichier absent ou invalide est ignoré."""
+        if not self.config_path or not os.path.exists(self.config_path):
+            return
+        try:
+            with open(self.config_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            recordings = {key: list(paths) for key, paths in data.get("games", {}).items()}
+        except (OSError, ValueError, AttributeError, TypeError) as e:
+            logger.warning(f"Impossible de charger les fichiers de préchargement {self.config_path}: {e}")
+            return
+        with self.lock:
+            self.recordings = recordings
+
+    def save(self):
+        """Enregistre les fichiers lus par chaque jeu de manière atomique."""
+        if not self.config_path:
+            return
+        with self.lock:
+            data = {"games": dict(self.recordings)}
+        try:
+            config_dir = os.path.dirname(self.config_path)
+            if config_dir and not os.path.exists(config_dir):
+                os.makedirs(config_dir)
+            tmp_path = self.config_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, separators=(",", ":"), ensure_ascii=False)
+            os.replace(tmp_path, self.config_path)
+        except OSError as e:
+            logger.warning(f"Impossible d'enregistrer les fichiers de préchargement {self.config_path}: {e}")
+
+    def effective_budget(self):
+        """Retourne le budget d'un préchargement, réduit si la mémoire disponible est faible."""
+        try:
+            import psutil
+            available = psutil.virtual_memory().available
+        except (ImportError, OSError):
+            return self.budget
+        return min(self.budget, int(available * MEMORY_BUDGET_RATIO))
+
+    def files_for(self, game):
+        """
+        Retourne les fichiers à précharger pour un jeu.
+
+        Returns:
+            list: Les fichiers enregistrés lors d'un lancement précédent, ou ceux
+                retenus par l'heuristique, dans l'ordre de préchargement.
+        """
+        with self.lock:
+            recorded = self.recordings.get(game.key)
+        if recorded:
+            return recorded
+        return self.heuristic_files(game)
+
+    def heuristic_files(self, game):
+        """Retient le fichier lancé, puis les binaires et les plus gros fichiers du dossier du jeu."""
+        files = []
+        pending = [(game_directory(game), 0)]
+        examined = 0
+        while pending and examined < HEURISTIC_MAX_ENTRIES:
+            directory, depth = pending.pop()
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        examined += 1
+                        if examined > HEURISTIC_MAX_ENTRIES:
+                            break
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                if depth < HEURISTIC_DEPTH:
+                                    pending.append((entry.path, depth + 1))
+                            elif entry.is_file():
+                                files.append((entry.path, entry.stat().st_size))
+                        except OSError:
+                            continue
+            except OSError:
+                continue
+
+        def rank(item):
+            path, size = item
+            return (os.path.splitext(path)[1].lower() not in PRIORITY_EXTENSIONS, -size)
+
+        files.sort(key=rank)
+        launched = os.path.abspath(game.path)
+        return [launched] + [path for path, _ in files[:MAX_FILES] if path != launched]
+
+    def warm(self, game):
+        """
+        Précharge les fichiers d'un jeu dans la limite du budget (appel bloquant).
+
+        Returns:
+            tuple: (nombre de fichiers, nombre d'octets) préchargés.
+        """
+        start = time.perf_counter()
+        budget = self.effective_budget()
+        warmed_bytes = 0
+        count = 0
+        for path in self.files_for(game):
+            if warmed_bytes >= budget:
+                break
+            try:
+                warmed_bytes += warm_file(path, budget - warmed_bytes)
+            except OSError:
+                continue
+            count += 1
+        elapsed = time.perf_counter() - start
+        metrics.record("prefetch", elapsed)
+        metrics.count("prefetch.bytes", warmed_bytes)
+        logger.debug(f"Préchargement de {game.name}: {count} fichiers, "
+                     f"{warmed_bytes / (1024 * 1024):.1f} Mo en {elapsed * 1000:.0f} ms")
+        return count, warmed_bytes
+
+    def prefetch(self, game, background_work=False):
+        """
+        Demande le préchargement d'un jeu, exécuté par le thread du préchargeur.
+
+        Args:
+            game (Game): Le jeu à précharger.
+            background_work (bool): Préchargement spéculatif (survol dans l'interface) :
+                il est ignoré pendant le mode jeu.
+
+        Returns:
+            bool: True si les fichiers du jeu sont préchargés ou l'ont été récemment.
+        """
+        if background_work and background.paused:
+            return False
+        now = time.monotonic()
+        with self.lock:
+            last = self.warmed.get(game.key)
+            if last is not None and now - last < REWARM_DELAY:
+                return True
+            self.warmed[game.key] = now
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.work, daemon=True, name="prefetch")
+                self.thread.start()
+        self.tasks.put(game)
+        return True
+
+    def work(self):
+        """Boucle du thread du préchargeur : un seul préchargement à la fois."""
+        lower_thread_priority()
+        while True:
+            game = self.tasks.get()
+            try:
+                self.warm(game)
+            except Exception as e:
+                logger.error(f"Erreur lors du préchargement de {game.name}: {e}", exc_info=True)
+
+    def record(self, game, process):
+        """
+        Enregistre les fichiers lus par un jeu qui vient de démarrer, s'il n'a pas encore d'enregistrement.
+
+        L'observation a lieu dans un thread dédié pendant RECORD_WINDOW secondes.
+
+        Args:
+            game (Game): Le jeu lancé.
+            process: Le processus du jeu (subprocess.Popen ou psutil.Process).
+        """
+        with self.lock:
+            if game.key in self.recordings or game.key in self.recording:
+                return
+            self.recording.add(game.key)
+        threading.Thread(target=self.record_session, args=(game, process), daemon=True,
+                         name=f"prefetch-record-{process.pid}").start()
+
+    def record_session(self, game, process):
+        """
+        Relève les fichiers ouverts et les bibliothèques chargées par l'arbre de processus du jeu.
+
+        Seuls les fichiers du dossier du jeu sont retenus : les bibliothèques du
+        système (ou l'interpréteur d'un script) sont déjà en cache.
+        """
+        import psutil
+        lower_thread_priority()
+        directory = game_directory(game)
+        seen = {os.path.abspath(game.path): None}  # Chemins dans l'ordre de première observation
+        deadline = time.monotonic() + RECORD_WINDOW
+        try:
+            root = psutil.Process(process.pid)
+            while True:
+                try:
+                    tree = [root] + root.children(recursive=True)
+                except psutil.Error:
+                    break
+                last = time.monotonic() >= deadline
+                for proc in tree:
+                    try:
+                        exe = proc.exe()
+                        paths = [f.path for f in proc.open_files()]
+                        if last:
+                            # Les bibliothèques restent projetées en mémoire : un relevé final suffit
+                            paths.extend(m.path for m in proc.memory_maps())
+                    except (psutil.Error, OSError):
+                        continue
+                    if exe:
+                        seen.setdefault(exe, None)
+                    for path in paths:
+                        seen.setdefault(path, None)
+                if last:
+                    break
+                time.sleep(RECORD_INTERVAL)
+        except psutil.Error:
+            pass
+        finally:
+            with self.lock:
+                self.recording.discard(game.key)
+
+        files = [path for path in seen if is_inside(path, directory) and os.path.isfile(path)][:MAX_FILES]
+        if not files:
+            return
+        with self.lock:
+            self.recordings[game.key] = files
+        logger.debug(f"Préchargement de {game.name}: {len(files)} fichiers enregistrés")
+        self.save()
+
+    def forget(self, key):
+        """Oublie l'enregistrement d'un jeu (par identité), par exemple après une mise à jour."""
+        with self.lock:
+            self.recordings.pop(key, None)
+            self.warmed.pop(key, None)
+        self.save()
@@ -0,0 +1,262 @@
+import os
+import sys
+import json
+import threading
+from background import background
+from logger import logger
+
+# Emplacement par défaut des profils de lancement, à côté de la liste des bibliothèques
+DEFAULT_PROFILES_PATH = os.path.join("data", "profiles.json")
+
+# Priorités CPU : valeur nice sous POSIX, classe de priorité sous Windows
+PRIORITIES = ("idle", "below_normal", "normal", "above_normal", "high")
+NICE_VALUES = {"idle": 19, "below_normal": 10, "normal": 0, "above_normal": -5, "high": -10}
+
+# Priorités d'E/S
+IO_PRIORITIES = ("idle", "low", "normal", "high")
+
+# Priorité du processus du lanceur pendant le mode jeu (Windows)
+GAME_MODE_PRIORITY = "below_normal"
+
+
+def set_priority(process, priority):
+    """Applique une priorité CPU (voir PRIORITIES) à un psutil.Process."""
+    # Import différé : psutil n'est chargé qu'au premier lancement, pas au démarrage du lanceur
+    import psutil
+    if sys.platform == "win32":
+        process.nice({
+            "idle": psutil.IDLE_PRIORITY_CLASS,
+            "below_normal": psutil.BELOW_NORMAL_PRIORITY_CLASS,
+            "normal": psutil.NORMAL_PRIORITY_CLASS,
+            "above_normal": psutil.ABOVE_NORMAL_PRIORITY_CLASS,
+            "high": psutil.HIGH_PRIORITY_CLASS,
+        }[priority])
+    else:
+        process.nice(NICE_VALUES[priority])
+
+
+def set_io_priority(process, priority):
+    """Applique une priorité d'E/S (voir IO_PRIORITIES) à un psutil.Process, si la plateforme le permet."""
+    import psutil
+    if sys.platform == "win32":
+        process.ionice({
+            "idle": psutil.IOPRIO_VERYLOW,
+            "low": psutil.IOPRIO_LOW,
+            "normal": psutil.IOPRIO_NORMAL,
+            "high": psutil.IOPRIO_HIGH,
+        }[priority])
+    elif hasattr(psutil, "IOPRIO_CLASS_IDLE"):
+        if priority == "idle":
+            process.ionice(psutil.IOPRIO_CLASS_IDLE)
+        else:
+            process.ionice(psutil.IOPRIO_CLASS_BE, {"low": 7, "normal": 4, "high": 0}[priority])
+
+
+class LaunchProfile:
+    """Politique de ressources appliquée à l'arbre de processus d'un jeu."""
+
+    __slots__ = ("priority", "io_priority", "affinity", "env")
+
+    def __init__(self, priority=None, io_priority=None, affinity=None, env=None):
+        """
+        Initialise un profil ; les réglages à None sont laissés par défaut.
+
+        Args:
+            priority (str, optional): Priorité CPU, parmi PRIORITIES.
+            io_priority (str, optional): Priorité d'E/S, parmi IO_PRIORITIES.
+            affinity (list, optional): Les numéros des CPU autorisés.
+            env (dict, optional): Variables d'environnement ajoutées ou remplacées.
+        """
+        if priority is not None and priority not in PRIORITIES:
+            raise ValueError(f"Priorité inconnue: {priority}")
+        if io_priority is not None and io_priority not in IO_PRIORITIES:
+            raise ValueError(f"Priorité d'E/S inconnue: {io_priority}")
+        self.priority = priority
+        self.io_priority = io_priority
+        self.affinity = list(affinity) if affinity else None
+        self.env = dict(env or {})
+
+    def environment(self):
+        """Retourne l'environnement du jeu, ou None s'il n'est pas modifié."""
+        if not self.env:
+            return None
+        environment = dict(os.environ)
+        environment.update(self.env)
+        return environment
+
+    def apply(self, processes):
+        """
+        Applique le profil à des processus. Les réglages refusés sont ignorés.
+
+        Args:
+            processes (list): Les psutil.Process de l'arbre du jeu.
+        """
+        import psutil
+        for process in processes:
+            for setting, value, setter in (
+                    ("priorité", self.priority, set_priority),
+                    ("priorité d'E/S", self.io_priority, set_io_priority),
+                    ("affinité", self.affinity, lambda p, cpus: p.cpu_affinity(cpus))):
+                if value is None:
+                    continue
+                try:
+                    setter(process, value)
+                except (psutil.NoSuchProcess, psutil.ZombieProcess):
+                    break
+                except (psutil.Error, AttributeError, ValueError, OSError) as e:
+                    # Privilèges insuffisants (priorité haute), fonction absente de la plateforme...
+                    logger.warning(f"Impossible d'appliquer la {setting} {value} au processus {process.pid}: {e}")
+
+    def to_dict(self):
+        """Sérialise le profil en dictionnaire compatible JSON (réglages définis uniquement)."""
+        data = {"priority": self.priority, "io_priority": self.io_priority,
+                "affinity": self.affinity, "env": self.env or None}
+        return {name: value for name, value in data.items() if value is not None}
+
+    @classmethod
+    def from_dict(cls, data):
+        """Recrée un profil à partir du résultat de to_dict."""
+        return cls(data.get("priority"), data.get("io_priority"), data.get("affinity"), data.get("env"))
+
+    def __repr__(self):
+        """Représentation de l'objet pour le débogage."""
+        return f"LaunchProfile({self.to_dict()})"
+
+
+class ProfileStore:
+    """Profils de lancement par jeu, indexés par identité (game.key) et persistés en JSON."""
+
+    def __init__(self, config_path=DEFAULT_PROFILES_PATH):
+        """
+        Initialise le stockage et charge les profils depuis le disque s'ils existent.
+
+        Args:
+            config_path (str): Le fichier des profils.
+        """
+        self.config_path = config_path
+        self.lock = threading.Lock()
+        self.profiles = {}  # Identité du jeu -> LaunchProfile
+        self.load()
+
+    def load(self):
+        """Charge les profils. Un fichier absent ou invalide est ignoré."""
+        if not os.path.exists(self.config_path):
+            return
+        try:
+            with open(self.config_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            profiles = {key: LaunchProfile.from_dict(profile) for key, profile in data.get("games", {}).items()}
+        except (OSError, ValueError, AttributeError) as e:
+            logger.warning(f"Impossible de charger les profils de lancement {self.config_path}: {e}")
+            return
+        with self.lock:
+            self.profiles = profiles
+
+    def save(self):
+        """Enregistre les profils de manière atomique."""
+        with self.lock:
+            data = {"games": {key: profile.to_dict() for key, profile in self.profiles.items()}}
+        try:
+            config_dir = os.path.dirname(self.config_path)
+            if config_dir and not os.path.exists(config_dir):
+                os.makedirs(config_dir)
+            tmp_path = self.config_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=2, ensure_ascii=False)
+            os.replace(tmp_path, self.config_path)
+        except OSError as e:
+            logger.warning(f"Impossible d'enregistrer les profils de lancement {self.config_path}: {e}")
+
+    def get(self, key):
+        """Retourne le profil d'un jeu (par identité), ou None."""
+        with self.lock:
+            return self.profiles.get(key)
+
+    def set(self, key, profile):
+        """Définit le profil d'un jeu, ou le supprime si profile vaut None, puis enregistre."""
+        with self.lock:
+            if profile is None:
+                self.profiles.pop(key, None)
+            else:
+                self.profiles[key] = profile
+        self.save()
+
+
+class GameMode:
+    """
+    Mode jeu : tant qu'un jeu tourne, le lanceur s'efface.
+
+    Les travaux d'arrière-plan (scan, miniatures, surveillance des bibliothèques)
+    sont suspendus via la barrière background, puis repris à la fermeture du
+    dernier jeu. Sous Windows, la classe de priorité du lanceur est abaissée, puis
+    rétablie ; les jeux sont créés avec NORMAL_PRIORITY_CLASS et n'en héritent pas.
+    Sous Linux, où la priorité est propre à chaque thread et ne peut pas être
+    remontée sans privilèges, seuls les threads d'arrière-plan tournent en
+    permanence à priorité réduite (voir background.lower_thread_priority).
+    """
+
+    def __init__(self, game_manager, enabled=True):
+        """
+        Initialise le mode jeu et l'abonne aux événements du gestionnaire de jeux.
+
+        Args:
+            game_manager (GameManager): Le gestionnaire des jeux lancés.
+            enabled (bool): Activer le mode jeu.
+        """
+        self.game_manager = game_manager
+        self.enabled = enabled
+        self.active = False
+        self.lock = threading.Lock()
+        self.saved_priority = None  # Classe de priorité du lanceur avant le mode jeu (Windows)
+        game_manager.add_listener(self.on_game_event)
+
+    def on_game_event(self, event, game):
+        """Réévalue le mode jeu au lancement ou à la fin d'un jeu."""
+        from game_manager import EVENT_STARTED, EVENT_EXITED
+        if event in (EVENT_STARTED, EVENT_EXITED):
+            self.update()
+
+    def set_enabled(self, enabled):
+        """Active ou désactive le mode jeu, avec effet immédiat."""
+        self.enabled = enabled
+        self.update()
+
+    def update(self):
+        """Entre en mode jeu ou en sort selon les jeux en cours."""
+        with self.lock:
+            active = self.enabled and bool(self.game_manager.running_games)
+            if active == self.active:
+                return
+            self.active = active
+            if active:
+                self.lower_priority()
+                background.pause()
+                logger.info("Mode jeu activé : travaux d'arrière-plan suspendus")
+            else:
+                self.restore_priority()
+                logger.info("Mode jeu désactivé : reprise des travaux d'arrière-plan")
+        if not active:
+            background.resume()
+
+    def lower_priority(self):
+        """Abaisse la classe de priorité du lanceur sous Windows (sous verrou)."""
+        if sys.platform != "win32":
+            return
+        import psutil
+        process = psutil.Process()
+        try:
+            self.saved_priority = process.nice()
+            set_priority(process, GAME_MODE_PRIORITY)
+        except (psutil.Error, OSError) as e:
+            logger.debug(f"Impossible d'abaisser la priorité du lanceur: {e}")
+
+    def restore_priority(self):
+        """Rétablit la classe de priorité du lanceur (sous verrou)."""
+        if self.saved_priority is None:
+            return
+        priority, self.saved_priority = self.saved_priority, None
+        import psutil
+        try:
+            psutil.Process().nice(priority)
+        except (psutil.Error, OSError) as e:
+            logger.debug(f"Impossible de rétablir la priorité du lanceur: {e}")
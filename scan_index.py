@@ -0,0 +1,219 @@
+import os
+import json
+import threading
+from models.game import Game
+from logger import logger
+
+# Emplacement par défaut de l'index, à côté du dossier logs/
+DEFAULT_INDEX_PATH = os.path.join("cache", "scan_index.json")
+
+
+class ScanIndex:
+    """
+    Index persistant des jeux découverts, utilisé pour les rescans incrémentaux.
+
+    Pour chaque répertoire parcouru, l'index conserve son mtime et son inode,
+    la liste de ses sous-dossiers et les jeux qu'il contient. Lors d'un rescan,
+    un répertoire dont le mtime n'a pas changé n'est pas relu.
+    """
+
+    VERSION = 1
+
+    def __init__(self, index_path=DEFAULT_INDEX_PATH):
+        """
+        Initialise l'index et charge son contenu depuis le disque s'il existe.
+
+        Args:
+            index_path (str): Le fichier dans lequel l'index est stocké.
+        """
+        self.index_path = index_path
+        self.lock = threading.RLock()
+        # Options de scan utilisées pour chaque racine
+        self.roots = {}
+        # Enregistrements par répertoire
+        self.directories = {}
+        self.dirty = False
+        self.load()
+
+    def load(self):
+        """Charge l'index depuis le disque. Un index absent ou invalide est ignoré."""
+        if not os.path.exists(self.index_path):
+            return
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != self.VERSION:
+                logger.info("Version de l'index de scan différente, il sera reconstruit.")
+                return
+            with self.lock:
+                self.roots = data.get("roots", {})
+                self.directories = data.get("directories", {})
+            logger.debug(f"Index de scan chargé: {len(self.directories)} répertoires")
+        except (OSError, ValueError) as e:
+            logger.warning(f"Impossible de charger l'index de scan {self.index_path}: {e}")
+
+    def save(self):
+        """Enregistre l'index sur le disque de manière atomique s'il a été modifié."""
+        with self.lock:
+            if not self.dirty:
+                return
+            data = {
+                "version": self.VERSION,
+                "roots": self.roots,
+                "directories": self.directories,
+            }
+            self.dirty = False
+
+        try:
+            index_dir = os.path.dirname(self.index_path)
+            if index_dir and not os.path.exists(index_dir):
+                os.makedirs(index_dir)
+            tmp_path = self.index_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, separators=(",", ":"))
+            os.replace(tmp_path, self.index_path)
+        except OSError as e:
+            logger.warning(f"Impossible d'enregistrer l'index de scan {self.index_path}: {e}")
+
+    def begin_scan(self, root, options):
+        """
+        Prépare un scan de la racine donnée.
+
+        Args:
+            root (str): Le répertoire racine scanné.
+            options (dict): Les options de scan (profondeur, exclusions...).
+
+        Returns:
+            bool: True si les enregistrements existants peuvent être réutilisés.
+        """
+        root = os.path.abspath(root)
+        with self.lock:
+            reusable = self.roots.get(root) == options
+            if not reusable:
+                self.roots[root] = options
+                self.dirty = True
+            return reusable
+
+    def lookup(self, path, stat):
+        """
+        Retourne l'enregistrement d'un répertoire s'il est encore à jour.
+
+        Le répertoire est considéré à jour si son mtime et son inode n'ont pas
+        changé, ainsi que ceux de son sous-dossier "images" le cas échéant.
+
+        Args:
+            path (str): Le chemin du répertoire.
+            stat (os.stat_result): Le stat courant du répertoire.
+
+        Returns:
+            dict: L'enregistrement, ou None s'il faut relire le répertoire.
+        """
+        with self.lock:
+            record = self.directories.get(os.path.abspath(path))
+        if record is None:
+            return None
+        if record["mtime"] != stat.st_mtime_ns or record["inode"] != stat.st_ino:
+            return None
+
+        images_dir = record.get("images_dir")
+        if images_dir is not None:
+            try:
+                images_mtime = os.stat(os.path.join(path, images_dir)).st_mtime_ns
+            except OSError:
+                return None
+            if images_mtime != record["images_mtime"]:
+                return None
+        return record
+
+    def store(self, path, stat, subdirs, games, images_dir=None, images_mtime=None):
+        """
+        Enregistre le contenu d'un répertoire qui vient d'être lu.
+
+        Args:
+            path (str): Le chemin du répertoire.
+            stat (os.stat_result): Le stat du répertoire au moment de la lecture.
+            subdirs (list): Les sous-dossiers sous forme de (nom, est_un_lien).
+            games (list): Les objets Game trouvés dans ce répertoire.
+            images_dir (str, optional): Le nom du sous-dossier "images" s'il existe.
+            images_mtime (int, optional): Le mtime de ce sous-dossier.
+        """
+        record = {
+            "mtime": stat.st_mtime_ns,
+            "inode": stat.st_ino,
+            "subdirs": [[name, is_link] for name, is_link in subdirs],
+            "games": [game.to_tuple() for game in games],
+            "images_dir": images_dir,
+            "images_mtime": images_mtime,
+        }
+        with self.lock:
+            self.directories[os.path.abspath(path)] = record
+            self.dirty = True
+
+    def prune(self, root, visited):
+        """
+        Supprime les répertoires de la racine qui n'ont pas été visités lors du dernier scan.
+
+        Args:
+            root (str): Le répertoire racine scanné.
+            visited (set): Les chemins absolus des répertoires visités.
+        """
+        root = os.path.abspath(root)
+        prefix = os.path.join(root, "")
+        with self.lock:
+            stale = [
+                path for path in self.directories
+                if (path == root or path.startswith(prefix)) and path not in visited
+            ]
+            for path in stale:
+                del self.directories[path]
+            if stale:
+                self.dirty = True
+        if stale:
+            logger.debug(f"{len(stale)} répertoires supprimés de l'index de scan")
+
+    def prune_outside(self, root, subtrees):
+        """
+        Supprime les répertoires de la racine situés hors des sous-arbres donnés.
+
+        Utilisé lorsque les sous-arbres d'une racine sont scannés séparément (et
+        élagués chacun par prune) : les sous-dossiers disparus de la racine n'ont
+        plus de sous-arbre.
+
+        Args:
+            root (str): Le répertoire racine scanné.
+            subtrees (iterable): Les chemins des sous-arbres encore présents.
+        """
+        root = os.path.abspath(root)
+        prefix = os.path.join(root, "")
+        kept = tuple(os.path.join(os.path.abspath(path), "") for path in subtrees)
+        with self.lock:
+            stale = [
+                path for path in self.directories
+                if path.startswith(prefix) and not os.path.join(path, "").startswith(kept)
+            ]
+            for path in stale:
+                del self.directories[path]
+            if stale:
+                self.dirty = True
+        if stale:
+            logger.debug(f"{len(stale)} répertoires supprimés de l'index de scan")
+
+    def cached_games(self, root):
+        """
+        Retourne les jeux connus sous la racine, sans accéder au système de fichiers.
+
+        Args:
+            root (str): Le répertoire racine.
+
+        Returns:
+            list: Les jeux de l'index, triés par nom.
+        """
+        root = os.path.abspath(root)
+        prefix = os.path.join(root, "")
+        games = []
+        with self.lock:
+            for path, record in self.directories.items():
+                if path == root or path.startswith(prefix):
+                    games.extend(Game.from_tuple(game) for game in record["games"])
+        games.sort(key=lambda g: g.sort_key)
+        return games
@@ -0,0 +1,63 @@
+import queue
+import threading
+from scanner import ScanProgress
+from background import lower_thread_priority
+from logger import logger
+
+
+class ScanWorker(threading.Thread):
+    """
+    Thread exécutant un scan en arrière-plan et publiant les jeux par lots.
+
+    Les messages déposés dans la file sont des tuples :
+        ("batch", [Game, ...])  : un lot de jeux nouvellement découverts
+        ("done", ScanProgress)  : fin du scan (complet ou annulé)
+        ("error", Exception)    : le scan a échoué
+    """
+
+    def __init__(self, scanner_func, directory, batch_size=50, **scan_options):
+        """
+        Initialise le thread de scan.
+
+        Args:
+            scanner_func (callable): Fonction de scan en flux (voir scanner.iter_games
+                et library_scan.iter_library).
+            directory (str ou list): Le répertoire à scanner, ou les bibliothèques.
+            batch_size (int): Nombre de jeux regroupés par message.
+            **scan_options: Options transmises à la fonction de scan.
+        """
+        super().__init__(daemon=True)
+        self.scanner_func = scanner_func
+        self.directory = directory
+        self.batch_size = batch_size
+        self.scan_options = scan_options
+        self.results = queue.Queue()
+        self.progress = ScanProgress()
+        self.cancel_event = threading.Event()
+
+    def run(self):
+        """Exécute le scan et publie les résultats dans la file."""
+        lower_thread_priority()
+        batch = []
+        try:
+            for game in self.scanner_func(self.directory, progress=self.progress,
+                                          cancel_event=self.cancel_event, **self.scan_options):
+                batch.append(game)
+                if len(batch) >= self.batch_size:
+                    self.results.put(("batch", batch))
+                    batch = []
+            if batch and not self.cancel_event.is_set():
+                self.results.put(("batch", batch))
+            self.results.put(("done", self.progress))
+        except Exception as e:
+            logger.error(f"Erreur lors du scan de {self.directory}: {e}", exc_info=True)
+            self.results.put(("error", e))
+
+    def cancel(self):
+        """Demande l'arrêt du scan. Les lots déjà publiés restent dans la file."""
+        self.cancel_event.set()
+
+    @property
+    def cancelled(self):
+        """Indique si l'arrêt du scan a été demandé."""
+        return self.cancel_event.is_set()
@@ -1,64 +1,535 @@
 import os
-import glob
+import time
+import fnmatch
+import threading
 from models.game import Game
+from shortcuts import shortcut_cache
+from background import background
 from logger import logger
+from metrics import metrics
 
-def scan_games_directory(directory_path):
-    """Scanne le répertoire spécifié pour trouver les jeux exécutables."""
+# Extensions de fichiers à considérer comme des jeux exécutables
+EXECUTABLE_EXTENSIONS = ('.exe', '.lnk', '.bat', '.cmd')
+
+# Extensions d'images recherchées, par ordre de préférence
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.ico', '.bmp')
+
+# Noms d'images génériques utilisés en dernier recours
+GENERIC_IMAGE_NAMES = ('icon', 'logo', 'cover')
+
+# Dossiers ignorés par défaut (redistribuables, dépendances d'installation...)
+DEFAULT_EXCLUDE_PATTERNS = ('_CommonRedist', '__redist', 'DirectX')
+
+
+class DirectoryListing:
+    """Contenu d'un répertoire lu en une seule fois avec os.scandir."""
+
+    def __init__(self, path):
+        """
+        Initialise un listing vide.
+
+        Args:
+            path (str): Le chemin du répertoire.
+        """
+        self.path = path
+        # Noms de fichiers indexés par leur nom en minuscules
+        self.files = {}
+        # Sous-répertoires : liste de (nom, est_un_lien)
+        self.subdirs = []
+        # Stat du répertoire au moment de la lecture
+        self.stat = None
+        # Jeux repris de l'index de scan si le répertoire n'a pas changé
+        self.cached_games = None
+
+    def find_file(self, name):
+        """Retourne le chemin d'un fichier du listing (insensible à la casse), ou None."""
+        real_name = self.files.get(name.lower())
+        if real_name is None:
+            return None
+        return os.path.join(self.path, real_name)
+
+    def find_image(self, base_name):
+        """Cherche une image nommée base_name avec l'une des extensions connues."""
+        for img_ext in IMAGE_EXTENSIONS:
+            image_path = self.find_file(base_name + img_ext)
+            if image_path:
+                return image_path
+        return None
+
+    def subdir(self, name):
+        """Retourne le nom réel du sous-répertoire demandé (insensible à la casse), ou None."""
+        lowered = name.lower()
+        for subdir_name, is_link in self.subdirs:
+            if subdir_name.lower() == lowered:
+                return subdir_name
+        return None
+
+
+def read_directory(path):
+    """
+    Lit le contenu d'un répertoire une seule fois.
+
+    Args:
+        path (str): Le répertoire à lire.
+
+    Returns:
+        DirectoryListing: Le listing, ou None si le répertoire est illisible.
+    """
+    listing = DirectoryListing(path)
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir():
+                        listing.subdirs.append((entry.name, entry.is_symlink()))
+                    else:
+                        listing.files[entry.name.lower()] = entry.name
+                except OSError:
+                    # Entrée disparue ou lien cassé : on l'ignore
+                    continue
+    except OSError as e:
+        logger.warning(f"Impossible de lire le répertoire {path}: {e}")
+        return None
+    return listing
+
+
+def is_excluded(name, exclude_patterns):
+    """Indique si un nom de dossier correspond à l'un des motifs d'exclusion."""
+    lowered = name.lower()
+    for pattern in exclude_patterns:
+        if fnmatch.fnmatchcase(lowered, pattern.lower()):
+            return True
+    return False
+
+
+class VisitedDirectories:
+    """
+    Répertoires déjà visités, identifiés par (périphérique, inode).
+
+    Partagé par les parcours parallèles d'une même bibliothèque : une boucle de liens
+    symboliques entre deux sous-arbres n'est parcourue qu'une fois.
+    """
+
+    def __init__(self):
+        """Initialise un ensemble vide."""
+        self.lock = threading.Lock()
+        self.identities = set()
+
+    def add(self, identity):
+        """
+        Marque un répertoire comme visité.
+
+        Args:
+            identity (tuple): (st_dev, st_ino) du répertoire.
+
+        Returns:
+            bool: True si le répertoire n'avait pas encore été visité.
+        """
+        with self.lock:
+            if identity in self.identities:
+                return False
+            self.identities.add(identity)
+            return True
+
+
+def walk_directory(directory_path, max_depth=None, exclude_patterns=DEFAULT_EXCLUDE_PATTERNS,
+                   follow_symlinks=True, prefetched=None, index=None, visited=None):
+    """
+    Parcourt l'arborescence en une seule passe et produit le listing de chaque répertoire.
+
+    Chaque répertoire n'est lu qu'une seule fois. Les liens symboliques vers des
+    répertoires déjà visités sont ignorés pour éviter les boucles.
+
+    Args:
+        directory_path (str): Le répertoire racine.
+        max_depth (int, optional): Profondeur maximale (0 = racine seule). Par défaut illimitée.
+        exclude_patterns (iterable): Motifs fnmatch de dossiers à ignorer.
+        follow_symlinks (bool): Suivre les liens symboliques vers des répertoires.
+        prefetched (dict, optional): Listings déjà lus, indexés par chemin, réutilisés
+            au lieu de relire le répertoire.
+        index (ScanIndex, optional): Index de scan. Les répertoires dont le mtime n'a pas
+            changé sont repris de l'index sans être relus.
+        visited (VisitedDirectories, optional): Répertoires visités, partagés avec d'autres
+            parcours. Le répertoire de départ est parcouru même s'il y figure déjà : il
+            a pu y être réservé par le parcours qui l'a soumis.
+
+    Yields:
+        tuple: (DirectoryListing, profondeur)
+    """
+    if visited is None:
+        visited = VisitedDirectories()
+    stack = [(directory_path, 0)]
+    if prefetched is None:
+        prefetched = {}
+
+    while stack:
+        path, depth = stack.pop()
+
+        # Protection contre les boucles de liens symboliques
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        if not visited.add((stat.st_dev, stat.st_ino)) and depth > 0:
+            logger.debug(f"Répertoire déjà visité ignoré (boucle de liens ?) : {path}")
+            continue
+
+        record = index.lookup(path, stat) if index is not None else None
+        if record is not None:
+            # Répertoire inchangé : reprendre son contenu depuis l'index
+            listing = DirectoryListing(path)
+            listing.subdirs = [(name, is_link) for name, is_link in record["subdirs"]]
+            listing.cached_games = [Game.from_tuple(game) for game in record["games"]]
+        else:
+            listing = prefetched.pop(path, None) or read_directory(path)
+            if listing is None:
+                continue
+        listing.stat = stat
+
+        yield listing, depth
+
+        if max_depth is not None and depth >= max_depth:
+            continue
+
+        # Empiler en ordre inverse pour visiter les sous-dossiers par ordre alphabétique
+        for name, is_link in sorted(listing.subdirs, key=lambda item: item[0].lower(), reverse=True):
+            if is_excluded(name, exclude_patterns):
+                continue
+            if not follow_symlinks and is_link:
+                continue
+            stack.append((os.path.join(path, name), depth + 1))
+
+
+def find_game_image(game_name, listing, images_listing=None):
+    """
+    Cherche l'image associée à un jeu à partir des listings déjà en mémoire.
+
+    Args:
+        game_name (str): Le nom du jeu (nom de l'exécutable sans extension).
+        listing (DirectoryListing): Le listing du dossier du jeu.
+        images_listing (DirectoryListing, optional): Le listing du sous-dossier "images".
+
+    Returns:
+        str: Le chemin de l'image, ou None.
+    """
+    # Chercher avec le même nom que l'exécutable
+    image_path = listing.find_image(game_name)
+
+    # Si aucune image trouvée, chercher dans un sous-dossier "images" s'il existe
+    if image_path is None and images_listing is not None:
+        image_path = images_listing.find_image(game_name)
+
+    # Si toujours aucune image, chercher une image "icon", "logo" ou "cover" dans le dossier
+    if image_path is None:
+        for img_name in GENERIC_IMAGE_NAMES:
+            image_path = listing.find_image(img_name)
+            if image_path:
+                break
+
+    return image_path
+
+
+def find_target_image(link, target_listings):
+    """
+    Cherche l'image d'un raccourci auprès de sa cible.
+
+    L'icône du raccourci est retenue si c'est une image ; sinon, le dossier de la
+    cible est examiné (image au nom de l'exécutable cible, puis image générique).
+
+    Args:
+        link (ShellLink): Le raccourci analysé.
+        target_listings (dict): Listings des dossiers cibles déjà lus, par chemin.
+
+    Returns:
+        str: Le chemin de l'image, ou None.
+    """
+    icon = link.icon_location
+    if icon and os.path.splitext(icon)[1].lower() in IMAGE_EXTENSIONS and os.path.isfile(icon):
+        return icon
+    if not link.target:
+        return None
+
+    target_dir = os.path.dirname(link.target)
+    if target_dir not in target_listings:
+        # Cible absente (autre machine, lecteur non monté) : rien à chercher
+        target_listings[target_dir] = read_directory(target_dir) if os.path.isdir(target_dir) else None
+    target_listing = target_listings[target_dir]
+    if target_listing is None:
+        return None
+
+    image_path = target_listing.find_image(os.path.splitext(os.path.basename(link.target))[0])
+    if image_path is None:
+        for img_name in GENERIC_IMAGE_NAMES:
+            image_path = target_listing.find_image(img_name)
+            if image_path:
+                break
+    return image_path
+
+
+def find_shortcut_image(game_name, shortcut_path, listing, images_listing=None, target_listings=None):
+    """
+    Cherche l'image associée à un raccourci .lnk.
+
+    Une image au nom du raccourci reste prioritaire ; viennent ensuite les images
+    de la cible, puis les images génériques du dossier du raccourci.
+
+    Args:
+        game_name (str): Le nom du jeu (nom du raccourci sans extension).
+        shortcut_path (str): Le chemin du raccourci.
+        listing (DirectoryListing): Le listing du dossier du raccourci.
+        images_listing (DirectoryListing, optional): Le listing du sous-dossier "images".
+        target_listings (dict, optional): Listings des dossiers cibles déjà lus, par chemin.
+
+    Returns:
+        str: Le chemin de l'image, ou None.
+    """
+    image_path = listing.find_image(game_name)
+    if image_path is None and images_listing is not None:
+        image_path = images_listing.find_image(game_name)
+    if image_path is None:
+        link = shortcut_cache.get(shortcut_path)
+        if link is not None:
+            image_path = find_target_image(link, {} if target_listings is None else target_listings)
+    return image_path or find_game_image(game_name, listing, images_listing)
+
+
+def games_from_listing(listing, images_listing=None):
+    """
+    Construit les jeux présents dans un répertoire à partir de son listing.
+
+    Args:
+        listing (DirectoryListing): Le listing du répertoire.
+        images_listing (DirectoryListing, optional): Le listing du sous-dossier "images".
+
+    Returns:
+        list: Les objets Game trouvés dans ce répertoire.
+    """
     games = []
-    
+    target_listings = {}
+    for real_name in listing.files.values():
+        game_name, ext = os.path.splitext(real_name)
+        ext = ext.lower()
+        if ext not in EXECUTABLE_EXTENSIONS:
+            continue
+
+        game_path = os.path.join(listing.path, real_name)
+        if ext == ".lnk":
+            image_path = find_shortcut_image(game_name, game_path, listing, images_listing, target_listings)
+        else:
+            image_path = find_game_image(game_name, listing, images_listing)
+        games.append(Game(game_name, game_path, image_path))
+    return games
+
+
+def listing_games(listing, prefetched, index=None, cancel_event=None):
+    """
+    Retourne les jeux d'un répertoire produit par walk_directory.
+
+    Le sous-dossier "images" éventuel est lu et ajouté aux listings pré-lus, et
+    le contenu du répertoire est enregistré dans l'index de scan.
+
+    Args:
+        listing (DirectoryListing): Le listing du répertoire.
+        prefetched (dict): Listings lus en avance, complétés par le dossier "images".
+        index (ScanIndex, optional): Index de scan à mettre à jour.
+        cancel_event (threading.Event, optional): Scan abandonné : l'index n'est plus mis à jour.
+
+    Returns:
+        list: Les jeux du répertoire.
+    """
+    if listing.cached_games is not None:
+        return listing.cached_games
+
+    # Le sous-dossier "images" n'est lu que s'il existe dans le listing
+    images_listing = None
+    images_dir = listing.subdir("images")
+    if images_dir is not None:
+        images_listing = read_directory(os.path.join(listing.path, images_dir))
+        if images_listing is not None:
+            prefetched[images_listing.path] = images_listing
+
+    directory_games = games_from_listing(listing, images_listing)
+
+    if index is not None and not (cancel_event is not None and cancel_event.is_set()):
+        images_mtime = None
+        if images_dir is not None:
+            try:
+                images_mtime = os.stat(os.path.join(listing.path, images_dir)).st_mtime_ns
+            except OSError:
+                images_dir = None
+        index.store(listing.path, listing.stat, listing.subdirs, directory_games,
+                    images_dir, images_mtime)
+    return directory_games
+
+
+class ScanProgress:
+    """Progression d'un scan, lisible depuis un autre thread."""
+
+    def __init__(self):
+        """Initialise des compteurs à zéro."""
+        self.directories_visited = 0
+        self.games_found = 0
+        self.finished = False
+        self.cancelled = False
+        # État de chaque bibliothèque, pour un scan de plusieurs racines (voir library_scan)
+        self.roots = {}
+
+    def __str__(self):
+        """Représentation textuelle de la progression."""
+        return f"{self.directories_visited} dossiers parcourus, {self.games_found} jeux trouvés"
+
+
+def iter_games(directory_path, max_depth=None, exclude_patterns=DEFAULT_EXCLUDE_PATTERNS,
+               follow_symlinks=True, index=None, progress=None, cancel_event=None):
+    """
+    Scanne le répertoire spécifié et produit les jeux au fur et à mesure de leur découverte.
+
+    Args:
+        directory_path (str): Le répertoire à scanner.
+        max_depth (int, optional): Profondeur maximale de parcours. Par défaut illimitée.
+        exclude_patterns (iterable): Motifs de dossiers à ignorer.
+        follow_symlinks (bool): Suivre les liens symboliques vers des répertoires.
+        index (ScanIndex, optional): Index persistant utilisé pour un rescan incrémental.
+        progress (ScanProgress, optional): Objet mis à jour pendant le scan.
+        cancel_event (threading.Event, optional): Interrompt le scan lorsqu'il est positionné.
+
+    Yields:
+        Game: Les jeux trouvés, dans l'ordre du parcours.
+    """
+    if progress is None:
+        progress = ScanProgress()
+    start = time.perf_counter()
+
     if not os.path.exists(directory_path):
         logger.error(f"Le répertoire {directory_path} n'existe pas.")
-        return games
-    
-    # Extensions de fichiers à considérer comme des jeux exécutables
-    executable_extensions = ['.exe', '.lnk', '.bat', '.cmd']
-    
-    # Parcourir tous les fichiers dans le répertoire
-    for ext in executable_extensions:
-        for exe_file in glob.glob(os.path.join(directory_path, "**", f"*{ext}"), recursive=True):
-            # Extraire le nom du jeu (sans l'extension)
-            game_name = os.path.basename(exe_file).replace(ext, "")
-            game_dir = os.path.dirname(exe_file)
-            
-            # Rechercher une image associée (png, jpg, jpeg, ico)
-            image_path = None
-            image_extensions = ['.png', '.jpg', '.jpeg', '.ico', '.bmp']
-            
-            # Chercher avec le même nom que l'exécutable
-            for img_ext in image_extensions:
-                possible_image = os.path.join(game_dir, game_name + img_ext)
-                if os.path.exists(possible_image):
-                    image_path = possible_image
-                    break
-            
-            # Si aucune image trouvée, chercher dans un sous-dossier "images" s'il existe
-            if image_path is None:
-                images_dir = os.path.join(game_dir, "images")
-                if os.path.exists(images_dir) and os.path.isdir(images_dir):
-                    for img_ext in image_extensions:
-                        possible_image = os.path.join(images_dir, game_name + img_ext)
-                        if os.path.exists(possible_image):
-                            image_path = possible_image
-                            break
-            
-            # Si toujours aucune image, chercher une image "icon" ou "logo" dans le dossier
-            if image_path is None:
-                for img_name in ["icon", "logo", "cover"]:
-                    for img_ext in image_extensions:
-                        possible_image = os.path.join(game_dir, f"{img_name}{img_ext}")
-                        if os.path.exists(possible_image):
-                            image_path = possible_image
-                            break
-                    if image_path:
-                        break
-            
-            # Créer un objet Game et l'ajouter à la liste
-            game = Game(game_name, exe_file, image_path)
-            games.append(game)
-    
+        progress.finished = True
+        return
+
+    if index is not None:
+        options = {
+            "max_depth": max_depth,
+            "exclude_patterns": list(exclude_patterns),
+            "follow_symlinks": follow_symlinks,
+        }
+        # Des options différentes invalident les enregistrements existants
+        if not index.begin_scan(directory_path, options):
+            index.prune(directory_path, set())
+
+    # Listings lus en avance (dossiers "images"), réutilisés lors de la descente
+    prefetched = {}
+    visited = set()
+    reused = 0
+
+    for listing, depth in walk_directory(directory_path, max_depth, exclude_patterns, follow_symlinks,
+                                         prefetched, index):
+        # Mode jeu : suspendre le parcours tant qu'un jeu tourne
+        background.wait()
+        if cancel_event is not None and cancel_event.is_set():
+            progress.cancelled = True
+            logger.info(f"Scan de {directory_path} annulé")
+            return
+
+        visited.add(os.path.abspath(listing.path))
+        progress.directories_visited += 1
+
+        if listing.cached_games is not None:
+            reused += 1
+        directory_games = listing_games(listing, prefetched, index)
+
+        for game in directory_games:
+            progress.games_found += 1
+            yield game
+
+    # L'index n'est élagué et enregistré que pour un scan complet
+    if index is not None:
+        index.prune(directory_path, visited)
+        index.save()
+        logger.debug(f"{reused}/{len(visited)} répertoires repris de l'index de scan")
+
+    progress.finished = True
+    metrics.record("scan", time.perf_counter() - start)
+    metrics.count("scan.directories", progress.directories_visited)
+    metrics.count("scan.reused_directories", reused)
+    metrics.count("scan.games", progress.games_found)
+    logger.info(f"{progress.games_found} jeux trouvés dans {directory_path}")
+
+
+def scan_games_directory(directory_path, max_depth=None, exclude_patterns=DEFAULT_EXCLUDE_PATTERNS,
+                         follow_symlinks=True, index=None):
+    """
+    Scanne le répertoire spécifié pour trouver les jeux exécutables.
+
+    Args:
+        directory_path (str): Le répertoire à scanner.
+        max_depth (int, optional): Profondeur maximale de parcours. Par défaut illimitée.
+        exclude_patterns (iterable): Motifs de dossiers à ignorer.
+        follow_symlinks (bool): Suivre les liens symboliques vers des répertoires.
+        index (ScanIndex, optional): Index persistant utilisé pour un rescan incrémental.
+
+    Returns:
+        list: Les jeux trouvés, triés par nom.
+    """
+    games = list(iter_games(directory_path, max_depth, exclude_patterns, follow_symlinks, index))
+
     # Tri des jeux par nom
-    games.sort(key=lambda g: g.name.lower())
-    
-    logger.info(f"{len(games)} jeux trouvés dans {directory_path}")
-    return games
\ No newline at end of file
+    games.sort(key=lambda g: g.sort_key)
+    return games
+
+
+def scan_changes(directory_path, changes, max_depth=None, exclude_patterns=DEFAULT_EXCLUDE_PATTERNS,
+                 follow_symlinks=True, index=None):
+    """
+    Relit uniquement les parties modifiées d'une bibliothèque déjà scannée.
+
+    Args:
+        directory_path (str): Le répertoire racine de la bibliothèque.
+        changes (list): Les modifications sous forme de (chemin, récursif) : un répertoire
+            dont seuls les fichiers sont à relire, ou un sous-arbre complet (créé,
+            déplacé ou supprimé).
+        max_depth (int, optional): Profondeur maximale de la bibliothèque.
+        exclude_patterns (iterable): Motifs de dossiers à ignorer.
+        follow_symlinks (bool): Suivre les liens symboliques vers des répertoires.
+        index (ScanIndex, optional): Index de scan, mis à jour pour les répertoires relus.
+
+    Returns:
+        list: Des tuples (chemin, récursif, jeux) : les jeux trouvés désormais dans le
+            répertoire (ou le sous-arbre), qui remplacent ceux connus auparavant.
+    """
+    root = os.path.abspath(directory_path)
+    results = []
+    prefetched = {}
+    seen = set()
+    for path, recursive in changes:
+        path = os.path.abspath(path)
+        if not recursive and os.path.basename(path).lower() == "images":
+            # Les images d'un dossier "images" appartiennent aux jeux du dossier parent
+            path = os.path.dirname(path)
+        if (path, recursive) in seen:
+            continue
+        seen.add((path, recursive))
+        relative = os.path.relpath(path, root)
+        parts = [] if relative == os.curdir else relative.split(os.sep)
+        if parts and parts[0] == os.pardir:
+            continue
+        if any(is_excluded(part, exclude_patterns) for part in parts):
+            continue
+        depth = len(parts)
+        if max_depth is not None and depth > max_depth:
+            continue
+
+        if recursive:
+            remaining = None if max_depth is None else max_depth - depth
+        else:
+            remaining = 0
+        games = []
+        visited = set()
+        for listing, _ in walk_directory(path, remaining, exclude_patterns, follow_symlinks, prefetched, index):
+            visited.add(os.path.abspath(listing.path))
+            games.extend(listing_games(listing, prefetched, index))
+        if index is not None and recursive:
+            index.prune(path, visited)
+        results.append((path, recursive, games))
+
+    if index is not None:
+        index.save()
+    return results
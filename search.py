@@ -0,0 +1,241 @@
+import re
+import unicodedata
+
+# Chiffres romains convertis en nombres pour rapprocher "V" de "5"
+ROMAN_NUMERALS = {
+    "ii": "2", "iii": "3", "iv": "4", "v": "5", "vi": "6", "vii": "7",
+    "viii": "8", "ix": "9", "x": "10", "xi": "11", "xii": "12", "xiii": "13",
+}
+
+# Catégories de correspondance, de la plus pertinente à la moins pertinente
+MATCH_EXACT = 0
+MATCH_PREFIX = 1
+MATCH_WORD_PREFIX = 2
+MATCH_INITIALS = 3
+MATCH_SUBSTRING = 4
+MATCH_PATH = 5
+MATCH_SUBSEQUENCE = 6
+MATCH_NONE = 7
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+
+
+def normalize(text):
+    """
+    Normalise un texte pour la recherche : sans accents, en minuscules,
+    la ponctuation étant remplacée par des espaces.
+
+    Args:
+        text (str): Le texte à normaliser.
+
+    Returns:
+        str: Le texte normalisé, mots séparés par une espace.
+    """
+    decomposed = unicodedata.normalize("NFKD", text)
+    folded = "".join(c for c in decomposed if not unicodedata.combining(c)).lower()
+    return _NON_ALNUM.sub(" ", folded).strip()
+
+
+def trigrams(text):
+    """Retourne l'ensemble des trigrammes d'un texte."""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def is_subsequence(query, text):
+    """
+    Indique si les caractères de la requête apparaissent dans l'ordre dans le texte.
+
+    Le texte est parcouru une seule fois, sans retour arrière.
+    """
+    position = 0
+    for c in query:
+        position = text.find(c, position) + 1
+        if not position:
+            return False
+    return True
+
+
+class SearchEntry:
+    """Clés de recherche pré-calculées pour un jeu."""
+
+    __slots__ = ("game", "spaced", "compact", "numeric", "initials", "path")
+
+    def __init__(self, game):
+        """
+        Calcule les clés de recherche d'un jeu.
+
+        Args:
+            game (Game): Le jeu indexé.
+        """
+        self.game = game
+        tokens = normalize(game.name).split()
+        # Nom avec les chiffres romains convertis ("grand theft auto v" -> "grand theft auto 5")
+        numeric_tokens = [ROMAN_NUMERALS.get(t, t) if i else t for i, t in enumerate(tokens)]
+
+        self.spaced = " " + " ".join(tokens)
+        self.compact = "".join(tokens)
+        self.numeric = "".join(numeric_tokens)
+        # Initiales, les nombres étant conservés entiers ("gta5")
+        self.initials = "".join(t if t.isdigit() else t[0] for t in numeric_tokens)
+        self.path = normalize(game.path).replace(" ", "")
+
+
+class SearchIndex:
+    """
+    Index de recherche sur le nom et le chemin des jeux.
+
+    Les clés normalisées de chaque jeu sont calculées une seule fois. Un index de
+    trigrammes réduit les candidats des requêtes de 3 caractères et plus. Les
+    correspondances floues (sous-séquences, par exemple "gta5" pour "Grand Theft
+    Auto V") sont cherchées parmi les jeux contenant tous les caractères de la
+    requête, par un parcours linéaire de chaque nom.
+    """
+
+    def __init__(self):
+        """Initialise un index vide."""
+        self.entries = []
+        # Clés des entrées en listes parallèles, pour un filtrage rapide
+        self.compacts = []
+        self.numerics = []
+        self.spaceds = []
+        self.initials = []
+        self.paths = []
+        self.trigram_map = {}
+        self.char_map = {}  # "e", "ee", "eeee"... -> positions des jeux contenant au moins autant de "e"
+        self.dirty = False
+
+    def set_games(self, games):
+        """
+        Définit les jeux indexés. L'ordre des jeux sert à départager les résultats.
+
+        Args:
+            games (list): Les jeux à indexer.
+        """
+        self.entries = []
+        for game in games:
+            # Les clés sont conservées sur le jeu et réutilisées entre reconstructions
+            entry = game.search_keys
+            if entry is None:
+                entry = game.search_keys = SearchEntry(game)
+            self.entries.append(entry)
+        self.dirty = True
+
+    def build(self):
+        """Reconstruit les structures de recherche si les jeux ont changé."""
+        if not self.dirty:
+            return
+        self.trigram_map = {}
+        self.char_map = {}
+        self.compacts = [entry.compact for entry in self.entries]
+        self.numerics = [entry.numeric for entry in self.entries]
+        self.spaceds = [entry.spaced for entry in self.entries]
+        self.initials = [entry.initials for entry in self.entries]
+        self.paths = [entry.path for entry in self.entries]
+
+        for i, entry in enumerate(self.entries):
+            for gram in trigrams(entry.compact) | trigrams(entry.numeric) | trigrams(entry.path):
+                self.trigram_map.setdefault(gram, []).append(i)
+            for c in set(entry.compact) | set(entry.numeric):
+                count = max(entry.compact.count(c), entry.numeric.count(c))
+                run = c
+                while len(run) <= count:
+                    self.char_map.setdefault(run, []).append(i)
+                    run += run
+
+        self.dirty = False
+
+    def candidates(self, compact_query):
+        """Retourne les positions des jeux pouvant contenir la requête en sous-chaîne."""
+        if len(compact_query) < 3:
+            return range(len(self.entries))
+
+        postings = []
+        for gram in trigrams(compact_query):
+            posting = self.trigram_map.get(gram)
+            if posting is None:
+                return []
+            postings.append(posting)
+        postings.sort(key=len)
+        result = set(postings[0])
+        for posting in postings[1:]:
+            result.intersection_update(posting)
+            if not result:
+                break
+        return result
+
+    def subsequence_matches(self, compact_query, exclude=()):
+        """
+        Retourne les positions des jeux dont le nom contient la requête en sous-séquence.
+
+        L'index des caractères écarte les jeux où manque un caractère de la requête
+        (ou une partie de ses répétitions), puis chaque candidat est vérifié en un
+        seul passage sur son nom.
+
+        Args:
+            compact_query (str): La requête normalisée, sans espaces.
+            exclude (set): Positions déjà retenues, ignorées.
+        """
+        postings = []
+        for c in set(compact_query):
+            # Plus grande puissance de 2 ne dépassant pas le nombre d'occurrences
+            posting = self.char_map.get(c * (1 << (compact_query.count(c).bit_length() - 1)))
+            if posting is None:
+                return set()
+            postings.append(posting)
+        postings.sort(key=len)
+        candidates = set(postings[0]).difference(exclude)
+        for posting in postings[1:]:
+            candidates.intersection_update(posting)
+
+        C, N = self.compacts, self.numerics
+        return {i for i in candidates
+                if is_subsequence(compact_query, C[i]) or N[i] != C[i] and is_subsequence(compact_query, N[i])}
+
+    def search(self, query):
+        """
+        Recherche les jeux correspondant à une requête.
+
+        Args:
+            query (str): Le texte saisi par l'utilisateur.
+
+        Returns:
+            list: Les jeux correspondants, du plus pertinent au moins pertinent.
+        """
+        normalized = normalize(query)
+        compact_query = normalized.replace(" ", "")
+        if not compact_query:
+            return [entry.game for entry in self.entries]
+
+        self.build()
+        entries = self.entries
+        word_query = " " + normalized
+        cq = compact_query
+        C, N, S, I, P = self.compacts, self.numerics, self.spaceds, self.initials, self.paths
+
+        # Classement en une seule passe, sans appel de fonction par jeu
+        scored = [
+            (MATCH_EXACT if C[i] == cq else
+             MATCH_PREFIX if C[i].startswith(cq) or N[i].startswith(cq) else
+             MATCH_WORD_PREFIX if word_query in S[i] else
+             MATCH_INITIALS if I[i].startswith(cq) else
+             MATCH_SUBSTRING if cq in C[i] or cq in N[i] else
+             MATCH_PATH if cq in P[i] else
+             MATCH_NONE, i)
+            for i in self.candidates(cq)
+        ]
+        scored = [item for item in scored if item[0] != MATCH_NONE]
+        seen = {i for category, i in scored}
+
+        # Correspondances floues : initiales ("gta5") et sous-séquences, qui échappent aux trigrammes
+        if len(compact_query) >= 3:
+            for i in self.subsequence_matches(compact_query, seen):
+                if I[i].startswith(cq):
+                    category = MATCH_INITIALS
+                elif word_query in S[i]:
+                    category = MATCH_WORD_PREFIX
+                else:
+                    category = MATCH_SUBSEQUENCE
+                scored.append((category, i))
+
+        scored.sort()
+        return [entries[i].game for category, i in scored]
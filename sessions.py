@@ -0,0 +1,383 @@
+import os
+import time
+import uuid
+import queue
+import sqlite3
+import threading
+from background import lower_thread_priority
+from logger import logger
+from metrics import metrics
+
+# Emplacement par défaut de l'historique des sessions
+DEFAULT_SESSIONS_PATH = os.path.join("data", "sessions.db")
+
+# Intervalle d'échantillonnage CPU/mémoire des jeux en cours (s)
+DEFAULT_SAMPLE_INTERVAL = 5.0
+
+# Nombre maximal d'opérations écrites dans une même transaction
+WRITE_BATCH = 500
+
+# Tris disponibles pour l'historique
+SORT_RECENT = "recent"
+SORT_LAUNCHES = "launches"
+SORT_PLAYTIME = "playtime"
+
+SORT_COLUMNS = {
+    SORT_RECENT: "last_played",
+    SORT_LAUNCHES: "launch_count",
+    SORT_PLAYTIME: "total_playtime",
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id TEXT PRIMARY KEY,
+    game_path TEXT NOT NULL,
+    game_name TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    launcher_pid INTEGER,
+    ended_at REAL,
+    exit_code INTEGER,
+    duration REAL,
+    samples INTEGER NOT NULL DEFAULT 0,
+    cpu_peak REAL,
+    cpu_avg REAL,
+    rss_peak INTEGER,
+    rss_avg INTEGER
+);
+CREATE INDEX IF NOT EXISTS sessions_game ON sessions (game_path, started_at);
+CREATE INDEX IF NOT EXISTS sessions_started ON sessions (started_at);
+
+CREATE TABLE IF NOT EXISTS game_stats (
+    game_path TEXT PRIMARY KEY,
+    game_name TEXT NOT NULL,
+    launch_count INTEGER NOT NULL DEFAULT 0,
+    total_playtime REAL NOT NULL DEFAULT 0,
+    last_played REAL
+);
+CREATE INDEX IF NOT EXISTS game_stats_last_played ON game_stats (last_played);
+CREATE INDEX IF NOT EXISTS game_stats_launch_count ON game_stats (launch_count);
+CREATE INDEX IF NOT EXISTS game_stats_total_playtime ON game_stats (total_playtime);
+"""
+
+
+class Session:
+    """Session de jeu en cours et ses mesures cumulées."""
+
+    __slots__ = ("id", "game", "started_at", "processes", "samples",
+                 "cpu_peak", "cpu_total", "rss_peak", "rss_total")
+
+    def __init__(self, game):
+        """
+        Initialise une session.
+
+        Args:
+            game (Game): Le jeu lancé.
+        """
+        self.id = uuid.uuid4().hex
+        self.game = game
+        self.started_at = time.time()
+        self.processes = {}  # psutil.Process par PID, conservés pour cpu_percent
+        self.samples = 0
+        self.cpu_peak = 0.0
+        self.cpu_total = 0.0
+        self.rss_peak = 0
+        self.rss_total = 0
+
+    def sample(self):
+        """
+        Mesure le CPU et la mémoire de l'arbre de processus du jeu.
+
+        Returns:
+            bool: True si une mesure a été prise.
+        """
+        process = self.game.process
+        if process is None:
+            return False
+        # Import différé : psutil n'est chargé qu'avec la première session de jeu
+        import psutil
+        try:
+            root = psutil.Process(process.pid)
+            tree = [root] + root.children(recursive=True)
+        except psutil.Error:
+            return False
+
+        cpu = 0.0
+        rss = 0
+        current = {}
+        for proc in tree:
+            # Réutiliser l'objet précédent : cpu_percent mesure depuis le dernier appel
+            proc = self.processes.get(proc.pid, proc)
+            try:
+                cpu += proc.cpu_percent(None)
+                rss += proc.memory_info().rss
+            except psutil.Error:
+                continue
+            current[proc.pid] = proc
+        is_first = not self.processes
+        self.processes = current
+        if is_first:
+            # Le premier appel à cpu_percent ne fait qu'initialiser la mesure
+            return False
+
+        self.samples += 1
+        self.cpu_total += cpu
+        self.cpu_peak = max(self.cpu_peak, cpu)
+        self.rss_total += rss
+        self.rss_peak = max(self.rss_peak, rss)
+        return True
+
+    def resources(self):
+        """Retourne (samples, cpu_peak, cpu_avg, rss_peak, rss_avg), les moyennes étant None sans mesure."""
+        if not self.samples:
+            return 0, None, None, None, None
+        return (self.samples, self.cpu_peak, self.cpu_total / self.samples,
+                self.rss_peak, self.rss_total // self.samples)
+
+
+class SessionStore:
+    """
+    Historique des sessions de jeu dans une base SQLite (mode WAL).
+
+    Les écritures sont déposées dans une file et appliquées par un thread dédié,
+    regroupées en transactions : lancer un jeu ou échantillonner ses ressources ne
+    bloque jamais sur le disque. Les cumuls par jeu (lancements, temps de jeu,
+    dernière partie) sont tenus à jour dans une table indexée, de sorte que les
+    tris de la bibliothèque ne parcourent pas l'historique complet.
+    """
+
+    def __init__(self, db_path=DEFAULT_SESSIONS_PATH, sample_interval=DEFAULT_SAMPLE_INTERVAL):
+        """
+        Initialise le stockage et démarre ses threads.
+
+        Args:
+            db_path (str): Le fichier de la base SQLite.
+            sample_interval (float): Intervalle d'échantillonnage CPU/mémoire en secondes,
+                0 pour désactiver l'échantillonnage.
+        """
+        self.db_path = db_path
+        self.sample_interval = sample_interval
+        self.active = {}  # Sessions en cours, par identité de jeu
+        self.lock = threading.Lock()
+        self.writes = queue.Queue()
+        self.wake = threading.Event()  # Signalé au début d'une session
+        self.stopped = threading.Event()
+
+        db_dir = os.path.dirname(db_path)
+        if db_dir and not os.path.exists(db_dir):
+            os.makedirs(db_dir)
+        connection = self.connect()
+        try:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(SCHEMA)
+            columns = [row[1] for row in connection.execute("PRAGMA table_info(sessions)")]
+            if "launcher_pid" not in columns:
+                # Base créée par une version précédente
+                connection.execute("ALTER TABLE sessions ADD COLUMN launcher_pid INTEGER")
+        finally:
+            connection.close()
+
+        self.writer = threading.Thread(target=self.write_loop, daemon=True, name="session-writer")
+        self.writer.start()
+        self.sampler = None
+        if sample_interval > 0:
+            self.sampler = threading.Thread(target=self.sample_loop, daemon=True, name="session-sampler")
+            self.sampler.start()
+
+    def connect(self):
+        """Ouvre une connexion à la base."""
+        connection = sqlite3.connect(self.db_path, timeout=10)
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def start_session(self, game):
+        """
+        Enregistre le début d'une session de jeu.
+
+        Args:
+            game (Game): Le jeu qui vient d'être lancé.
+        """
+        session = Session(game)
+        with self.lock:
+            self.active[game.key] = session
+        self.writes.put((
+            "INSERT INTO sessions (id, game_path, game_name, started_at, launcher_pid) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (session.id, game.key, game.name, session.started_at, os.getpid())))
+        self.writes.put((
+            "INSERT INTO game_stats (game_path, game_name, launch_count, last_played) VALUES (?, ?, 1, ?) "
+            "ON CONFLICT (game_path) DO UPDATE SET game_name = excluded.game_name, "
+            "launch_count = launch_count + 1, last_played = excluded.last_played",
+            (game.key, game.name, session.started_at)))
+        self.wake.set()
+
+    def end_session(self, game, exit_code=None):
+        """
+        Enregistre la fin d'une session de jeu.
+
+        Args:
+            game (Game): Le jeu terminé.
+            exit_code (int, optional): Le code de retour du processus, s'il est connu.
+        """
+        with self.lock:
+            session = self.active.pop(game.key, None)
+        if session is None:
+            return
+        ended_at = time.time()
+        duration = ended_at - session.started_at
+        self.writes.put((
+            "UPDATE sessions SET ended_at = ?, exit_code = ?, duration = ?, samples = ?, "
+            "cpu_peak = ?, cpu_avg = ?, rss_peak = ?, rss_avg = ? WHERE id = ?",
+            (ended_at, exit_code, duration) + session.resources() + (session.id,)))
+        self.writes.put((
+            "UPDATE game_stats SET total_playtime = total_playtime + ? WHERE game_path = ?",
+            (duration, game.key)))
+        logger.debug(f"Session de {game.name} terminée après {duration:.0f} s (code: {exit_code}).")
+
+    def sample_loop(self):
+        """Boucle du thread d'échantillonnage : ne se réveille que si des jeux sont en cours."""
+        lower_thread_priority()
+        while not self.stopped.is_set():
+            with self.lock:
+                sessions = list(self.active.values())
+            if not sessions:
+                self.wake.wait()
+                self.wake.clear()
+                continue
+
+            with metrics.span("session_sample"):
+                for session in sessions:
+                    if session.sample():
+                        self.writes.put((
+                            "UPDATE sessions SET samples = ?, cpu_peak = ?, cpu_avg = ?, "
+                            "rss_peak = ?, rss_avg = ? WHERE id = ?",
+                            session.resources() + (session.id,)))
+            self.stopped.wait(self.sample_interval)
+
+    def close_stale_sessions(self, connection):
+        """
+        Clôt les sessions restées ouvertes par un lanceur qui n'est plus en cours d'exécution.
+
+        Un lanceur arrêté brutalement (plantage, arrêt du système) n'a pas enregistré la
+        fin de ses parties : leur durée est inconnue et n'est pas ajoutée au temps de jeu.
+        Les sessions d'un autre lanceur actif (démon, interface) sont conservées.
+
+        Returns:
+            int: Le nombre de sessions closes.
+        """
+        # Import différé : psutil n'est chargé que par le thread d'écriture
+        import psutil
+        rows = connection.execute(
+            "SELECT id, launcher_pid, started_at FROM sessions WHERE ended_at IS NULL").fetchall()
+        stale = [(started_at, session_id) for session_id, launcher_pid, started_at in rows
+                 if launcher_pid is None or not psutil.pid_exists(launcher_pid)]
+        if stale:
+            with connection:
+                connection.executemany("UPDATE sessions SET ended_at = ? WHERE id = ? AND ended_at IS NULL", stale)
+            logger.info(f"Clôture de {len(stale)} session(s) interrompue(s) par un arrêt du lanceur.")
+        return len(stale)
+
+    def write_loop(self):
+        """Boucle du thread d'écriture : clôt les sessions abandonnées, puis applique les opérations en attente."""
+        connection = self.connect()
+        try:
+            try:
+                self.close_stale_sessions(connection)
+            except sqlite3.Error as e:
+                logger.error(f"Erreur lors de la clôture des sessions interrompues: {e}")
+            while True:
+                batch = [self.writes.get()]
+                while len(batch) < WRITE_BATCH:
+                    try:
+                        batch.append(self.writes.get_nowait())
+                    except queue.Empty:
+                        break
+
+                stop = None in batch
+                statements = [item for item in batch if item is not None]
+                if statements:
+                    try:
+                        with connection:
+                            for sql, params in statements:
+                                connection.execute(sql, params)
+                    except sqlite3.Error as e:
+                        logger.error(f"Erreur lors de l'écriture de l'historique des sessions: {e}")
+                for _ in batch:
+                    self.writes.task_done()
+                if stop:
+                    return
+        finally:
+            connection.close()
+
+    def flush(self):
+        """Attend que toutes les écritures en attente soient appliquées."""
+        if self.writer.is_alive():
+            self.writes.join()
+
+    def close(self):
+        """Applique les écritures en attente et arrête les threads. Les sessions en cours restent ouvertes."""
+        if self.stopped.is_set():
+            return
+        self.stopped.set()
+        self.wake.set()
+        self.writes.put(None)
+        self.writer.join()
+
+    def game_stats(self):
+        """
+        Retourne les cumuls de tous les jeux joués.
+
+        Returns:
+            dict: Par identité de jeu (game.key), un tuple (lancements, temps de jeu en s, dernière partie).
+        """
+        connection = self.connect()
+        try:
+            rows = connection.execute(
+                "SELECT game_path, launch_count, total_playtime, last_played FROM game_stats").fetchall()
+        finally:
+            connection.close()
+        return {path: (count, playtime, last_played) for path, count, playtime, last_played in rows}
+
+    def top_games(self, sort=SORT_RECENT, limit=20):
+        """
+        Retourne les jeux les plus récemment joués, les plus lancés ou les plus joués.
+
+        Args:
+            sort (str): SORT_RECENT, SORT_LAUNCHES ou SORT_PLAYTIME.
+            limit (int): Nombre maximal de jeux.
+
+        Returns:
+            list: Des dictionnaires (path, name, launch_count, total_playtime, last_played).
+        """
+        column = SORT_COLUMNS[sort]
+        connection = self.connect()
+        try:
+            # Parcours de l'index de la colonne triée, arrêté après "limit" lignes
+            rows = connection.execute(
+                f"SELECT game_path, game_name, launch_count, total_playtime, last_played "
+                f"FROM game_stats ORDER BY {column} DESC LIMIT ?", (limit,)).fetchall()
+        finally:
+            connection.close()
+        return [{"path": path, "name": name, "launch_count": count, "total_playtime": playtime,
+                 "last_played": last_played}
+                for path, name, count, playtime, last_played in rows]
+
+    def sessions_of(self, game_path, limit=50):
+        """
+        Retourne les dernières sessions d'un jeu, de la plus récente à la plus ancienne.
+
+        Args:
+            game_path (str): L'identité du jeu (game.key).
+            limit (int): Nombre maximal de sessions.
+
+        Returns:
+            list: Des dictionnaires décrivant chaque session.
+        """
+        connection = self.connect()
+        connection.row_factory = sqlite3.Row
+        try:
+            rows = connection.execute(
+                "SELECT * FROM sessions WHERE game_path = ? ORDER BY started_at DESC LIMIT ?",
+                (game_path, limit)).fetchall()
+        finally:
+            connection.close()
+        return [dict(row) for row in rows]
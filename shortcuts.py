@@ -0,0 +1,319 @@
+import os
+import shlex
+import struct
+import ntpath
+import threading
+import subprocess
+from logger import logger
+
+# En-tête d'un fichier Shell Link (MS-SHLLINK) : taille et CLSID fixes
+HEADER_SIZE = 0x4C
+LINK_CLSID = bytes.fromhex("0114020000000000c000000000000046")
+
+# Drapeaux LinkFlags
+HAS_LINK_TARGET_ID_LIST = 0x00000001
+HAS_LINK_INFO = 0x00000002
+HAS_NAME = 0x00000004
+HAS_RELATIVE_PATH = 0x00000008
+HAS_WORKING_DIR = 0x00000010
+HAS_ARGUMENTS = 0x00000020
+HAS_ICON_LOCATION = 0x00000040
+IS_UNICODE = 0x00000080
+
+# Drapeaux LinkInfoFlags
+VOLUME_ID_AND_LOCAL_BASE_PATH = 0x1
+COMMON_NETWORK_RELATIVE_LINK_AND_PATH_SUFFIX = 0x2
+
+# Blocs ExtraData contenant des chemins avec variables d'environnement
+ENVIRONMENT_VARIABLE_BLOCK = 0xA0000001
+ICON_ENVIRONMENT_BLOCK = 0xA0000007
+
+# Cibles lancées directement plutôt que par le shell
+DIRECT_EXTENSIONS = (".exe", ".com")
+
+# Page de code des chaînes ANSI d'un raccourci
+ANSI_ENCODING = "mbcs" if os.name == "nt" else "cp1252"
+
+# Taille maximale lue d'un raccourci (les raccourcis réels font quelques Ko)
+MAX_LINK_SIZE = 1024 * 1024
+
+
+class ShellLink:
+    """Contenu utile d'un raccourci Windows (.lnk)."""
+
+    __slots__ = ("target", "arguments", "working_directory", "icon_location", "icon_index",
+                 "description", "relative_path")
+
+    def __init__(self, target=None, arguments="", working_directory=None, icon_location=None,
+                 icon_index=0, description=None, relative_path=None):
+        """
+        Initialise un raccourci.
+
+        Args:
+            target (str, optional): Le chemin de la cible.
+            arguments (str): Les arguments de la ligne de commande.
+            working_directory (str, optional): Le répertoire de travail.
+            icon_location (str, optional): Le fichier contenant l'icône.
+            icon_index (int): L'index de l'icône dans ce fichier.
+            description (str, optional): Le commentaire du raccourci.
+            relative_path (str, optional): Le chemin de la cible relatif au raccourci.
+        """
+        self.target = target
+        self.arguments = arguments
+        self.working_directory = working_directory
+        self.icon_location = icon_location
+        self.icon_index = icon_index
+        self.description = description
+        self.relative_path = relative_path
+
+    def __repr__(self):
+        """Représentation de l'objet pour le débogage."""
+        return (f"ShellLink(target='{self.target}', arguments='{self.arguments}', "
+                f"working_directory='{self.working_directory}', icon_location='{self.icon_location}')")
+
+
+def read_c_string(data, offset, unicode=False):
+    """Lit une chaîne terminée par un caractère nul (ANSI ou UTF-16LE)."""
+    if unicode:
+        end = offset
+        while end + 1 < len(data) and data[end:end + 2] != b"\0\0":
+            end += 2
+        return data[offset:end].decode("utf-16-le", errors="replace")
+    end = data.find(b"\0", offset)
+    if end < 0:
+        end = len(data)
+    return data[offset:end].decode(ANSI_ENCODING, errors="replace")
+
+
+def parse_link_info(data):
+    """
+    Extrait le chemin de la cible de la structure LinkInfo.
+
+    Args:
+        data (bytes): La structure LinkInfo complète.
+
+    Returns:
+        str: Le chemin local ou réseau de la cible, ou None.
+    """
+    if len(data) < 0x1C:
+        return None
+    header_size, flags = struct.unpack_from("<II", data, 4)
+    local_offset, network_offset, suffix_offset = struct.unpack_from("<III", data, 16)
+    unicode = header_size >= 0x24 and len(data) >= 0x24
+    if unicode:
+        local_offset_unicode, suffix_offset_unicode = struct.unpack_from("<II", data, 0x1C)
+        suffix = read_c_string(data, suffix_offset_unicode, True) if suffix_offset_unicode else ""
+    else:
+        suffix = read_c_string(data, suffix_offset) if suffix_offset else ""
+
+    if flags & VOLUME_ID_AND_LOCAL_BASE_PATH:
+        if unicode and local_offset_unicode:
+            base = read_c_string(data, local_offset_unicode, True)
+        else:
+            base = read_c_string(data, local_offset)
+        return base + suffix
+
+    if flags & COMMON_NETWORK_RELATIVE_LINK_AND_PATH_SUFFIX and network_offset + 20 <= len(data):
+        net_name_offset, = struct.unpack_from("<I", data, network_offset + 8)
+        net_name = read_c_string(data, network_offset + net_name_offset)
+        if not suffix:
+            return net_name
+        return ntpath.join(net_name, suffix)
+    return None
+
+
+def parse_shell_link(data):
+    """
+    Analyse le contenu binaire d'un raccourci Windows.
+
+    La cible est lue dans la structure LinkInfo, à défaut dans le bloc de
+    variables d'environnement, puis dans le chemin relatif. La liste d'identifiants
+    du shell (IDList) est ignorée : les raccourcis vers des objets sans chemin
+    (panneau de configuration, applications du Store) n'ont donc pas de cible.
+
+    Args:
+        data (bytes): Le contenu du fichier .lnk.
+
+    Returns:
+        ShellLink: Le raccourci ; ses chemins sont au format Windows, non résolus.
+
+    Raises:
+        ValueError: Si le contenu n'est pas un raccourci valide.
+    """
+    if len(data) < HEADER_SIZE or struct.unpack_from("<I", data)[0] != HEADER_SIZE \
+            or data[4:20] != LINK_CLSID:
+        raise ValueError("en-tête Shell Link invalide")
+    try:
+        flags, = struct.unpack_from("<I", data, 20)
+        icon_index, = struct.unpack_from("<i", data, 56)
+        offset = HEADER_SIZE
+
+        if flags & HAS_LINK_TARGET_ID_LIST:
+            id_list_size, = struct.unpack_from("<H", data, offset)
+            offset += 2 + id_list_size
+
+        target = None
+        if flags & HAS_LINK_INFO:
+            link_info_size, = struct.unpack_from("<I", data, offset)
+            target = parse_link_info(data[offset:offset + link_info_size])
+            offset += link_info_size
+
+        # Chaînes StringData, présentes dans cet ordre selon les drapeaux
+        unicode = bool(flags & IS_UNICODE)
+        strings = {}
+        for flag in (HAS_NAME, HAS_RELATIVE_PATH, HAS_WORKING_DIR, HAS_ARGUMENTS, HAS_ICON_LOCATION):
+            if not flags & flag:
+                continue
+            count, = struct.unpack_from("<H", data, offset)
+            offset += 2
+            size = count * 2 if unicode else count
+            if offset + size > len(data):
+                raise ValueError("chaîne tronquée")
+            strings[flag] = data[offset:offset + size].decode("utf-16-le" if unicode else ANSI_ENCODING,
+                                                              errors="replace")
+            offset += size
+
+        # Blocs ExtraData : chemins contenant des variables d'environnement (%ProgramFiles%...)
+        environment_target = None
+        environment_icon = None
+        while offset + 8 <= len(data):
+            block_size, signature = struct.unpack_from("<II", data, offset)
+            if block_size < 8 or offset + block_size > len(data):
+                break
+            if signature in (ENVIRONMENT_VARIABLE_BLOCK, ICON_ENVIRONMENT_BLOCK) and block_size >= 0x314:
+                value = read_c_string(data[offset + 268:offset + 788], 0, True) \
+                    or read_c_string(data[offset + 8:offset + 268], 0)
+                if signature == ENVIRONMENT_VARIABLE_BLOCK:
+                    environment_target = value
+                else:
+                    environment_icon = value
+            offset += block_size
+    except struct.error as e:
+        raise ValueError(f"raccourci tronqué: {e}") from None
+
+    if not target and environment_target:
+        target = ntpath.expandvars(environment_target)
+    icon_location = strings.get(HAS_ICON_LOCATION) or environment_icon
+    return ShellLink(
+        target=target,
+        arguments=strings.get(HAS_ARGUMENTS, ""),
+        working_directory=ntpath.expandvars(strings[HAS_WORKING_DIR]) if strings.get(HAS_WORKING_DIR) else None,
+        icon_location=ntpath.expandvars(icon_location) if icon_location else None,
+        icon_index=icon_index,
+        description=strings.get(HAS_NAME),
+        relative_path=strings.get(HAS_RELATIVE_PATH),
+    )
+
+
+def read_shortcut(path):
+    """
+    Lit et analyse un fichier .lnk.
+
+    Une cible absente de LinkInfo est déduite du chemin relatif, résolu depuis le
+    dossier du raccourci.
+
+    Args:
+        path (str): Le chemin du raccourci.
+
+    Returns:
+        ShellLink: Le raccourci.
+
+    Raises:
+        OSError: Si le fichier est illisible.
+        ValueError: Si le contenu n'est pas un raccourci valide.
+    """
+    with open(path, "rb") as f:
+        data = f.read(MAX_LINK_SIZE)
+    link = parse_shell_link(data)
+    if not link.target and link.relative_path:
+        link.target = os.path.normpath(os.path.join(os.path.dirname(path),
+                                                    link.relative_path.replace("\\", os.sep)))
+    return link
+
+
+class ShortcutCache:
+    """
+    Raccourcis déjà analysés, conservés par chemin avec le mtime et la taille du fichier.
+
+    Un raccourci inchangé n'est lu qu'une fois, que ce soit pendant le scan (images
+    du dossier de la cible) ou au lancement.
+    """
+
+    def __init__(self):
+        """Initialise un cache vide."""
+        self.lock = threading.Lock()
+        self.links = {}  # Chemin absolu -> (mtime_ns, taille, ShellLink ou None)
+
+    def get(self, path):
+        """
+        Retourne le raccourci analysé, en relisant le fichier s'il a changé.
+
+        Args:
+            path (str): Le chemin du raccourci.
+
+        Returns:
+            ShellLink: Le raccourci, ou None s'il est illisible ou invalide.
+        """
+        path = os.path.abspath(path)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        with self.lock:
+            record = self.links.get(path)
+        if record is not None and record[0] == stat.st_mtime_ns and record[1] == stat.st_size:
+            return record[2]
+
+        try:
+            link = read_shortcut(path)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Raccourci illisible {path}: {e}")
+            link = None
+        with self.lock:
+            self.links[path] = (stat.st_mtime_ns, stat.st_size, link)
+        return link
+
+    def clear(self):
+        """Vide le cache."""
+        with self.lock:
+            self.links.clear()
+
+
+def shortcut_command(link):
+    """
+    Construit la commande lançant directement la cible d'un raccourci.
+
+    Args:
+        link (ShellLink): Le raccourci.
+
+    Returns:
+        tuple: (commande pour subprocess.Popen, répertoire de travail), ou None si la
+            cible n'est pas un exécutable présent : le raccourci doit alors être
+            ouvert par le shell.
+    """
+    if link is None or not link.target or not os.path.isfile(link.target):
+        return None
+    if os.name == "nt":
+        if os.path.splitext(link.target)[1].lower() not in DIRECT_EXTENSIONS:
+            return None
+        # Sous Windows, les arguments sont transmis tels quels dans la ligne de commande
+        command = subprocess.list2cmdline([link.target])
+        if link.arguments:
+            command += " " + link.arguments
+    else:
+        if not os.access(link.target, os.X_OK):
+            return None
+        try:
+            command = [link.target] + shlex.split(link.arguments or "")
+        except ValueError:
+            # Guillemets non fermés : le shell interprétera les arguments
+            return None
+
+    working_directory = link.working_directory
+    if not working_directory or not os.path.isdir(working_directory):
+        working_directory = os.path.dirname(link.target)
+    return command, working_directory
+
+
+# Instance globale partagée par le scanner et le gestionnaire de jeux
+shortcut_cache = ShortcutCache()
@@ -0,0 +1,124 @@
+import os
+import shutil
+import struct
+import tempfile
+import unittest
+from shortcuts import (HEADER_SIZE, ShortcutCache, parse_link_info, parse_shell_link, read_shortcut,
+                       shortcut_command)
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def read_fixture(name):
+    """Retourne le contenu d'un raccourci de test."""
+    with open(os.path.join(FIXTURES, name), "rb") as f:
+        return f.read()
+
+
+class ParseShellLinkTest(unittest.TestCase):
+    """Analyse des raccourcis : local.lnk (IDList + LinkInfo), relative.lnk (chemin relatif seul)."""
+
+    def test_local_path(self):
+        link = parse_shell_link(read_fixture("local.lnk"))
+        self.assertEqual(link.target, "C:\\Games\\Jeu\\jeu.exe")
+        self.assertEqual(link.working_directory, "C:\\Games\\Jeu")
+        self.assertEqual(link.arguments, '-windowed --profile "Joueur 1"')
+        self.assertEqual(link.icon_location, "C:\\Games\\Jeu\\jeu.ico")
+        self.assertEqual(link.icon_index, 2)
+        self.assertIsNone(link.relative_path)
+
+    def test_relative_path_and_arguments(self):
+        link = parse_shell_link(read_fixture("relative.lnk"))
+        self.assertIsNone(link.target)
+        self.assertEqual(link.relative_path, ".\\bin\\jeu.exe")
+        self.assertEqual(link.arguments, "-skipintro -lang fr")
+        self.assertIsNone(link.working_directory)
+
+    def test_relative_target_resolved_from_shortcut_directory(self):
+        link = read_shortcut(os.path.join(FIXTURES, "relative.lnk"))
+        self.assertEqual(link.target, os.path.join(FIXTURES, "bin", "jeu.exe"))
+
+    def test_truncated_file(self):
+        with self.assertRaises(ValueError):
+            parse_shell_link(read_fixture("truncated.lnk"))
+
+    def test_corrupt_header(self):
+        with self.assertRaises(ValueError):
+            parse_shell_link(read_fixture("corrupt.lnk"))
+
+    def test_empty_file(self):
+        with self.assertRaises(ValueError):
+            parse_shell_link(b"")
+
+
+class ParseLinkInfoTest(unittest.TestCase):
+    """Analyse de la structure LinkInfo seule."""
+
+    def test_local_base_path(self):
+        data = read_fixture("local.lnk")
+        offset = HEADER_SIZE + 2 + struct.unpack_from("<H", data, HEADER_SIZE)[0]
+        size, = struct.unpack_from("<I", data, offset)
+        self.assertEqual(parse_link_info(data[offset:offset + size]), "C:\\Games\\Jeu\\jeu.exe")
+
+    def test_network_path(self):
+        net_name = b"\\\\serveur\\jeux\0"
+        network = struct.pack("<IIIII", 20 + len(net_name), 0, 20, 0, 0) + net_name
+        suffix = b"Jeu\\jeu.exe\0"
+        network_offset = 0x1C
+        suffix_offset = network_offset + len(network)
+        body = network + suffix
+        data = struct.pack("<IIIIIII", 0x1C + len(body), 0x1C, 0x2, 0, 0, network_offset,
+                           suffix_offset) + body
+        self.assertEqual(parse_link_info(data), "\\\\serveur\\jeux\\Jeu\\jeu.exe")
+
+    def test_too_short(self):
+        self.assertIsNone(parse_link_info(b"\0" * 8))
+
+
+class ShortcutCommandTest(unittest.TestCase):
+    """Cache des raccourcis et commande de lancement direct."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def copy_fixture(self, name):
+        path = os.path.join(self.directory, name)
+        shutil.copyfile(os.path.join(FIXTURES, name), path)
+        return path
+
+    def test_invalid_shortcut_cached_as_none(self):
+        cache = ShortcutCache()
+        self.assertIsNone(cache.get(self.copy_fixture("corrupt.lnk")))
+        self.assertIsNone(cache.get(self.copy_fixture("truncated.lnk")))
+
+    def test_missing_target_opened_by_shell(self):
+        link = ShortcutCache().get(self.copy_fixture("relative.lnk"))
+        self.assertIsNotNone(link)
+        self.assertIsNone(shortcut_command(link))
+
+    @unittest.skipIf(os.name == "nt", "lancement direct d'un exécutable POSIX")
+    def test_direct_command(self):
+        path = self.copy_fixture("relative.lnk")
+        target = os.path.join(self.directory, "bin", "jeu.exe")
+        os.makedirs(os.path.dirname(target))
+        open(target, "wb").close()
+        os.chmod(target, 0o755)
+        command, working_directory = shortcut_command(ShortcutCache().get(path))
+        self.assertEqual(command, [target, "-skipintro", "-lang", "fr"])
+        self.assertEqual(working_directory, os.path.dirname(target))
+
+    @unittest.skipIf(os.name == "nt", "découpage POSIX des arguments")
+    def test_unbalanced_quotes_opened_by_shell(self):
+        path = self.copy_fixture("relative.lnk")
+        target = os.path.join(self.directory, "bin", "jeu.exe")
+        os.makedirs(os.path.dirname(target))
+        open(target, "wb").close()
+        os.chmod(target, 0o755)
+        link = ShortcutCache().get(path)
+        link.arguments = '--profile "Joueur 1'
+        self.assertIsNone(shortcut_command(link))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,433 @@
+import os
+import time
+import heapq
+import queue
+import threading
+import itertools
+import tkinter as tk
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, ProcessPoolExecutor
+from artwork import ArtworkStore
+from background import background, lower_thread_priority
+from logger import logger
+from metrics import metrics
+
+# Dossier par défaut des miniatures pré-calculées
+DEFAULT_CACHE_DIR = os.path.join("cache", "thumbnails")
+
+# Taille des miniatures affichées sur les cartes de jeu
+THUMBNAIL_SIZE = (100, 100)
+
+# Délai d'inactivité avant l'enregistrement des nouvelles empreintes (ms)
+SAVE_DELAY = 2000
+
+
+def thumbnail_key(digest, size):
+    """
+    Calcule la clé de cache d'une miniature.
+
+    La clé dépend du contenu de l'image source (son empreinte, voir ArtworkStore)
+    et des dimensions demandées : les images identiques partagent la même
+    miniature, et toute modification de l'image change sa clé.
+
+    Args:
+        digest (str): L'empreinte du contenu de l'image source.
+        size (tuple): Les dimensions (largeur, hauteur) de la miniature.
+
+    Returns:
+        str: La clé de cache.
+    """
+    return f"{digest}-{size[0]}x{size[1]}"
+
+
+def thumbnail_path(cache_dir, key):
+    """Retourne le chemin du fichier PNG d'une miniature."""
+    return os.path.join(cache_dir, key[:2], key + ".png")
+
+
+def render_thumbnail(image_path, size):
+    """
+    Décode et réduit une image source aux dimensions demandées.
+
+    Les JPEG sont décodés directement à échelle réduite (Image.draft), puis les
+    grandes images sont réduites par un facteur entier (Image.reduce) avant le
+    redimensionnement final. N'utilise pas Tk : peut être appelée hors du thread principal.
+
+    Args:
+        image_path (str): Le chemin de l'image source.
+        size (tuple): Les dimensions (largeur, hauteur) de la miniature.
+
+    Returns:
+        PIL.Image.Image: La miniature.
+    """
+    # Import différé : PIL n'est chargé qu'à la première miniature à générer
+    from PIL import Image
+    with Image.open(image_path) as img:
+        # Décodage JPEG à l'échelle 1/2, 1/4 ou 1/8 si possible
+        img.draft("RGB", size)
+        if img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGBA")
+
+        # Réduction rapide par facteur entier en gardant au moins 2x la taille cible
+        factor = min(img.width // (size[0] * 2), img.height // (size[1] * 2))
+        if factor >= 2:
+            img = img.reduce(factor)
+
+        return img.resize(size, Image.LANCZOS)
+
+
+def ensure_thumbnail(image_path, digest, size=THUMBNAIL_SIZE, cache_dir=DEFAULT_CACHE_DIR):
+    """
+    Retourne le chemin de la miniature sur disque, en la générant si nécessaire.
+
+    Args:
+        image_path (str): Le chemin de l'image source.
+        digest (str): L'empreinte du contenu de l'image (voir ArtworkStore.digest).
+        size (tuple): Les dimensions de la miniature.
+        cache_dir (str): Le dossier du cache de miniatures.
+
+    Returns:
+        str: Le chemin du fichier PNG de la miniature.
+    """
+    path = thumbnail_path(cache_dir, thumbnail_key(digest, size))
+    if os.path.exists(path):
+        # Miniature déjà générée, éventuellement pour une copie de la même image
+        return path
+
+    thumbnail = render_thumbnail(image_path, size)
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Écriture atomique pour ne jamais laisser de miniature tronquée
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    thumbnail.save(tmp_path, "PNG")
+    os.replace(tmp_path, path)
+    return path
+
+
+class ThumbnailCache:
+    """
+    Cache de miniatures à deux niveaux : fichiers PNG pré-réduits sur disque et
+    LRU borné de PhotoImage décodées en mémoire.
+
+    Les miniatures sont adressées par le contenu de l'image source : une icône
+    livrée à l'identique par plusieurs jeux n'est stockée et décodée qu'une fois,
+    et tous ces jeux partagent la même PhotoImage. Les PNG du cache sont décodés
+    par Tk lui-même : PIL ne sert qu'à générer les miniatures manquantes.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, size=THUMBNAIL_SIZE, max_images=500, store=None):
+        """
+        Initialise le cache de miniatures.
+
+        Args:
+            cache_dir (str): Le dossier où stocker les miniatures.
+            size (tuple): Les dimensions des miniatures.
+            max_images (int): Nombre maximal de PhotoImage conservées en mémoire.
+            store (ArtworkStore, optional): Les empreintes des images. Par défaut, un index
+                enregistré à côté du dossier des miniatures, chargé au premier accès.
+        """
+        self.cache_dir = cache_dir
+        self.size = size
+        self.max_images = max_images
+        self._store = store
+        self.images = OrderedDict()
+        # Empreintes connues sans l'index (instantané de l'interface) : chemin absolu -> (mtime_ns, taille, empreinte)
+        self.hints = {}
+
+    @property
+    def store(self):
+        """L'index des empreintes, chargé depuis le disque à la première utilisation."""
+        if self._store is None:
+            self._store = ArtworkStore(os.path.join(os.path.dirname(self.cache_dir) or ".", "artwork.json"))
+        return self._store
+
+    def add_hint(self, image_path, record):
+        """
+        Indique l'empreinte d'une image sans charger l'index.
+
+        Args:
+            image_path (str): Le chemin de l'image source.
+            record (list): (mtime_ns, taille, empreinte), voir record().
+        """
+        self.hints[os.path.abspath(image_path)] = tuple(record)
+
+    def record(self, image_path):
+        """
+        Retourne l'empreinte connue d'une image et l'état du fichier correspondant, sans le lire.
+
+        Returns:
+            list: (mtime_ns, taille, empreinte), ou None si l'image n'a pas encore d'empreinte.
+        """
+        path = os.path.abspath(image_path)
+        hint = self.hints.get(path)
+        if hint is not None and self._store is None:
+            return list(hint)
+        with self.store.lock:
+            record = self.store.files.get(path)
+        if record is None and hint is not None:
+            return list(hint)
+        return list(record) if record is not None else None
+
+    def cached_digest(self, image_path):
+        """
+        Retourne l'empreinte connue d'une image si le fichier n'a pas changé, sans le lire.
+
+        Les indications de l'instantané sont consultées avant l'index, qui n'est
+        ainsi pas chargé pour afficher les miniatures déjà calculées.
+
+        Raises:
+            OSError: Si le fichier est inaccessible.
+        """
+        hint = self.hints.get(os.path.abspath(image_path))
+        if hint is not None:
+            stat = os.stat(image_path)
+            if hint[0] == stat.st_mtime_ns and hint[1] == stat.st_size:
+                return hint[2]
+        return self.store.cached_digest(image_path)
+
+    @metrics.timed("thumbnail_load")
+    def get(self, image_path, render=True):
+        """
+        Retourne la miniature d'une image sous forme de PhotoImage.
+
+        Doit être appelée depuis le thread Tk.
+
+        Args:
+            image_path (str): Le chemin de l'image source.
+            render (bool): Générer la miniature si elle n'existe pas encore sur disque.
+                Avec False, seules les miniatures déjà calculées sont retournées et
+                l'image source n'est jamais lue.
+
+        Returns:
+            tk.PhotoImage: La miniature, ou None si elle est indisponible.
+        """
+        try:
+            digest = self.store.digest(image_path) if render else self.cached_digest(image_path)
+        except OSError:
+            return None
+        if digest is None:
+            return None
+        key = thumbnail_key(digest, self.size)
+
+        photo = self.images.get(key)
+        if photo is not None:
+            self.images.move_to_end(key)
+            return photo
+
+        if not render and not os.path.exists(thumbnail_path(self.cache_dir, key)):
+            return None
+
+        try:
+            path = ensure_thumbnail(image_path, digest, self.size, self.cache_dir)
+            photo = tk.PhotoImage(file=path)
+        except Exception as e:
+            logger.debug(f"Miniature indisponible pour {image_path}: {e}")
+            return None
+
+        self.images[key] = photo
+        if len(self.images) > self.max_images:
+            self.images.popitem(last=False)
+        return photo
+
+    def ensure(self, image_path):
+        """
+        Génère la miniature d'une image sur disque si nécessaire, sans utiliser Tk.
+
+        Peut être appelée depuis un worker du pool de threads.
+
+        Returns:
+            float: La durée de l'opération en secondes.
+        """
+        start = time.perf_counter()
+        ensure_thumbnail(image_path, self.store.digest(image_path), self.size, self.cache_dir)
+        return time.perf_counter() - start
+
+    def clear(self):
+        """Vide le cache mémoire (les miniatures sur disque sont conservées)."""
+        self.images.clear()
+
+
+class ThumbnailLoader:
+    """
+    Génère les miniatures manquantes dans un pool de workers, hors du thread Tk.
+
+    Les demandes sont servies par ordre de priorité (la plus petite d'abord) et
+    peuvent être annulées tant qu'elles n'ont pas abouti. Le résultat est remis
+    au thread Tk via root.after, qui appelle le callback avec la PhotoImage.
+    """
+
+    def __init__(self, root, cache, max_workers=None, use_processes=False):
+        """
+        Initialise le chargeur de miniatures.
+
+        Args:
+            root (tk.Tk): La fenêtre principale, utilisée pour revenir au thread Tk.
+            cache (ThumbnailCache): Le cache de miniatures.
+            max_workers (int, optional): Taille du pool. Par défaut min(4, nombre de CPU).
+            use_processes (bool): Utiliser un pool de processus plutôt que de threads.
+        """
+        self.root = root
+        self.cache = cache
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self.use_processes = use_processes
+        executor_class = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+        self.executor = executor_class(max_workers=self.max_workers, initializer=lower_thread_priority)
+
+        self.requests = {}  # clé -> [priorité, image_path, callback]
+        self.heap = []  # (priorité, ordre, clé)
+        self.counter = itertools.count()
+        self.in_flight = {}  # clé -> Future
+        self.results = queue.Queue()
+        self.polling = False
+        self.save_pending = None  # Identifiant root.after de l'enregistrement différé des empreintes
+
+        # Compteurs de débit
+        self.decoded = 0
+        self.failed = 0
+        self.busy_time = 0.0
+
+        # Mode jeu : les demandes restent en attente, puis sont soumises à la reprise
+        background.add_resume_listener(lambda: self.root.after(0, self.dispatch))
+
+    def request(self, key, image_path, callback, priority=0):
+        """
+        Demande la miniature d'une image.
+
+        Si la miniature est déjà en mémoire ou sur disque, le callback est appelé
+        immédiatement. Sinon la génération est confiée au pool, sauf en mode jeu où
+        elle attend la fermeture du dernier jeu.
+
+        Args:
+            key (hashable): Identifiant de la demande (par exemple la carte du jeu).
+            image_path (str): Le chemin de l'image source.
+            callback (callable): Appelé avec la PhotoImage, ou None en cas d'échec.
+            priority (int): Priorité de la demande, la plus petite est servie en premier.
+        """
+        photo = self.cache.get(image_path, render=False)
+        if photo is not None:
+            callback(photo)
+            return
+
+        self.cancel(key)
+        self.requests[key] = [priority, image_path, callback]
+        heapq.heappush(self.heap, (priority, next(self.counter), key))
+        self.dispatch()
+
+    def set_priority(self, key, priority):
+        """Change la priorité d'une demande encore en attente."""
+        request = self.requests.get(key)
+        if request is None or key in self.in_flight or request[0] == priority:
+            return
+        request[0] = priority
+        heapq.heappush(self.heap, (priority, next(self.counter), key))
+
+    def cancel(self, key):
+        """Annule une demande. Une génération déjà démarrée se termine mais est ignorée."""
+        self.requests.pop(key, None)
+        future = self.in_flight.pop(key, None)
+        if future is not None:
+            future.cancel()
+
+    def cancel_all(self):
+        """Annule toutes les demandes en attente ou en cours."""
+        for key in list(self.requests):
+            self.cancel(key)
+        self.heap = []
+
+    def dispatch(self):
+        """Soumet au pool les demandes les plus prioritaires, dans la limite des workers."""
+        while self.heap and len(self.in_flight) < self.max_workers * 2 and not background.paused:
+            priority, _, key = heapq.heappop(self.heap)
+            request = self.requests.get(key)
+            # Entrée obsolète (annulée, déjà soumise ou priorité modifiée)
+            if request is None or key in self.in_flight or request[0] != priority:
+                continue
+
+            image_path = request[1]
+            if self.use_processes:
+                # Les processus ne partagent pas l'index des empreintes : la calculer ici
+                try:
+                    digest = self.cache.store.digest(image_path)
+                except OSError as e:
+                    future = Future()
+                    future.set_exception(e)
+                else:
+                    future = self.executor.submit(timed_ensure_thumbnail, image_path, digest,
+                                                  self.cache.size, self.cache.cache_dir)
+            else:
+                future = self.executor.submit(self.cache.ensure, image_path)
+            self.in_flight[key] = future
+            future.add_done_callback(lambda f, k=key: self.results.put((k, f)))
+
+        if self.in_flight and not self.polling:
+            self.polling = True
+            self.root.after(20, self.poll_results)
+
+    def poll_results(self):
+        """Traite les miniatures générées, dans le thread Tk."""
+        while True:
+            try:
+                key, future = self.results.get_nowait()
+            except queue.Empty:
+                break
+
+            if self.in_flight.get(key) is not future:
+                # Demande annulée ou remplacée entre-temps
+                continue
+            del self.in_flight[key]
+            priority, image_path, callback = self.requests.pop(key)
+
+            photo = None
+            try:
+                elapsed = future.result()
+                self.decoded += 1
+                self.busy_time += elapsed
+                metrics.record("thumbnail_render", elapsed)
+                photo = self.cache.get(image_path, render=False)
+            except Exception as e:
+                self.failed += 1
+                metrics.error("thumbnail_render")
+                logger.debug(f"Miniature indisponible pour {image_path}: {e}")
+            callback(photo)
+
+        self.polling = False
+        self.dispatch()
+        if not self.in_flight and not self.heap:
+            # Plus rien en cours : enregistrer les nouvelles empreintes une fois la file restée vide
+            self.schedule_save()
+        if not self.in_flight and not self.heap and self.decoded:
+            logger.debug(f"Miniatures: {self.throughput():.1f} images/s par worker "
+                         f"({self.decoded} générées, {self.failed} échecs)")
+
+    def schedule_save(self):
+        """Programme l'enregistrement des empreintes, repoussé à chaque nouvelle vague de miniatures."""
+        if self.save_pending is not None:
+            self.root.after_cancel(self.save_pending)
+        self.save_pending = self.root.after(SAVE_DELAY, self.save_store)
+
+    def save_store(self):
+        """Enregistre les empreintes dans un thread dédié : l'écriture de l'index ne bloque pas l'interface."""
+        self.save_pending = None
+        threading.Thread(target=self.cache.store.save, daemon=True, name="artwork-save").start()
+
+    def throughput(self):
+        """Retourne le débit moyen de génération, en images par seconde et par worker."""
+        if self.busy_time <= 0:
+            return 0.0
+        return self.decoded / self.busy_time
+
+    def shutdown(self):
+        """Arrête le pool sans attendre les générations en cours."""
+        self.cancel_all()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        if self.save_pending is not None:
+            self.root.after_cancel(self.save_pending)
+            self.save_pending = None
+        self.cache.store.save()
+
+
+def timed_ensure_thumbnail(image_path, digest, size, cache_dir):
+    """Génère une miniature et retourne la durée de génération (exécutée dans le pool de processus)."""
+    start = time.perf_counter()
+    ensure_thumbnail(image_path, digest, size, cache_dir)
+    return time.perf_counter() - start
@@ -0,0 +1,72 @@
+import os
+import json
+from logger import logger
+
+# Emplacement par défaut de l'instantané de l'interface
+DEFAULT_SNAPSHOT_PATH = os.path.join("cache", "ui_snapshot.json")
+
+# Version du format ; un instantané d'une autre version est ignoré
+SNAPSHOT_VERSION = 1
+
+
+def load_snapshot(roots, snapshot_path=DEFAULT_SNAPSHOT_PATH):
+    """
+    Charge l'instantané de la bibliothèque affichée lors de la session précédente.
+
+    L'instantané permet de peindre la fenêtre dès son ouverture, avant que l'index
+    de scan ne soit chargé et que les bibliothèques ne soient parcourues.
+
+    Args:
+        roots (list): Les bibliothèques configurées (LibraryRoot) ; un instantané pris
+            avec d'autres bibliothèques est ignoré.
+        snapshot_path (str): Le fichier de l'instantané.
+
+    Returns:
+        dict: L'instantané (clés "sort", "layout" et "games", liste de
+            [nom, chemin, image, (mtime_ns, taille, empreinte) ou None] dans l'ordre
+            d'affichage), ou None s'il est absent, invalide ou périmé.
+    """
+    if not os.path.exists(snapshot_path):
+        return None
+    try:
+        with open(snapshot_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Impossible de charger l'instantané de l'interface {snapshot_path}: {e}")
+        return None
+    if not isinstance(data, dict) or data.get("version") != SNAPSHOT_VERSION:
+        return None
+    if data.get("roots") != [root.path for root in roots]:
+        return None
+    return data
+
+
+def save_snapshot(roots, games, thumbnails, sort=None, layout=None, snapshot_path=DEFAULT_SNAPSHOT_PATH):
+    """
+    Enregistre la bibliothèque affichée de manière atomique.
+
+    Args:
+        roots (list): Les bibliothèques configurées (LibraryRoot).
+        games (list): Les jeux, dans l'ordre d'affichage.
+        thumbnails (ThumbnailCache): Le cache fournissant l'empreinte de chaque image,
+            pour retrouver les miniatures sans charger l'index des images.
+        sort (str, optional): Le libellé du tri sélectionné.
+        layout (str, optional): Le libellé de la disposition sélectionnée.
+        snapshot_path (str): Le fichier de l'instantané.
+    """
+    entries = []
+    for game in games:
+        record = thumbnails.record(game.image_path) if game.image_path else None
+        entries.append([game.name, game.path, game.image_path, record])
+    data = {"version": SNAPSHOT_VERSION, "roots": [root.path for root in roots],
+            "sort": sort, "layout": layout, "games": entries}
+    try:
+        snapshot_dir = os.path.dirname(snapshot_path)
+        if snapshot_dir and not os.path.exists(snapshot_dir):
+            os.makedirs(snapshot_dir)
+        tmp_path = snapshot_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"), ensure_ascii=False)
+        os.replace(tmp_path, snapshot_path)
+    except OSError as e:
+        logger.warning(f"Impossible d'enregistrer l'instantané de l'interface {snapshot_path}: {e}")
@@ -0,0 +1,418 @@
+import os
+import sys
+import time
+import errno
+import ctypes
+import ctypes.util
+import select
+import struct
+import threading
+from scanner import DEFAULT_EXCLUDE_PATTERNS, is_excluded
+from background import background, lower_thread_priority
+from logger import logger
+
+# Délai sans nouvel événement avant d'appliquer les modifications (s)
+DEBOUNCE_DELAY = 1.0
+
+# Délai maximal avant d'appliquer les modifications d'une rafale continue (s)
+MAX_DELAY = 10.0
+
+# Intervalle de scrutation des mtimes pour le mode sans inotify (s)
+POLL_INTERVAL = 5.0
+
+# Constantes inotify (linux/inotify.h)
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+# Seuls les ajouts, suppressions et déplacements d'entrées modifient la bibliothèque
+WATCH_MASK = IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR
+
+EVENT_HEADER = struct.Struct("iIII")
+
+
+def coalesce_changes(pending):
+    """
+    Réduit un ensemble de modifications au minimum à relire.
+
+    Un répertoire situé dans un sous-arbre à relire entièrement n'est pas relu
+    séparément.
+
+    Args:
+        pending (dict): Chemin -> récursif (True pour un sous-arbre complet).
+
+    Returns:
+        list: Les modifications (chemin, récursif), triées par chemin.
+    """
+    kept = []
+    prefixes = ()
+    # Les ancêtres sont plus courts : ils sont retenus avant leurs descendants
+    for path in sorted((path for path, recursive in pending.items() if recursive), key=len):
+        if not (path + os.sep).startswith(prefixes):
+            kept.append(path)
+            prefixes += (os.path.join(path, ""),)
+
+    changes = [(path, True) for path in kept]
+    for path, recursive in pending.items():
+        if not recursive and path not in kept and not (path + os.sep).startswith(prefixes):
+            changes.append((path, False))
+    changes.sort()
+    return changes
+
+
+class WatcherBase(threading.Thread):
+    """
+    Surveillance d'une bibliothèque de jeux, commune aux différents mécanismes.
+
+    Les modifications détectées sont accumulées puis transmises par lots au
+    callback, une fois l'activité retombée (DEBOUNCE_DELAY sans nouvel événement,
+    ou au plus MAX_DELAY après le premier) : une installation qui écrit des
+    milliers de fichiers ne produit qu'un seul lot.
+    """
+
+    kind = None
+
+    def __init__(self, root, on_change, exclude_patterns=DEFAULT_EXCLUDE_PATTERNS, max_depth=None):
+        """
+        Initialise la surveillance.
+
+        Args:
+            root (str): Le répertoire racine de la bibliothèque.
+            on_change (callable): Appelé avec la liste des modifications (chemin, récursif),
+                depuis le thread de surveillance.
+            exclude_patterns (iterable): Motifs de dossiers à ne pas surveiller.
+            max_depth (int, optional): Profondeur maximale des dossiers surveillés.
+        """
+        super().__init__(daemon=True, name=f"watch-{self.kind}")
+        self.root = os.path.abspath(root)
+        self.on_change = on_change
+        self.exclude_patterns = exclude_patterns
+        self.max_depth = max_depth
+        self.pending = {}  # Chemin -> récursif
+        self.first_event = None
+        self.last_event = None
+        self.stopped = threading.Event()
+
+    def depth_of(self, path):
+        """Retourne la profondeur d'un répertoire sous la racine."""
+        relative = os.path.relpath(path, self.root)
+        return 0 if relative == os.curdir else relative.count(os.sep) + 1
+
+    def should_watch(self, path, name):
+        """Indique si un sous-dossier doit être surveillé."""
+        if is_excluded(name, self.exclude_patterns):
+            return False
+        return self.max_depth is None or self.depth_of(path) <= self.max_depth
+
+    def add_change(self, path, recursive):
+        """Enregistre une modification en attente."""
+        now = time.monotonic()
+        if not self.pending:
+            self.first_event = now
+        self.last_event = now
+        self.pending[path] = self.pending.get(path, False) or recursive
+
+    def flush_delay(self):
+        """Retourne le délai avant l'envoi des modifications en attente, ou None s'il n'y en a pas."""
+        if not self.pending:
+            return None
+        deadline = min(self.last_event + DEBOUNCE_DELAY, self.first_event + MAX_DELAY)
+        return max(0.0, deadline - time.monotonic())
+
+    def flush(self):
+        """Transmet les modifications en attente au callback, après la fin du mode jeu éventuel."""
+        # Mode jeu : différer la relecture, les nouvelles modifications restant en file
+        while not background.wait(DEBOUNCE_DELAY):
+            if self.stopped.is_set():
+                return
+        changes = coalesce_changes(self.pending)
+        self.pending = {}
+        logger.debug(f"Bibliothèque modifiée ({self.kind}): {len(changes)} emplacements à relire")
+        try:
+            self.on_change(changes)
+        except Exception as e:
+            logger.error(f"Erreur lors de l'application des modifications de {self.root}: {e}", exc_info=True)
+
+    def stop(self):
+        """Arrête la surveillance."""
+        self.stopped.set()
+
+
+class InotifyWatcher(WatcherBase):
+    """
+    Surveillance par inotify (Linux), via ctypes.
+
+    Le thread reste bloqué dans select tant que rien ne change : aucun réveil,
+    aucune consommation CPU au repos.
+    """
+
+    kind = "inotify"
+
+    def __init__(self, root, on_change, exclude_patterns=DEFAULT_EXCLUDE_PATTERNS, max_depth=None):
+        """
+        Initialise inotify. Les surveillances sont posées par le thread, au démarrage.
+
+        Raises:
+            OSError: Si inotify est indisponible.
+        """
+        super().__init__(root, on_change, exclude_patterns, max_depth)
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error))
+        self.wake_r, self.wake_w = os.pipe()
+        os.set_blocking(self.wake_w, False)
+        # Le réveil (thread appelant stop) et la fermeture (thread du watcher) se partagent les
+        # descripteurs : un numéro réutilisé après fermeture ne doit jamais recevoir d'écriture
+        self.fd_lock = threading.Lock()
+        self.closed = False
+        self.watches = {}  # Descripteur de surveillance -> chemin
+        self.fallback = None  # Surveillance par scrutation si la limite de surveillances est atteinte
+
+    def watch_tree(self, path):
+        """Surveille un dossier et ses sous-dossiers."""
+        stack = [path]
+        while stack and not self.stopped.is_set():
+            directory = stack.pop()
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+            if wd < 0:
+                error = ctypes.get_errno()
+                if error == errno.ENOSPC:
+                    raise OSError(error, "limite de surveillances inotify atteinte "
+                                         "(fs.inotify.max_user_watches)")
+                # Dossier supprimé ou inaccessible entre-temps
+                continue
+            self.watches[wd] = directory
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False) and self.should_watch(entry.path, entry.name):
+                            stack.append(entry.path)
+            except OSError:
+                continue
+
+    def run(self):
+        """Boucle du thread : pose les surveillances, puis lit les événements et les transmet par lots."""
+        lower_thread_priority()
+        try:
+            # Parcours initial dans ce thread : il peut être long sur une grande bibliothèque
+            self.watch_tree(self.root)
+        except OSError as e:
+            self.close()
+            logger.warning(f"inotify indisponible pour {self.root} ({e}), surveillance par scrutation")
+            self.fallback = PollingWatcher(self.root, self.on_change, self.exclude_patterns, self.max_depth)
+            if not self.stopped.is_set():
+                self.fallback.run()
+            return
+        try:
+            while not self.stopped.is_set():
+                ready, _, _ = select.select([self.fd, self.wake_r], [], [], self.flush_delay())
+                if self.wake_r in ready:
+                    break
+                if self.fd in ready:
+                    self.read_events()
+                elif self.pending:
+                    self.flush()
+        finally:
+            self.close()
+
+    def read_events(self):
+        """Lit les événements disponibles et enregistre les modifications correspondantes."""
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            name = os.fsdecode(data[offset + EVENT_HEADER.size:offset + EVENT_HEADER.size + length].rstrip(b"\0"))
+            offset += EVENT_HEADER.size + length
+
+            if mask & IN_Q_OVERFLOW:
+                # Événements perdus : relire toute la bibliothèque
+                self.add_change(self.root, True)
+                continue
+            directory = self.watches.get(wd)
+            if directory is None:
+                continue
+            if mask & IN_IGNORED:
+                del self.watches[wd]
+                continue
+            if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                self.add_change(directory, True)
+                continue
+
+            path = os.path.join(directory, name)
+            if mask & IN_ISDIR:
+                if not self.should_watch(path, name):
+                    continue
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    try:
+                        self.watch_tree(path)
+                    except OSError as e:
+                        logger.warning(f"Surveillance incomplète de {path}: {e}")
+                self.add_change(path, True)
+            else:
+                self.add_change(directory, False)
+
+    def stop(self):
+        """Arrête la surveillance et réveille le thread."""
+        super().stop()
+        if self.fallback is not None:
+            self.fallback.stop()
+        with self.fd_lock:
+            if self.closed:
+                return
+            try:
+                os.write(self.wake_w, b"\0")
+            except OSError:
+                # Tube plein : un réveil est déjà en attente
+                pass
+
+    def close(self):
+        """Libère le descripteur inotify et le tube de réveil (thread du watcher uniquement)."""
+        with self.fd_lock:
+            if self.closed:
+                return
+            self.closed = True
+            for fd in (self.fd, self.wake_r, self.wake_w):
+                os.close(fd)
+            self.fd = self.wake_r = self.wake_w = -1
+
+
+class PollingWatcher(WatcherBase):
+    """
+    Surveillance portable par comparaison des mtimes des dossiers.
+
+    Seul le stat de chaque dossier connu est effectué à chaque passage : un
+    dossier n'est relu que si son mtime a changé (ajout, suppression ou
+    renommage d'une entrée).
+    """
+
+    kind = "polling"
+
+    def __init__(self, root, on_change, exclude_patterns=DEFAULT_EXCLUDE_PATTERNS, max_depth=None,
+                 interval=POLL_INTERVAL):
+        """
+        Initialise la surveillance. L'état initial des dossiers est relevé par le thread, au démarrage.
+
+        Args:
+            interval (float): Intervalle entre deux passages, en secondes.
+        """
+        super().__init__(root, on_change, exclude_patterns, max_depth)
+        self.interval = interval
+        self.mtimes = {}  # Dossier -> mtime
+        self.children = {}  # Dossier -> sous-dossiers surveillés
+
+    def snapshot(self, path):
+        """Relève le mtime d'un dossier et de ses sous-dossiers."""
+        stack = [path]
+        while stack and not self.stopped.is_set():
+            directory = stack.pop()
+            try:
+                self.mtimes[directory] = os.stat(directory).st_mtime_ns
+                children = []
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False) and self.should_watch(entry.path, entry.name):
+                            children.append(entry.path)
+            except OSError:
+                self.mtimes.pop(directory, None)
+                continue
+            self.children[directory] = children
+            stack.extend(children)
+
+    def forget(self, path):
+        """Oublie un dossier et ses sous-dossiers."""
+        stack = [path]
+        while stack:
+            directory = stack.pop()
+            self.mtimes.pop(directory, None)
+            stack.extend(self.children.pop(directory, ()))
+
+    def poll(self):
+        """Compare les mtimes et enregistre les modifications. Retourne True si un changement a été vu."""
+        changed = False
+        for directory, mtime in list(self.mtimes.items()):
+            if directory not in self.mtimes:
+                # Oublié pendant ce passage (sous-arbre supprimé)
+                continue
+            try:
+                current = os.stat(directory).st_mtime_ns
+            except OSError:
+                self.forget(directory)
+                self.add_change(directory, True)
+                changed = True
+                continue
+            if current == mtime:
+                continue
+
+            changed = True
+            previous = set(self.children.get(directory, ()))
+            self.snapshot_directory(directory)
+            current_children = set(self.children.get(directory, ()))
+            for child in previous - current_children:
+                self.forget(child)
+                self.add_change(child, True)
+            for child in current_children - previous:
+                self.snapshot(child)
+                self.add_change(child, True)
+            self.add_change(directory, False)
+        return changed
+
+    def snapshot_directory(self, directory):
+        """Relève le mtime et les sous-dossiers d'un seul dossier."""
+        try:
+            self.mtimes[directory] = os.stat(directory).st_mtime_ns
+            with os.scandir(directory) as entries:
+                self.children[directory] = [
+                    entry.path for entry in entries
+                    if entry.is_dir(follow_symlinks=False) and self.should_watch(entry.path, entry.name)
+                ]
+        except OSError:
+            pass
+
+    def run(self):
+        """Boucle du thread : relevé initial, puis un passage par intervalle (lots envoyés après un passage calme)."""
+        lower_thread_priority()
+        self.snapshot(self.root)
+        while not self.stopped.wait(self.interval):
+            changed = self.poll()
+            if self.pending and (not changed or time.monotonic() - self.first_event >= MAX_DELAY):
+                self.flush()
+
+
+def create_watcher(root, on_change, exclude_patterns=DEFAULT_EXCLUDE_PATTERNS, max_depth=None):
+    """
+    Crée la surveillance la plus efficace disponible pour une bibliothèque.
+
+    inotify est utilisé sous Linux ; ailleurs, ou si inotify échoue (limite de
+    surveillances atteinte, constatée au démarrage du thread), la surveillance se
+    fait par scrutation des mtimes. Aucun dossier n'est parcouru avant start() :
+    la création peut se faire depuis le thread Tk.
+
+    Args:
+        root (str): Le répertoire racine de la bibliothèque.
+        on_change (callable): Appelé avec la liste des modifications (chemin, récursif).
+        exclude_patterns (iterable): Motifs de dossiers à ne pas surveiller.
+        max_depth (int, optional): Profondeur maximale des dossiers surveillés.
+
+    Returns:
+        WatcherBase: La surveillance, non démarrée.
+    """
+    if sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(root, on_change, exclude_patterns, max_depth)
+        except (OSError, AttributeError) as e:
+            logger.warning(f"inotify indisponible pour {root} ({e}), surveillance par scrutation")
+    return PollingWatcher(root, on_change, exclude_patterns, max_depth)